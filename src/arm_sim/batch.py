@@ -0,0 +1,187 @@
+import csv
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.planner import interpolate_joint_space_batch
+from arm_sim.trajectory import JointTrajectory
+from arm_sim.scenario import check_collisions, check_inputs, load_scenario, plan_roadmap_trajectory, solve_target
+
+# Batch scenario runner: runs the plan/IK/clamp pipeline for many scenarios in
+# a worker pool without rendering and writes one compact result row each.
+# Input is a directory of scenario JSON files or a JSONL file (one scenario
+# object per line).
+
+RESULT_FIELDS = [
+    "name", "status", "n_joints", "final_pose", "clamped", "converged",
+    "path_length", "n_frames", "collision_frame", "min_clearance", "time_ms", "error",
+]
+
+# Frames per forward-kinematics block when measuring the played path
+_METRIC_BLOCK = 4096
+
+def iter_scenarios(path) -> Iterator[Tuple[str, Any]]:
+    # Yields (name, scenario) pairs lazily; unreadable entries are yielded as
+    # the exception so the runner can report them without stopping
+    path = Path(path)
+    if path.is_dir():
+        for p in sorted(path.glob("*.json")):
+            try:
+                yield p.name, load_scenario(p)
+            except (OSError, ValueError) as e:
+                yield p.name, e
+        return
+
+    with path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError("Scenario json must be an object with keys")
+            except ValueError as e:
+                yield f"{path.name}:{lineno}", e
+                continue
+            yield str(data.get("name", f"{path.name}:{lineno}")), data
+
+def _get(scenario: Dict[str, Any], key: str, default=None):
+    value = scenario.get(key)
+    return default if value is None else value
+
+def _path_length(links, frames) -> float:
+    # End-effector path length, with FK over blocks of frames (one frame of overlap)
+    total = 0.0
+    for k0 in range(0, len(frames) - 1, _METRIC_BLOCK):
+        block = np.asarray(frames[k0:k0 + _METRIC_BLOCK + 1], dtype=float)
+        ee = forward_kinematics_batch(links, block, end_effector_only=True)
+        total += float(np.hypot(*np.diff(ee, axis=0).T).sum())
+    return total
+
+def run_scenario(item: Tuple[str, Any]) -> Dict[str, Any]:
+    # One scenario through clamp -> IK -> plan -> FK -> collision check; never raises
+    name, scenario = item
+    row: Dict[str, Any] = {field: "" for field in RESULT_FIELDS}
+    row["name"] = name
+    t0 = time.perf_counter()
+    try:
+        if isinstance(scenario, Exception):
+            raise scenario
+
+        links = scenario.get("links")
+        start = scenario.get("start")
+        end = scenario.get("end")
+        target = scenario.get("target")
+        duration = float(_get(scenario, "duration", 3.0))
+        fps = int(_get(scenario, "fps", 30))
+        easing = _get(scenario, "easing", "linear")
+
+        clamped = False
+        converged = True
+        if target is not None:
+            if links is None:
+                raise ValueError("IK mode requires links.")
+            sol = solve_target(links, target, _get(scenario, "prefer", "elbow_up"),
+                               bool(scenario.get("clamp", False)), seed=start)
+            end, clamped, converged = sol.end, sol.clamped, sol.converged
+            if start is None:
+                start = [0.0] * len(links)
+        check_inputs(links, start, end)
+
+        cart_tol, joint_tol = scenario.get("cart_tol"), scenario.get("joint_tol")
+        adaptive = cart_tol is not None or joint_tol is not None
+        if _get(scenario, "planner", "interp") == "prm":
+            trajectory = plan_roadmap_trajectory(links, start, end, duration, scenario)
+        else:
+            trajectory = JointTrajectory([start, end], duration, easing) if adaptive else None
+
+        if adaptive:
+            # Sparse keyframes, played back as a lazy fixed-rate view
+            keyframes = trajectory.keyframes(links, cart_tol=cart_tol, joint_tol=joint_tol)
+            frames = keyframes.at_fps(fps)
+        elif trajectory is not None:
+            frames = trajectory.at_fps(fps)[:]
+        else:
+            frames = interpolate_joint_space_batch(start, end, duration, fps, easing)[0]
+        # Metrics and collisions use the frames actually played, so rows from
+        # interp and adaptive runs of the same scenario are comparable
+        path_length = _path_length(links, frames)
+        report = check_collisions(links, frames, scenario)
+        if report is not None:
+            row.update(
+                collision_frame="" if report.first_frame is None else report.first_frame,
+                min_clearance=f"{report.min_clearance:.6f}",
+            )
+
+        row.update(
+            status="ok",
+            n_joints=len(links),
+            final_pose=" ".join(f"{a:.6f}" for a in frames[-1]),
+            clamped=int(clamped),
+            converged=int(converged),
+            path_length=f"{path_length:.6f}",
+            n_frames=len(frames),
+        )
+    except Exception as e:
+        row.update(status="error", error=f"{type(e).__name__}: {e}")
+    row["time_ms"] = f"{(time.perf_counter() - t0) * 1000.0:.3f}"
+    return row
+
+class _ResultWriter:
+    # CSV by default, JSON lines when the output name ends in .jsonl
+
+    def __init__(self, path):
+        self._f = open(path, "w", encoding="utf-8", newline="")
+        self._jsonl = str(path).endswith(".jsonl")
+        if not self._jsonl:
+            self._csv = csv.DictWriter(self._f, fieldnames=RESULT_FIELDS)
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]):
+        if self._jsonl:
+            self._f.write(json.dumps(row) + "\n")
+        else:
+            self._csv.writerow(row)
+
+    def close(self):
+        self._f.close()
+
+def run_batch(
+        source,
+        out_path,
+        workers: Optional[int] = None,
+        chunksize: int = 256,
+) -> Dict[str, int]:
+    # Streams scenarios through a process pool (ordered, chunked) into the
+    # results file. Returns counts of ok/error rows.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    counts = {"ok": 0, "error": 0}
+
+    writer = _ResultWriter(out_path)
+    try:
+        scenarios = iter_scenarios(source)
+        if workers <= 1:
+            results = map(run_scenario, scenarios)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(processes=workers)
+            results = pool.imap(run_scenario, scenarios, chunksize=chunksize)
+        try:
+            for row in results:
+                counts[row["status"]] += 1
+                writer.write(row)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+    finally:
+        writer.close()
+    return counts
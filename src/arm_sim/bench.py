@@ -0,0 +1,288 @@
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics, forward_kinematics_batch
+from arm_sim.fleet import Fleet
+from arm_sim.dynamics import ArmDynamics, simulate
+from arm_sim.jacobian import pose_metrics
+from arm_sim.cartesian import sample_arc, solve_path
+from arm_sim.telemetry import Resampler
+from arm_sim.ik import (
+    clamp_target_to_workspace,
+    clamp_target_to_workspace_batch,
+    ik_2link_all,
+    ik_2link_batch,
+    ik_nlink_batch,
+)
+from arm_sim.planner import interpolate_joint_space, interpolate_joint_space_batch
+
+# Benchmark suite for the kinematics, planning and rendering hot paths.
+#
+#   python -m arm_sim.bench                         run everything, print a table
+#   python -m arm_sim.bench --out results.json      also save results
+#   python -m arm_sim.bench --baseline base.json    compare, exit 1 on regression
+#
+# Every case is timed over repeated runs; latency percentiles are per call and
+# throughput counts work items (frames, targets, moves) per second.
+
+class Case:
+    def __init__(self, name: str, group: str, items: int, setup: Callable[[], Callable[[], Any]]):
+        self.name = name
+        self.group = group
+        self.items = items      # Work items per call, for throughput
+        self.setup = setup      # Returns the callable to time
+
+def _angles(m: int, n: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-180.0, 180.0, (m, n))
+
+def _targets(k: int, reach: float, seed: int = 1) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(-1.1 * reach, 1.1 * reach, (k, 2))
+
+def build_cases(quick: bool = False) -> List[Case]:
+    frame_counts = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    joint_counts = [2, 6]
+    target_counts = [1_000, 10_000] if quick else [1_000, 10_000, 100_000]
+    render_counts = [30] if quick else [30, 120]
+    cases: List[Case] = []
+
+    # Forward kinematics
+    for n in joint_counts:
+        links = [1.0] * n
+        for m in frame_counts:
+            frames = _angles(m, n)
+            cases.append(Case(f"fk_batch[frames={m},joints={n}]", "fk", m,
+                              lambda links=links, frames=frames:
+                              lambda: forward_kinematics_batch(links, frames)))
+        frames = _angles(frame_counts[0], n).tolist()
+        cases.append(Case(f"fk_scalar[frames={frame_counts[0]},joints={n}]", "fk", frame_counts[0],
+                          lambda links=links, frames=frames:
+                          lambda: [forward_kinematics(links, f) for f in frames]))
+
+    # Inverse kinematics and clamping
+    for k in target_counts:
+        pts = _targets(k, 17.0)
+        cases.append(Case(f"ik_2link_batch[targets={k}]", "ik", k,
+                          lambda pts=pts: lambda: ik_2link_batch(pts, 7.0, 10.0, clamp=True)))
+        cases.append(Case(f"clamp_batch[targets={k}]", "ik", k,
+                          lambda pts=pts: lambda: clamp_target_to_workspace_batch(pts, 7.0, 10.0)))
+    pts = _targets(target_counts[0], 17.0).tolist()
+    cases.append(Case(f"ik_2link_scalar[targets={target_counts[0]}]", "ik", target_counts[0],
+                      lambda pts=pts: lambda: [ik_2link_all(x, y, 7.0, 10.0) for x, y in pts]))
+    cases.append(Case(f"clamp_scalar[targets={target_counts[0]}]", "ik", target_counts[0],
+                      lambda pts=pts: lambda: [clamp_target_to_workspace(x, y, 7.0, 10.0) for x, y in pts]))
+    for n in (3, 6):
+        links = [1.0] * n
+        k = target_counts[0]
+        pts = forward_kinematics_batch(links, _angles(k, n, seed=2), end_effector_only=True)
+        cases.append(Case(f"ik_nlink_batch[targets={k},joints={n}]", "ik", k,
+                          lambda links=links, pts=pts: lambda: ik_nlink_batch(links, pts)))
+
+    # Jacobians and dexterity measures
+    for m in frame_counts:
+        frames = _angles(m, 6)
+        cases.append(Case(f"pose_metrics[poses={m},joints=6]", "jacobian", m,
+                          lambda frames=frames: lambda: pose_metrics([1.0] * 6, frames)))
+
+    # Cartesian tool paths: IK for every sample, branch-continuous
+    for k in target_counts[:2]:
+        path = sample_arc([12.0, 3.0], [-5.0, 10.0], [0.0, 0.0], k / 30.0, 30)
+        cases.append(Case(f"cartesian_path[points={len(path)},joints=2]", "plan", len(path),
+                          lambda path=path: lambda: solve_path([7.0, 10.0], path, start_pose=[0.0, 30.0])))
+        cases.append(Case(f"cartesian_path[points={len(path)},joints=3]", "plan", len(path),
+                          lambda path=path: lambda: solve_path([7.0, 6.0, 4.0], path, start_pose=[20.0] * 3)))
+
+    # Planning
+    for m in frame_counts[:2]:
+        duration = m / 30.0
+        cases.append(Case(f"interpolate[frames={m + 1},joints=6]", "plan", m + 1,
+                          lambda duration=duration:
+                          lambda: interpolate_joint_space([0.0] * 6, [90.0] * 6, duration, 30, "cosine")))
+    for p in target_counts:
+        pairs = _angles(2 * p, 6).reshape(p, 2, 6)
+        cases.append(Case(f"interpolate_batch[moves={p},frames=31,joints=6]", "plan", p,
+                          lambda pairs=pairs:
+                          lambda: interpolate_joint_space_batch(pairs[:, 0], pairs[:, 1], 1.0, 30, "cosine")))
+
+    # Fleet stepping: every arm's pose and joint positions at one instant
+    for a in ([100] if quick else [100, 1000]):
+        fleet = Fleet([[1.0] * 6] * a, _angles(a, 6, seed=3), _angles(a, 6, seed=4),
+                      base=_targets(a, 100.0), easing="cosine")
+        cases.append(Case(f"fleet_step[arms={a},joints=6]", "fleet", a,
+                          lambda fleet=fleet: lambda: fleet.positions_at(1.0)))
+
+    # Dynamics: inverse dynamics over a batch of states, and RK4 steps of many arms
+    model = ArmDynamics([1.0] * 6)
+    for b in ([1_000] if quick else [1_000, 10_000]):
+        q, qd, qdd = (np.radians(_angles(b, 6, seed=s)) for s in (5, 6, 7))
+        cases.append(Case(f"rnea[states={b},joints=6]", "dynamics", b,
+                          lambda q=q, qd=qd, qdd=qdd: lambda: model.inverse_dynamics(q, qd, qdd)))
+        cases.append(Case(f"rk4_step[arms={b},joints=6,steps=10]", "dynamics", 10 * b,
+                          lambda q=q: lambda: simulate(model, q, dt=1e-3, steps=10, record_every=10)))
+
+    # Telemetry: irregular 1 kHz samples resampled to 30 fps, one chunk per call
+    for m in ([65_536] if quick else [65_536, 262_144]):
+        t = np.cumsum(np.random.default_rng(8).uniform(5e-4, 1.5e-3, m))
+        q = _angles(m, 6, seed=9)
+        cases.append(Case(f"telemetry_resample[rows={m},joints=6]", "telemetry", m,
+                          lambda t=t, q=q: lambda: list(Resampler(30).push(t, q))))
+
+    # Headless rendering (Agg, same drawing path as the exporter)
+    for m in render_counts:
+        cases.append(Case(f"render_agg[frames={m}]", "render", m, lambda m=m: _render_setup(m)))
+
+    # GUI redraw: persistent artists blitted over a cached background, and the
+    # full-redraw fallback used with "Blitted rendering" off
+    for m in render_counts:
+        cases.append(Case(f"render_gui_blit[frames={m}]", "render", m,
+                          lambda m=m: _gui_render_setup(m, blit=True)))
+    cases.append(Case(f"render_gui_full[frames={render_counts[0]}]", "render", render_counts[0],
+                      lambda: _gui_render_setup(render_counts[0], blit=False)))
+    return cases
+
+def _render_setup(m: int) -> Callable[[], Any]:
+    from arm_sim.export import _FrameRenderer
+    links = [7.0, 10.0, 4.0]
+    angles = _angles(m, 3)
+    trail = forward_kinematics_batch(links, angles, end_effector_only=True)
+    renderer = _FrameRenderer(links, trail, (6.4, 4.8), 100)
+    return lambda: renderer.render_range(0, angles)
+
+def _gui_render_setup(m: int, blit: bool) -> Callable[[], Any]:
+    # Same artists and per-pose steps as ArmSimWindow._draw_pose, on an Agg
+    # canvas (the Qt canvas renders through Agg too) so no window is needed
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    links = [7.0, 10.0, 4.0]
+    frames = _angles(m, 3)
+    fig = Figure(figsize=(6.4, 4.8), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.set_aspect("equal", adjustable="box")
+    ax.grid(True, linestyle="--", alpha=0.5)
+    ax.set_xlim(-23.1, 23.1)
+    ax.set_ylim(-23.1, 23.1)
+    (arm_line,) = ax.plot([], [], "-o", color="blue", markersize=8, animated=blit)
+    (target_marker,) = ax.plot([5.0], [5.0], marker="x", markersize=10, linestyle="None", animated=blit)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    def run():
+        for pose in frames:
+            pts = forward_kinematics_batch(links, pose)
+            arm_line.set_data(pts[:, 0], pts[:, 1])
+            if blit:
+                canvas.restore_region(background)
+                ax.draw_artist(arm_line)
+                ax.draw_artist(target_marker)
+                canvas.blit(fig.bbox)
+            else:
+                canvas.draw()
+    return run
+
+def run_case(case: Case, min_time: float = 0.5, min_runs: int = 5, max_runs: int = 1000) -> Dict[str, Any]:
+    fn = case.setup()
+    fn()    # Warm-up (caches, lazy imports)
+
+    samples: List[float] = []
+    t_start = time.perf_counter()
+    while len(samples) < max_runs and (len(samples) < min_runs or time.perf_counter() - t_start < min_time):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+
+    s = np.array(samples)
+    median = float(np.median(s))
+    return {
+        "name": case.name,
+        "group": case.group,
+        "items": case.items,
+        "runs": len(samples),
+        "p50_ms": median * 1e3,
+        "p90_ms": float(np.percentile(s, 90)) * 1e3,
+        "p99_ms": float(np.percentile(s, 99)) * 1e3,
+        "min_ms": float(s.min()) * 1e3,
+        "throughput_per_s": case.items / median if median > 0 else float("inf"),
+    }
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    # A case regresses when its median latency grows by more than `threshold`
+    # (0.10 = 10 %) over the baseline. Cases missing from either side are skipped.
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get(r["name"])
+        if b is None or b["p50_ms"] <= 0:
+            continue
+        ratio = r["p50_ms"] / b["p50_ms"]
+        r["baseline_p50_ms"] = b["p50_ms"]
+        r["ratio"] = ratio
+        if ratio > 1.0 + threshold:
+            regressions.append(f"{r['name']}: p50 {b['p50_ms']:.3f} -> {r['p50_ms']:.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+def _print_table(results: List[Dict[str, Any]]):
+    print(f"{'case':<48} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'items/s':>14} {'vs base':>8}")
+    for r in results:
+        ratio = f"{r['ratio']:.2f}x" if "ratio" in r else ""
+        print(f"{r['name']:<48} {r['p50_ms']:>10.3f} {r['p90_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+              f"{r['throughput_per_s']:>14,.0f} {ratio:>8}")
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Benchmarks for arm_sim hot paths")
+    p.add_argument("--filter", type=str, default=None,
+                   help="Only run cases whose name or group contains this text")
+    p.add_argument("--quick", action="store_true", help="Smaller workloads for a fast check")
+    p.add_argument("--min-time", type=float, default=0.5, help="Minimum seconds to time each case")
+    p.add_argument("--out", type=str, default=None, help="Write results as JSON")
+    p.add_argument("--baseline", type=str, default=None, help="Baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.10,
+                   help="Allowed median slowdown versus the baseline (0.10 = 10%%)")
+    return p
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    cases = build_cases(quick=args.quick)
+    if args.filter:
+        cases = [c for c in cases if args.filter in c.name or args.filter == c.group]
+
+    results = []
+    for case in cases:
+        results.append(run_case(case, min_time=args.min_time))
+        print(f"  {case.name}", file=sys.stderr)
+
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    _print_table(results)
+
+    if args.out:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "timestamp": time.time(),
+            },
+            "results": results,
+        }
+        Path(args.out).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.ik import (
+    clamp_target_to_workspace_batch,
+    clamp_target_to_workspace_nlink_batch,
+    ik_2link_all_batch,
+    ik_nlink_batch,
+    wrap_deg,
+)
+from arm_sim.jacobian import pose_metrics
+from arm_sim.planner import ease_profile
+
+# Cartesian motion: the end effector follows a sampled tool path (straight
+# line, arc, or any (K, 2) array of points) and IK is solved for every sample
+# at once.
+#
+# 2 links: both closed-form branches are solved for all samples in one call.
+# The branch that continues the previous sample is then chosen without a
+# Python loop. Between neighbouring samples, continuity either keeps the
+# branch label or swaps it; a swap happens when the path passes through a
+# stretched or folded arm, where the two branches meet. The label of
+# sample k is therefore the initial label flipped by the parity of the
+# swaps up to k, which is a cumulative sum.
+#
+# N links: the damped least-squares solver runs on blocks of consecutive
+# samples, each block warm-started from the last pose of the previous one, so
+# neighbouring samples stay on the same solution family.
+
+_NLINK_BLOCK = 64   # Samples per warm-started block for N-link arms
+
+def sample_line(start_xy, end_xy, duration_s: float = 3.0, fps: int = 30,
+                easing: str = "linear") -> np.ndarray:
+    # (F, 2) points on the segment, one per frame, with eased progress
+    p0 = np.asarray(start_xy, dtype=float)
+    p1 = np.asarray(end_xy, dtype=float)
+    s = ease_profile(max(1, int(round(duration_s * fps))), easing)[:, np.newaxis]
+    return p0 + s * (p1 - p0)
+
+def sample_arc(start_xy, end_xy, center_xy, duration_s: float = 3.0, fps: int = 30,
+               easing: str = "linear") -> np.ndarray:
+    # (F, 2) points from start to end around center, the short way round.
+    # The radius is interpolated too, so unequal radii give a spiral that
+    # still lands exactly on end_xy.
+    c = np.asarray(center_xy, dtype=float)
+    v0 = np.asarray(start_xy, dtype=float) - c
+    v1 = np.asarray(end_xy, dtype=float) - c
+    r0, r1 = np.hypot(*v0), np.hypot(*v1)
+    a0 = np.arctan2(v0[1], v0[0])
+    sweep = np.radians(wrap_deg(np.degrees(np.arctan2(v1[1], v1[0]) - a0)))
+    s = ease_profile(max(1, int(round(duration_s * fps))), easing)
+    r = r0 + s * (r1 - r0)
+    a = a0 + s * sweep
+    return c + np.stack((r * np.cos(a), r * np.sin(a)), axis=-1)
+
+class CartesianPlan(NamedTuple):
+    angles: np.ndarray      # (K, N) joint angles in degrees, continuous along the path
+    targets: np.ndarray     # (K, 2) points actually solved for (clamped if requested)
+    reachable: np.ndarray   # (K,) False where the requested point is outside the workspace
+    converged: np.ndarray   # (K,) IK reached the (clamped) point
+    singular: np.ndarray    # (K,) pose is near a singularity (sigma_min below threshold)
+
+    def ok(self) -> np.ndarray:
+        return self.reachable & self.converged & ~self.singular
+
+def _joint_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (wrap_deg(a - b) ** 2).sum(axis=-1)
+
+def solve_path(
+        link_lengths: Sequence[float],
+        points,
+        start_pose: Optional[Sequence[float]] = None,
+        prefer: str = "elbow_up",
+        clamp: bool = False,
+        singular_tol: float = 0.02,
+        ik_tol: float = 1e-4,
+        ik_iters: int = 100,
+) -> CartesianPlan:
+    # IK for every point of a tool path. The first sample takes the branch
+    # nearest start_pose (or `prefer` without one); later samples follow on.
+    # singular_tol is relative to the arm's reach.
+    links = [float(L) for L in link_lengths]
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    if pts.shape[0] == 0:
+        raise ValueError("path has no points")
+
+    if len(links) == 2:
+        clamped, was_clamped = clamp_target_to_workspace_batch(pts, links[0], links[1])
+    else:
+        clamped, was_clamped = clamp_target_to_workspace_nlink_batch(pts, links)
+    targets = clamped if clamp else pts
+    reachable = ~was_clamped
+
+    if len(links) == 2:
+        up, down = ik_2link_all_batch(targets, links[0], links[1])
+
+        # Initial label (0 = up, 1 = down)
+        if start_pose is not None:
+            first = int(_joint_distance(down[0], np.asarray(start_pose, dtype=float))
+                        < _joint_distance(up[0], np.asarray(start_pose, dtype=float)))
+        else:
+            first = int(prefer == "elbow_down")
+
+        # A swap where continuing on the other label is the closer move
+        swap = np.zeros(len(pts), dtype=int)
+        swap[1:] = _joint_distance(down[1:], up[:-1]) < _joint_distance(up[1:], up[:-1])
+        label = (first + np.cumsum(swap)) % 2
+        angles = np.where(label[:, np.newaxis] == 1, down, up)
+        converged = np.ones(len(pts), dtype=bool)
+        if not clamp:
+            # Outside the workspace the closed form returns the nearest
+            # stretched/folded pose, which does not reach the point
+            converged = reachable.copy()
+    else:
+        angles = np.empty((len(pts), len(links)))
+        converged = np.empty(len(pts), dtype=bool)
+        seed = np.asarray(start_pose, dtype=float) if start_pose is not None else None
+        for b0 in range(0, len(pts), _NLINK_BLOCK):
+            block = slice(b0, b0 + _NLINK_BLOCK)
+            res = ik_nlink_batch(links, targets[block], seed=seed, tol=ik_tol, max_iter=ik_iters)
+            angles[block] = res.angles
+            converged[block] = res.converged
+            seed = res.angles[-1]
+
+    # Unwrap so consecutive samples never jump by 360°
+    angles = np.degrees(np.unwrap(np.radians(angles), axis=0))
+    if start_pose is not None:
+        # Start the unwrapped sequence within ±180° of the start pose
+        offset = np.asarray(start_pose, dtype=float) - angles[0]
+        angles += 360.0 * np.round(offset / 360.0)
+
+    singular = pose_metrics(links, angles).sigma_min < singular_tol * sum(links)
+    return CartesianPlan(angles, targets, reachable, converged, singular)
+
+def plan_cartesian(
+        link_lengths: Sequence[float],
+        start_pose: Sequence[float],
+        end_xy,
+        duration_s: float = 3.0,
+        fps: int = 30,
+        easing: str = "linear",
+        path: str = "line",
+        arc_center=None,
+        clamp: bool = False,
+) -> CartesianPlan:
+    # Move the end effector from its position at start_pose to end_xy along a
+    # line or an arc about arc_center, one sample per frame
+    start_xy = forward_kinematics_batch(link_lengths, start_pose, end_effector_only=True)
+    if path == "line":
+        pts = sample_line(start_xy, end_xy, duration_s, fps, easing)
+    elif path == "arc":
+        if arc_center is None:
+            raise ValueError("arc path requires arc_center")
+        pts = sample_arc(start_xy, end_xy, arc_center, duration_s, fps, easing)
+    else:
+        raise ValueError("path must be line or arc")
+    return solve_path(link_lengths, pts, start_pose=start_pose, clamp=clamp)
+
+def describe_plan(plan: CartesianPlan) -> Optional[str]:
+    # One-line warning about flagged samples, or None if the path is clean
+    parts = []
+    for name, mask in (("unreachable", ~plan.reachable), ("not converged", ~plan.converged),
+                       ("near-singular", plan.singular)):
+        if mask.any():
+            parts.append(f"{int(mask.sum())} {name} (first at sample {int(np.argmax(mask))})")
+    if not parts:
+        return None
+    return f"Cartesian path: {', '.join(parts)} of {len(plan.angles)} samples"
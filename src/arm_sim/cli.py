@@ -1,21 +1,28 @@
 import argparse
 import json
+import sys
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from arm_sim.planner import interpolate_joint_space
-from arm_sim.visualize import animate_joint_trajectory
-from arm_sim.ik import ik_2link, clamp_target_to_workspace
+from arm_sim.ik_cache import IKLookupTable
+from arm_sim.scenario import load_scenario, solve_target, check_inputs, check_collisions, describe_collision, plan_roadmap_trajectory
+from arm_sim.batch import run_batch
+from arm_sim.telemetry import describe_resample, open_telemetry
+from arm_sim.trajfile import open_trajectory, write_trajectory
+from arm_sim.trajectory import JointTrajectory
+from arm_sim.fleet import Fleet
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.cartesian import describe_plan, plan_cartesian
+from arm_sim import profiling
 
-# Helpers
-def load_scenario(path: Path) -> Dict[str, Any]:
-    if not path.exists():
-        raise FileNotFoundError(f"Scenario file not found: {path}")
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-    if not isinstance(data, dict):
-        raise ValueError("Scenario json must be an object with keys")
-    return data
+# Plotting (matplotlib) is only imported when something is actually drawn, so
+# the headless subcommands below start without it:
+#   arm_sim solve     print IK joint angles for a target
+#   arm_sim plan      write the planned frames (CSV to stdout, .csv, .npy or a trajectory file)
+#   arm_sim validate  check scenario files through the clamp/IK/plan pipeline
+SUBCOMMANDS = ("solve", "plan", "validate")
 
+# Helpers
 def coalesce(*values):
     # Return first value that is not None
     for v in values:
@@ -29,10 +36,16 @@ def build_parser():
     p.add_argument("--links", nargs="+", type=float, help="List of link lengths")
     p.add_argument("--start", nargs="+", type=float, help="Start joint angles in degrees")
     p.add_argument("--end", nargs="+", type=float, help="End joint angles in degrees")
-    # IK inputs (for 2-link arm)
-    p.add_argument("--target", nargs=2, type=float, help="Cartesian target (x, y) for IK (2-link only)")
+    # IK inputs (closed form for 2 links, numerical for longer chains)
+    p.add_argument("--target", nargs=2, type=float, help="Cartesian target (x, y) for IK")
     p.add_argument("--prefer", choices=["elbow_up", "elbow_down"], default="elbow_up",
-                   help="IK branch preferences")
+                   help="IK branch preferences (2-link only)")
+    p.add_argument("--ik-tol", type=float, default=1e-4,
+                   help="Position tolerance for the N-link IK solver")
+    p.add_argument("--ik-iters", type=int, default=100,
+                   help="Iteration limit for the N-link IK solver")
+    p.add_argument("--ik-cache", action="store_true",
+                   help="Answer IK from a persisted workspace lookup table (built on first use)")
     p.add_argument("--clamp", action="store_true", help="Clamp target to reachable workspace for IK")
     # Timing / motion
     p.add_argument("--duration", type=float, default=3.0,
@@ -41,41 +54,159 @@ def build_parser():
                         help="Frames per second")
     p.add_argument("--easing", choices=["linear", "cosine", "smoothstep"],
                         default="linear")
+    p.add_argument("--planner", choices=["interp", "prm"], default=None,
+                        help="Straight joint interpolation, or a collision-free roadmap path around the scenario obstacles")
+    p.add_argument("--cartesian", choices=["line", "arc"], default=None,
+                        help="Move the end effector along a straight line (or an arc about --arc-center) "
+                        "to the target, solving IK per frame")
+    p.add_argument("--arc-center", nargs=2, type=float, default=None,
+                        help="Centre (x, y) of the --cartesian arc path")
+    p.add_argument("--cart-tol", type=float, default=None,
+                        help="Adaptive keyframes: max end-effector deviation of interpolating between them")
+    p.add_argument("--joint-tol", type=float, default=None,
+                        help="Adaptive keyframes: max joint-angle deviation (deg) of interpolating between them")
     # Viz
     p.add_argument("--trail", action="store_true",
                         help="Show end-effector trail")
+    p.add_argument("--trail-length", type=int, default=None,
+                        help="Number of recent end-effector points kept in the trail (default 1000)")
+    p.add_argument("--trail-every", type=int, default=None,
+                        help="Keep one trail point every N frames")
     p.add_argument("--save", type=str, default=None,
                         help="Outcome filename (mp4/gif). If omitted, show interactively.")
+    p.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --batch, or export --save headlessly with this "
+                        "many render processes (a path with %%d or a directory writes a PNG sequence)")
+    # Binary trajectory files
+    p.add_argument("--record", type=str, default=None,
+                        help="Write the planned frames to a binary trajectory file")
+    p.add_argument("--replay", type=str, default=None,
+                        help="Replay a binary trajectory file (links and fps come from its header)")
+    # Recorded joint telemetry
+    p.add_argument("--telemetry", type=str, default=None,
+                        help="Replay a joint telemetry log (.csv/.txt, .npy, or raw float rows), "
+                        "resampled to --fps; needs --links")
+    p.add_argument("--time-column", type=str, default="0",
+                        help="Telemetry timestamp column (name from the header, or index)")
+    p.add_argument("--joint-columns", nargs="+", type=str, default=None,
+                        help="Telemetry joint columns (names or indices; default: all but the time column)")
+    p.add_argument("--telemetry-units", choices=["deg", "rad"], default="deg",
+                        help="Units of the logged joint angles")
+    p.add_argument("--time-scale", type=float, default=1.0,
+                        help="Seconds per timestamp unit (e.g. 0.001 for milliseconds)")
+    p.add_argument("--telemetry-joints", type=int, default=None,
+                        help="Joint count of a raw binary log (rows are time + joints)")
+    p.add_argument("--telemetry-dtype", choices=["float32", "float64"], default="float64",
+                        help="Float type of a raw binary log")
+    p.add_argument("--max-gap", type=float, default=None,
+                        help="Hold the last sample across telemetry dropouts longer than this (seconds)")
     # Scenario file
     p.add_argument("--scenario", type=str, help="Path to scenario json (CLI flags override it)")
+    p.add_argument("--fleet", type=str, default=None,
+                        help="Animate a fleet scenario json (many arms with their own bases, links and moves)")
+    # Batch mode: many scenarios, no rendering
+    p.add_argument("--batch", type=str, default=None,
+                   help="Directory of scenario json files or a .jsonl file to run without rendering")
+    p.add_argument("--out", type=str, default="results.csv",
+                   help="Results table for --batch (.csv, or .jsonl)")
+    # Instrumentation
+    p.add_argument("--profile", type=str, default=None,
+                   help="Time each stage (load, clamp, IK, plan, FK, draw, encode) and write a JSON report")
     # Convenience demo if nothing is provided
     p.add_argument("--demo", action="store_true", help="Run a built-in demo if no scenarios/flags are provided")
     return p
 
-def main():
-    args = build_parser().parse_args()
+def build_subcommand_parser():
+    # Motion inputs default to None here so scenario values are not overridden
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--scenario", type=str, help="Path to scenario json (flags override it)")
+    common.add_argument("--links", nargs="+", type=float, help="List of link lengths")
+    common.add_argument("--start", nargs="+", type=float,
+                        help="Start joint angles in degrees (also seeds the N-link IK solver)")
+    common.add_argument("--target", nargs=2, type=float, help="Cartesian target (x, y) for IK")
+    common.add_argument("--prefer", choices=["elbow_up", "elbow_down"], default=None,
+                        help="IK branch preferences (2-link only)")
+    common.add_argument("--clamp", action="store_true", help="Clamp target to reachable workspace for IK")
+    common.add_argument("--ik-tol", type=float, default=1e-4,
+                        help="Position tolerance for the N-link IK solver")
+    common.add_argument("--ik-iters", type=int, default=100,
+                        help="Iteration limit for the N-link IK solver")
+    common.add_argument("--ik-cache", action="store_true",
+                        help="Answer IK from a persisted workspace lookup table (built on first use)")
+    common.add_argument("--profile", type=str, default=None,
+                        help="Time each stage and write a JSON report")
+
+    p = argparse.ArgumentParser(prog="arm_sim", description="Headless arm kinematics commands")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    solve = sub.add_parser("solve", parents=[common], help="Print IK joint angles for a target")
+    solve.add_argument("--json", action="store_true",
+                       help="Print a JSON object (angles, solved target, clamped, converged)")
+
+    plan = sub.add_parser("plan", parents=[common], help="Write planned joint frames")
+    plan.add_argument("--end", nargs="+", type=float, help="End joint angles in degrees")
+    plan.add_argument("--duration", type=float, default=None, help="Motion duration in seconds")
+    plan.add_argument("--fps", type=int, default=None, help="Frames per second")
+    plan.add_argument("--easing", choices=["linear", "cosine", "smoothstep"], default=None)
+    plan.add_argument("--planner", choices=["interp", "prm"], default=None,
+                      help="Straight joint interpolation, or a collision-free roadmap path around obstacles")
+    plan.add_argument("--cartesian", choices=["line", "arc"], default=None,
+                      help="End-effector line (or arc about --arc-center) instead of joint interpolation")
+    plan.add_argument("--arc-center", nargs=2, type=float, default=None,
+                      help="Centre (x, y) of the --cartesian arc path")
+    plan.add_argument("--cart-tol", type=float, default=None,
+                      help="Write sparse keyframes within this end-effector deviation instead of every frame")
+    plan.add_argument("--joint-tol", type=float, default=None,
+                      help="Write sparse keyframes within this joint-angle deviation (deg) instead of every frame")
+    plan.add_argument("--out", type=str, default=None,
+                      help="Output file: .npy, .armtraj (binary trajectory) or CSV; stdout CSV if omitted")
+
+    validate = sub.add_parser("validate", help="Check scenario files without rendering")
+    validate.add_argument("paths", nargs="+",
+                          help="Scenario json files, directories of them, or .jsonl files")
+    validate.add_argument("--profile", type=str, default=None,
+                          help="Time each stage and write a JSON report")
+    return p
+
+def _info(message: str, headless: bool):
+    # Headless commands keep stdout for results
+    print(f"[info] {message}", file=sys.stderr if headless else sys.stdout)
+
+def resolve_inputs(args) -> Dict[str, Any]:
+    # Scenario file merged with flags (flags win), the built-in demo, and IK
+    # for a target. Flags a subcommand does not define count as unset.
+    def flag(name):
+        return getattr(args, name, None)
+    headless = flag("command") is not None
 
-    # Load scenario
     scenario: Dict[str, Any] = {}
-    if args.scenario:
-        scenario = load_scenario(Path(args.scenario))
+    if flag("scenario"):
+        with profiling.span("scenario_load"):
+            scenario = load_scenario(Path(args.scenario))
 
     # Merge: CLI flags override scenario values; then fall back to demo if requested/needed
-    links = coalesce(args.links,    scenario.get("links"))
-    start = coalesce(args.start,   scenario.get("start"))
-    end = coalesce(args.end,  scenario.get("end"))
-    target = coalesce(args.target,  scenario.get("target"))
-    prefer = coalesce(args.prefer,  scenario.get("prefer"), "elbow_up")
-    clamp = args.clamp or bool(scenario.get("clamp", False))
-    duration = coalesce(args.duration,  scenario.get("duration"), 3.0)
-    fps = coalesce(args.fps,    scenario.get("fps"), 30)
-    easing = coalesce(args.easing,  scenario.get("easing"), "linear")
+    links = coalesce(flag("links"),    scenario.get("links"))
+    start = coalesce(flag("start"),   scenario.get("start"))
+    end = coalesce(flag("end"),  scenario.get("end"))
+    target = coalesce(flag("target"),  scenario.get("target"))
+    prefer = coalesce(flag("prefer"),  scenario.get("prefer"), "elbow_up")
+    clamp = bool(flag("clamp")) or bool(scenario.get("clamp", False))
+    duration = coalesce(flag("duration"),  scenario.get("duration"), 3.0)
+    fps = coalesce(flag("fps"),    scenario.get("fps"), 30)
+    easing = coalesce(flag("easing"),  scenario.get("easing"), "linear")
+    planner = coalesce(flag("planner"),  scenario.get("planner"), "interp")
+    cart_tol = coalesce(flag("cart_tol"),  scenario.get("cart_tol"))
+    joint_tol = coalesce(flag("joint_tol"),  scenario.get("joint_tol"))
+    cartesian = coalesce(flag("cartesian"),  scenario.get("cartesian"))
+    arc_center = coalesce(flag("arc_center"),  scenario.get("arc_center"))
     # Trail: CLI --trail overrides scenario (bool flags default to False if not present)
-    trail = args.trail or bool(scenario.get("trail", False))
-    save = coalesce(args.save,  scenario.get("save"))
+    trail = bool(flag("trail")) or bool(scenario.get("trail", False))
+    trail_length = coalesce(flag("trail_length"),  scenario.get("trail_length"))
+    trail_every = coalesce(flag("trail_every"),  scenario.get("trail_every"), 1)
+    save = coalesce(flag("save"),  scenario.get("save"))
 
     # Build in demo if nothing was provided and --demo is set
-    if args.demo and (links is None or start is None or end is None):
+    if flag("demo") and (links is None or start is None or end is None):
         links = links or [7.0, 10.0]
         start = start or [35.0, 20.0]
         end = end or [10.0, 60.0]
@@ -85,51 +216,264 @@ def main():
         # Trail/save remain as chosen
 
     # IK mode (if target is given)
+    solution = None
     if target is not None:
         if links is None:
-            raise ValueError("IK mode requires --links ( 2 lengths).")
-        if len(links) != 2:
-            raise ValueError("IK mode (--target) currently supports exactly 2 links.")
-        
-        x, y =float(target[0]), float(target[1])
-
-        if clamp:
-            x, y, was_clamped = clamp_target_to_workspace(x, y, links[0], links[1])
-            if was_clamped:
-                print(f"[info] Target clamped to reachable workspace: ({x:.3f}, {y:.3f})")
+            raise ValueError("IK mode requires --links.")
 
-        # Compute IK solution for end pose (degrees)
-        th1_deg, th2_deg = ik_2link(x, y, links[0], links[1], prefer=prefer)
-        end = [th1_deg, th2_deg]
+        ik_table = IKLookupTable.for_links(links) if args.ik_cache else None
+        solution = solve_target(links, target, prefer, clamp, seed=start,
+                                ik_tol=args.ik_tol, ik_iters=args.ik_iters, ik_table=ik_table)
+        if solution.clamped:
+            _info(f"Target clamped to reachable workspace: ({solution.x:.3f}, {solution.y:.3f})", headless)
+        if not solution.converged:
+            _info(f"IK did not converge to within {args.ik_tol} of the target", headless)
+        end = solution.end
 
         # Default start if not provided
         if start is None:
-            start = [0.0, 0.0]
-            
+            start = [0.0] * len(links)
+
+    return {
+        "scenario": scenario, "links": links, "start": start, "end": end, "solution": solution,
+        "duration": duration, "fps": fps, "easing": easing, "planner": planner,
+        "cart_tol": cart_tol, "joint_tol": joint_tol, "trail": trail, "save": save,
+        "trail_length": trail_length, "trail_every": trail_every,
+        "cartesian": cartesian, "arc_center": arc_center, "clamp": clamp, "headless": headless,
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in SUBCOMMANDS:
+        args = build_subcommand_parser().parse_args(argv)
+    else:
+        args = build_parser().parse_args(argv)
+        args.command = None
+
+    if args.profile:
+        profiling.enable()
+    try:
+        return run(args)
+    finally:
+        if args.profile:
+            profiling.PROFILER.save(args.profile)
+            print(profiling.PROFILER.format_table(), file=sys.stderr if args.command else sys.stdout)
+            _info(f"Profile written to {args.profile}", args.command is not None)
+
+def run(args) -> int:
+    if args.command == "solve":
+        return run_solve(args)
+    if args.command == "plan":
+        return run_plan(args)
+    if args.command == "validate":
+        return run_validate(args)
+
+    if args.batch:
+        with profiling.span("batch"):
+            counts = run_batch(args.batch, args.out, workers=args.workers)
+        print(f"[info] {counts['ok']} ok, {counts['error']} failed -> {args.out}")
+        # Same convention as validate: non-zero if any scenario failed
+        return 1 if counts["error"] else 0
+
+    if args.fleet:
+        from arm_sim.visualize import animate_fleet
+        with profiling.span("scenario_load"):
+            fleet = Fleet.load(args.fleet)
+        print(f"[info] Fleet of {len(fleet)} arms, {fleet.end_time:.2f} s")
+        animate_fleet(fleet, args.fps, save=args.save)
+        return 0
+
+    if args.replay:
+        # Frames stay memory-mapped; the animation pulls them block by block
+        from arm_sim.visualize import animate_joint_trajectory
+        traj = open_trajectory(args.replay)
+        animate_joint_trajectory(traj.link_lengths, traj, traj.fps, args.trail, args.save,
+                                 workers=args.workers, trail_length=args.trail_length,
+                                 trail_every=args.trail_every or 1)
+        return 0
+
+    if args.telemetry:
+        return run_telemetry(args)
+
+    inputs = resolve_inputs(args)
+    links, fps = inputs["links"], inputs["fps"]
+
     # Validation
-    if links is None or start is None or end is None:
-        raise ValueError("Missing inputs. Provide --scenario or flags: --links, "
-        "--start, --end, (and optionally --duration, --fps, --easing, --trail, --save).")
-    if len(links) != len(start) or len(links) != len(end):
-        raise ValueError("Links, start and end must have the same length")
-    
+    check_inputs(links, inputs["start"], inputs["end"])
+
     # Motion planner
-    frames = interpolate_joint_space(
-        start,
-        end,
-        duration,
-        fps,
-        easing,
-    )
+    frames, keyframes = plan_frames(inputs)
+    if keyframes is not None:
+        print(f"[info] {keyframes.n_segments + 1} keyframes for {len(frames)} frames")
+
+    report = check_collisions(links, frames, inputs["scenario"])
+    if report is not None:
+        print(f"[info] {describe_collision(report)}")
+
+    if args.record:
+        with profiling.span("record"):
+            n = write_trajectory(args.record, links, frames[:], fps)
+        print(f"[info] Wrote {n} frames to {args.record}")
 
     # Animate
+    from arm_sim.visualize import animate_joint_trajectory
     animate_joint_trajectory(
         links,
         frames,
         fps,
-        trail,
-        save,
+        inputs["trail"],
+        inputs["save"],
+        workers=args.workers,
+        trail_length=inputs["trail_length"],
+        trail_every=inputs["trail_every"],
     )
+    return 0
+
+def run_telemetry(args) -> int:
+    # The log is read chunk by chunk and resampled to --fps on the fly, so the
+    # animation streams frames and memory stays flat however long the log is.
+    # With --record the frames are written to a trajectory file first and
+    # replayed from it, which gives the exporter random access.
+    from arm_sim.visualize import animate_joint_trajectory
+    links = coalesce(args.links, load_scenario(Path(args.scenario)).get("links") if args.scenario else None)
+    if links is None:
+        raise ValueError("--telemetry requires --links.")
+    log = open_telemetry(args.telemetry, time_column=args.time_column, joint_columns=args.joint_columns,
+                         units=args.telemetry_units, time_scale=args.time_scale,
+                         n_joints=args.telemetry_joints, dtype=args.telemetry_dtype)
+    if log.n_joints != len(links):
+        raise ValueError(f"Telemetry log has {log.n_joints} joints but {len(links)} link lengths were given")
+
+    resampler = log.resampler(args.fps, args.max_gap)
+    if args.record:
+        with profiling.span("record"):
+            log.to_trajectory(args.record, links, args.fps, resampler=resampler)
+        print(f"[info] {describe_resample(resampler)}")
+        print(f"[info] Wrote {resampler.frames} frames to {args.record}")
+        frames = open_trajectory(args.record)
+    else:
+        frames = log.frames(args.fps, resampler=resampler)
+
+    animate_joint_trajectory(links, frames, args.fps, args.trail, args.save,
+                             workers=args.workers, trail_length=args.trail_length,
+                             trail_every=args.trail_every or 1)
+    if not args.record:
+        print(f"[info] {describe_resample(resampler)}")
+    return 0
+
+def plan_frames(inputs: Dict[str, Any]):
+    # (frames, keyframes). In adaptive mode (cart_tol/joint_tol) keyframes is
+    # the sparse linear-keyframe trajectory and frames a lazy fixed-rate view
+    # interpolating between them; otherwise keyframes is None.
+    links, start, end = inputs["links"], inputs["start"], inputs["end"]
+    adaptive = inputs["cart_tol"] is not None or inputs["joint_tol"] is not None
+    if inputs["cartesian"]:
+        # The tool path fixes every frame, so there is nothing for these to act on
+        if inputs["planner"] == "prm":
+            raise ValueError("--cartesian cannot be combined with --planner prm.")
+        if adaptive:
+            raise ValueError("--cartesian cannot be combined with --cart-tol/--joint-tol.")
+        # Tool path to the end pose's tip (the clamped target in IK mode), one IK solve per frame
+        with profiling.span("plan"):
+            end_xy = forward_kinematics_batch(links, end, end_effector_only=True)
+            plan = plan_cartesian(links, start, end_xy, inputs["duration"], inputs["fps"],
+                                  inputs["easing"], inputs["cartesian"], inputs["arc_center"],
+                                  clamp=inputs["clamp"])
+        warning = describe_plan(plan)
+        if warning:
+            _info(warning, inputs["headless"])
+        return plan.angles, None
+    if inputs["planner"] == "prm":
+        trajectory = plan_roadmap_trajectory(links, start, end, inputs["duration"], inputs["scenario"])
+    elif adaptive:
+        trajectory = JointTrajectory([start, end], inputs["duration"], inputs["easing"])
+    else:
+        with profiling.span("plan"):
+            return interpolate_joint_space(start, end, inputs["duration"], inputs["fps"], inputs["easing"]), None
+
+    if not adaptive:
+        return trajectory.at_fps(inputs["fps"])[:], None
+    with profiling.span("keyframes"):
+        keyframes = trajectory.keyframes(links, cart_tol=inputs["cart_tol"], joint_tol=inputs["joint_tol"])
+    return keyframes.at_fps(inputs["fps"]), keyframes
+
+def run_solve(args) -> int:
+    inputs = resolve_inputs(args)
+    sol = inputs["solution"]
+    if sol is None:
+        raise ValueError("solve requires --target (or a scenario with a target).")
+    if args.json:
+        print(json.dumps({"angles": sol.end, "target": [sol.x, sol.y],
+                          "clamped": sol.clamped, "converged": sol.converged}))
+    else:
+        print(" ".join(f"{a:.6f}" for a in sol.end))
+    return 0 if sol.converged else 2
+
+def run_plan(args) -> int:
+    import numpy as np
+
+    inputs = resolve_inputs(args)
+    links, fps = inputs["links"], inputs["fps"]
+    check_inputs(links, inputs["start"], inputs["end"])
+    frames, keyframes = plan_frames(inputs)
+    report = check_collisions(links, frames, inputs["scenario"])
+    if report is not None:
+        _info(describe_collision(report), True)
+
+    # Adaptive mode writes only the keyframes, with their times
+    if keyframes is not None:
+        times = keyframes.segment_times
+        poses = keyframes.sample(times)
+    else:
+        poses = np.asarray(frames, dtype=float)
+        times = np.arange(len(poses)) / fps
+
+    out = args.out
+    with profiling.span("write"):
+        if out and out.endswith(".armtraj"):
+            # Fixed-rate format: always every frame
+            poses = frames[:]
+            write_trajectory(out, links, poses, fps)
+        elif out and out.endswith(".npy"):
+            # (F, J) frames, or (K, 1 + J) time + pose rows for keyframes
+            np.save(out, poses if keyframes is None else np.column_stack([times, poses]))
+        else:
+            # CSV: time, then one column per joint
+            table = np.column_stack([times, poses])
+            header = ",".join(["t"] + [f"joint{i + 1}" for i in range(len(links))])
+            np.savetxt(out if out else sys.stdout, table, delimiter=",", fmt="%.6f",
+                       header=header, comments="")
+    if out:
+        _info(f"Wrote {len(poses)} frames to {out}", True)
+    return 0
+
+def run_validate(args) -> int:
+    # Every scenario goes through the same pipeline as --batch (no rendering);
+    # exit status 1 if any of them fail or collide
+    from arm_sim.batch import iter_scenarios, run_scenario
+
+    failed = 0
+    for path in args.paths:
+        p = Path(path)
+        if p.suffix.lower() == ".json":
+            try:
+                items = [(p.name, load_scenario(p))]
+            except (OSError, ValueError) as e:
+                items = [(p.name, e)]
+        else:
+            items = iter_scenarios(p)
+        for item in items:
+            with profiling.span("validate"):
+                row = run_scenario(item)
+            if row["status"] == "ok" and row["collision_frame"] != "":
+                failed += 1
+                print(f"collision {row['name']}: first colliding frame {row['collision_frame']}")
+            elif row["status"] == "ok":
+                print(f"ok    {row['name']}")
+            else:
+                failed += 1
+                print(f"error {row['name']}: {row['error']}")
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,348 @@
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+
+# Obstacle and self-collision checking for whole trajectories.
+#
+# Obstacles come from the scenario "obstacles" list:
+#   {"type": "circle",  "center": [x, y], "radius": r}
+#   {"type": "box",     "min": [x, y], "max": [x, y]}          (axis aligned)
+#   {"type": "polygon", "points": [[x, y], ...]}               (simple polygon)
+# Boxes are stored as 4-edge polygons. Links are capsules of radius
+# `link_radius` (0 = bare segments).
+#
+# Broadphase: obstacle bounding boxes, inflated by the clearance margin, are
+# binned into a uniform grid once. Each link segment of each frame looks up
+# the cells its bounding box covers, which gives (segment, obstacle)
+# candidate pairs without any per-frame Python loop. Narrowphase distances for
+# all pairs are then computed in one vectorized pass.
+#
+# Clearance is exact for anything within `margin` of a link; obstacles further
+# away are never looked at, so a frame with nothing nearby reports +inf.
+
+_CIRCLE = 0
+_POLYGON = 1
+_MAX_CELLS = 256        # Grid cells per axis
+
+class ObstacleSet:
+    def __init__(self, specs: Sequence[Dict[str, Any]], margin: float = 1.0):
+        self.specs = list(specs)
+        self.margin = float(margin)
+        n = len(self.specs)
+        self.kind = np.zeros(n, dtype=np.int8)
+        self.center = np.zeros((n, 2))
+        self.radius = np.zeros(n)
+        self.aabb = np.zeros((n, 4))      # xmin, ymin, xmax, ymax
+
+        # Polygon edges in CSR form: obstacle k owns edges[edge_start[k]:edge_start[k] + edge_count[k]]
+        edges: List[np.ndarray] = []
+        self.edge_start = np.zeros(n, dtype=np.int64)
+        self.edge_count = np.zeros(n, dtype=np.int64)
+        n_edges = 0
+
+        for k, spec in enumerate(self.specs):
+            kind = spec.get("type")
+            if kind == "circle":
+                cx, cy = (float(v) for v in spec["center"])
+                r = float(spec["radius"])
+                if r <= 0:
+                    raise ValueError(f"Obstacle {k}: circle radius must be positive")
+                self.kind[k] = _CIRCLE
+                self.center[k] = (cx, cy)
+                self.radius[k] = r
+                self.aabb[k] = (cx - r, cy - r, cx + r, cy + r)
+                continue
+
+            if kind == "box":
+                (x0, y0), (x1, y1) = spec["min"], spec["max"]
+                if not (x1 > x0 and y1 > y0):
+                    raise ValueError(f"Obstacle {k}: box max must exceed min")
+                points = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=float)
+            elif kind == "polygon":
+                points = np.asarray(spec["points"], dtype=float)
+                if points.ndim != 2 or points.shape[0] < 3 or points.shape[1] != 2:
+                    raise ValueError(f"Obstacle {k}: polygon needs at least 3 (x, y) points")
+            else:
+                raise ValueError(f"Obstacle {k}: unknown type {kind!r} (circle, box or polygon)")
+
+            self.kind[k] = _POLYGON
+            self.aabb[k] = (*points.min(axis=0), *points.max(axis=0))
+            edges.append(np.hstack([points, np.roll(points, -1, axis=0)]))
+            self.edge_start[k] = n_edges
+            self.edge_count[k] = points.shape[0]
+            n_edges += points.shape[0]
+
+        self.edges = np.vstack(edges) if edges else np.zeros((0, 4))    # x0, y0, x1, y1
+        self._build_grid()
+
+    @classmethod
+    def from_scenario(cls, scenario: Dict[str, Any], margin: float = 1.0) -> Optional["ObstacleSet"]:
+        specs = scenario.get("obstacles")
+        if not specs:
+            return None
+        return cls(specs, margin=margin)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def _build_grid(self):
+        n = len(self)
+        self.inflated = self.aabb + np.array([-1.0, -1.0, 1.0, 1.0]) * self.margin
+        if n == 0:
+            self.origin = np.zeros(2)
+            self.cell = 1.0
+            self.shape = (1, 1)
+            self.cell_start = np.zeros(2, dtype=np.int64)
+            self.cell_obs = np.zeros(0, dtype=np.int64)
+            return
+
+        lo = self.inflated[:, :2].min(axis=0)
+        hi = self.inflated[:, 2:].max(axis=0)
+        extent = np.maximum(hi - lo, 1e-9)
+        # Roughly one obstacle per cell, but not finer than the typical obstacle
+        sizes = self.inflated[:, 2:] - self.inflated[:, :2]
+        cell = max(math.sqrt(extent[0] * extent[1] / n), float(np.median(sizes.max(axis=1))),
+                   float(extent.max()) / _MAX_CELLS)
+        nx, ny = (int(v) for v in np.minimum(np.ceil(extent / cell), _MAX_CELLS).clip(1))
+
+        self.origin = lo
+        self.cell = cell
+        self.shape = (nx, ny)
+
+        # Cells covered by each inflated obstacle box -> CSR lists per cell
+        i0, j0, i1, j1 = self._cell_range(self.inflated)
+        cells, owners = _expand_ranges(i0, j0, i1, j1, nx)
+        order = np.argsort(cells, kind="stable")
+        counts = np.bincount(cells, minlength=nx * ny)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+        self.cell_obs = owners[order]
+
+    def _cell_range(self, boxes: np.ndarray):
+        nx, ny = self.shape
+        lo = np.floor((boxes[:, :2] - self.origin) / self.cell).astype(np.int64)
+        hi = np.floor((boxes[:, 2:] - self.origin) / self.cell).astype(np.int64)
+        return (lo[:, 0].clip(0, nx - 1), lo[:, 1].clip(0, ny - 1),
+                hi[:, 0].clip(0, nx - 1), hi[:, 1].clip(0, ny - 1))
+
+    def candidates(self, a: np.ndarray, b: np.ndarray, pad: float = 0.0):
+        # (segment, obstacle) index pairs whose bounding boxes are within
+        # margin + pad of each other. a, b: (K, 2) segment endpoints.
+        if len(self) == 0 or a.shape[0] == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        boxes = np.hstack([np.minimum(a, b) - pad, np.maximum(a, b) + pad])
+        nx, ny = self.shape
+        grid_lo = self.origin
+        grid_hi = self.origin + self.cell * np.array([nx, ny])
+        inside = ((boxes[:, 2] >= grid_lo[0]) & (boxes[:, 0] <= grid_hi[0])
+                  & (boxes[:, 3] >= grid_lo[1]) & (boxes[:, 1] <= grid_hi[1]))
+        seg_idx = np.flatnonzero(inside)
+        if seg_idx.size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+
+        i0, j0, i1, j1 = self._cell_range(boxes[seg_idx])
+        cells, owners = _expand_ranges(i0, j0, i1, j1, nx)
+        owners = seg_idx[owners]
+
+        # Every obstacle listed in those cells
+        counts = self.cell_start[cells + 1] - self.cell_start[cells]
+        total = int(counts.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        pair_seg = np.repeat(owners, counts)
+        pair_cell = np.repeat(cells, counts)
+        local = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_obs = self.cell_obs[np.repeat(self.cell_start[cells], counts) + local]
+
+        # Exact box overlap test prunes the grid's slack. An obstacle spanning
+        # several cells the segment also covers is listed once per shared
+        # cell; only the cell holding the overlap's lower corner keeps it.
+        sb, ob = boxes[pair_seg], self.inflated[pair_obs]
+        keep = ((sb[:, 0] <= ob[:, 2]) & (sb[:, 2] >= ob[:, 0])
+                & (sb[:, 1] <= ob[:, 3]) & (sb[:, 3] >= ob[:, 1]))
+        corner = np.maximum(sb[:, :2], ob[:, :2])
+        ci, cj, _, _ = self._cell_range(np.hstack([corner, corner]))
+        keep &= (cj * nx + ci) == pair_cell
+        return pair_seg[keep], pair_obs[keep]
+
+    def distances(self, a: np.ndarray, b: np.ndarray, pair_seg: np.ndarray, pair_obs: np.ndarray) -> np.ndarray:
+        # Distance from segment a[pair_seg]-b[pair_obs] to each paired obstacle;
+        # 0 for a segment touching or inside a polygon, negative inside a circle
+        d = np.empty(pair_seg.shape[0])
+
+        circ = self.kind[pair_obs] == _CIRCLE
+        if circ.any():
+            s, o = pair_seg[circ], pair_obs[circ]
+            d[circ] = _point_segment_distance(self.center[o], a[s], b[s]) - self.radius[o]
+
+        poly = ~circ
+        if poly.any():
+            s, o = pair_seg[poly], pair_obs[poly]
+            counts = self.edge_count[o]
+            starts = np.cumsum(counts) - counts
+            total = int(counts.sum())
+            pair = np.repeat(np.arange(s.size), counts)
+            edge = self.edges[np.repeat(self.edge_start[o], counts) + np.arange(total) - np.repeat(starts, counts)]
+            pa, pb = a[s][pair], b[s][pair]
+
+            edge_d = _segment_distance(pa, pb, edge[:, :2], edge[:, 2:])
+            dist = np.minimum.reduceat(edge_d, starts)
+
+            # Crossing-number test for one endpoint catches segments fully inside
+            px, py = pa[:, 0], pa[:, 1]
+            ex0, ey0, ex1, ey1 = edge.T
+            straddles = (ey0 > py) != (ey1 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0)
+            crossings = np.add.reduceat((straddles & (px < x_cross)).astype(np.int64), starts)
+            dist[crossings % 2 == 1] = 0.0
+            d[poly] = dist
+        return d
+
+class CollisionReport(NamedTuple):
+    collides: bool
+    first_frame: Optional[int]      # First frame in collision, None if clear
+    kind: Optional[str]             # "obstacle" or "self" for that frame
+    link: Optional[int]             # Colliding link (0-based)
+    other: Optional[int]            # Obstacle index, or the other link for self-collision
+    min_clearance: float            # Smallest obstacle/self clearance over the trajectory
+    min_clearance_frame: int
+    clearance: np.ndarray           # (M,) per-frame obstacle clearance (+inf when nothing within margin)
+    self_clearance: np.ndarray      # (M,) per-frame clearance between non-adjacent links
+
+def check_trajectory(
+        link_lengths: Sequence[float],
+        angle_frames,
+        obstacles: Optional[ObstacleSet] = None,
+        link_radius: float = 0.0,
+        self_collision: bool = True,
+        chunk_size: int = 4096,
+) -> CollisionReport:
+    # Check every frame of a trajectory (list, (M, J) array or trajectory file)
+    # against the obstacles and against itself. Frames are processed in chunks
+    # so long recordings are never expanded in memory all at once.
+    n_frames = len(angle_frames)
+    n_links = len(link_lengths)
+    clearance = np.full(n_frames, np.inf)
+    self_clear = np.full(n_frames, np.inf)
+    hit_link = np.full(n_frames, -1, dtype=np.int64)
+    hit_other = np.full(n_frames, -1, dtype=np.int64)
+    self_link = np.full(n_frames, -1, dtype=np.int64)
+    self_other = np.full(n_frames, -1, dtype=np.int64)
+
+    # Non-adjacent link pairs (i, j), j >= i + 2
+    pairs = np.array([(i, j) for i in range(n_links) for j in range(i + 2, n_links)], dtype=np.int64)
+
+    for k0 in range(0, n_frames, chunk_size):
+        block = np.asarray(angle_frames[k0:k0 + chunk_size], dtype=float)
+        pts = forward_kinematics_batch(link_lengths, block)         # (B, N+1, 2)
+        B = pts.shape[0]
+        a = pts[:, :-1].reshape(-1, 2)       # segment k = frame * n_links + link
+        b = pts[:, 1:].reshape(-1, 2)
+
+        if obstacles is not None and len(obstacles):
+            seg, obs = obstacles.candidates(a, b, pad=link_radius)
+            if seg.size:
+                d = obstacles.distances(a, b, seg, obs) - link_radius
+                # Per frame minimum, remembering which pair produced it
+                frame = seg // n_links
+                order = np.lexsort((d, frame))
+                first = order[np.r_[True, frame[order][1:] != frame[order][:-1]]]
+                f = frame[first]
+                clearance[k0 + f] = d[first]
+                hit_link[k0 + f] = seg[first] % n_links
+                hit_other[k0 + f] = obs[first]
+
+        if self_collision and pairs.size:
+            p = pts.reshape(B, n_links + 1, 2)
+            i, j = pairs[:, 0], pairs[:, 1]
+            d = _segment_distance(p[:, i].reshape(-1, 2), p[:, i + 1].reshape(-1, 2),
+                                  p[:, j].reshape(-1, 2), p[:, j + 1].reshape(-1, 2))
+            d = d.reshape(B, -1) - 2.0 * link_radius
+            best = d.argmin(axis=1)
+            self_clear[k0:k0 + B] = d[np.arange(B), best]
+            self_link[k0:k0 + B] = i[best]
+            self_other[k0:k0 + B] = j[best]
+
+    obstacle_hit, self_hit = _hit_masks(clearance, self_clear, link_radius)
+    hits = np.flatnonzero(obstacle_hit | self_hit)
+
+    overall = np.minimum(clearance, self_clear)
+    k_min = int(np.argmin(overall)) if n_frames else 0
+    min_clear = float(overall[k_min]) if n_frames else math.inf
+
+    if hits.size == 0:
+        return CollisionReport(False, None, None, None, None, min_clear, k_min, clearance, self_clear)
+
+    k = int(hits[0])
+    if obstacle_hit[k]:
+        return CollisionReport(True, k, "obstacle", int(hit_link[k]), int(hit_other[k]),
+                               min_clear, k_min, clearance, self_clear)
+    return CollisionReport(True, k, "self", int(self_link[k]), int(self_other[k]),
+                           min_clear, k_min, clearance, self_clear)
+
+def collision_free(
+        link_lengths: Sequence[float],
+        configs,
+        obstacles: Optional[ObstacleSet] = None,
+        link_radius: float = 0.0,
+        self_collision: bool = True,
+) -> np.ndarray:
+    # (M,) bool: which of the (M, J) joint configurations are free
+    report = check_trajectory(link_lengths, configs, obstacles, link_radius, self_collision)
+    obstacle_hit, self_hit = _hit_masks(report.clearance, report.self_clearance, link_radius)
+    return ~(obstacle_hit | self_hit)
+
+def _hit_masks(clearance, self_clear, link_radius):
+    # Bare segments only collide on contact; capsules once they overlap
+    obstacle_hit = clearance <= 0.0
+    self_hit = self_clear <= 0.0 if link_radius > 0 else self_clear <= 1e-12
+    return obstacle_hit, self_hit
+
+def _expand_ranges(i0, j0, i1, j1, nx):
+    # Flattened cell ids for each inclusive cell rectangle, plus the owner row
+    w = i1 - i0 + 1
+    counts = w * (j1 - j0 + 1)
+    owners = np.repeat(np.arange(counts.size), counts)
+    local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = i0[owners] + local % w[owners]
+    cy = j0[owners] + local // w[owners]
+    return cy * nx + cx, owners
+
+def _point_segment_distance(p, a, b):
+    ab = b - a
+    denom = np.einsum("ij,ij->i", ab, ab)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(denom > 0, np.einsum("ij,ij->i", p - a, ab) / denom, 0.0)
+    closest = a + np.clip(t, 0.0, 1.0)[:, np.newaxis] * ab
+    return np.hypot(*(p - closest).T)
+
+def _segment_distance(p1, q1, p2, q2):
+    # Closest distance between segments p1-q1 and p2-q2 (row-wise); 0 when they cross
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = np.einsum("ij,ij->i", d1, d1)
+    e = np.einsum("ij,ij->i", d2, d2)
+    f = np.einsum("ij,ij->i", d2, r)
+    c = np.einsum("ij,ij->i", d1, r)
+    b = np.einsum("ij,ij->i", d1, d2)
+    denom = a * e - b * b
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # s on the first segment (parallel or degenerate -> 0), then t, then re-clamp s
+        s = np.where(denom > 1e-12, np.clip((b * f - c * e) / denom, 0.0, 1.0), 0.0)
+        t = np.where(e > 0, (b * s + f) / e, 0.0)
+        s = np.where(t < 0.0, np.where(a > 0, np.clip(-c / a, 0.0, 1.0), 0.0), s)
+        s = np.where(t > 1.0, np.where(a > 0, np.clip((b - c) / a, 0.0, 1.0), 0.0), s)
+        s = np.where(e > 0, s, np.where(a > 0, np.clip(-c / a, 0.0, 1.0), 0.0))
+        t = np.clip(t, 0.0, 1.0)
+
+    diff = (p1 + s[:, np.newaxis] * d1) - (p2 + t[:, np.newaxis] * d2)
+    return np.hypot(diff[:, 0], diff[:, 1])
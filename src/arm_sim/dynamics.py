@@ -0,0 +1,310 @@
+import argparse
+import sys
+import time
+from typing import Callable, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+# Rigid-body dynamics of a planar serial chain.
+#
+# Link i rotates about joint i, has mass m_i, its centre of mass c_i along the
+# link and inertia I_i about that centre. Gravity points along -y. Joint
+# angles here are relative (as in fk.py) but in radians; torques are in
+# mass * length^2 / s^2.
+#
+# Everything is batched: q, qd, qdd are (B, N) arrays of B independent arms
+# (a single (N,) state is also accepted), so many initial conditions or a
+# whole motion library advance as one set of array operations.
+#
+#   model = ArmDynamics([7, 10], masses=[2, 1])
+#   tau = model.inverse_dynamics(q, qd, qdd)          # RNEA, O(N) per arm
+#   qdd = model.forward_dynamics(q, qd, tau)
+#   result = simulate(model, q0, qd0, dt=1e-3, steps=5000)
+#   result.realtime_factor                            # simulated / wall seconds
+
+class ArmDynamics:
+    def __init__(
+            self,
+            link_lengths: Sequence[float],
+            masses: Optional[Sequence[float]] = None,
+            com: Optional[Sequence[float]] = None,
+            inertia: Optional[Sequence[float]] = None,
+            gravity: float = 9.81,
+            damping: Union[float, Sequence[float]] = 0.0,
+    ):
+        # Defaults: unit masses, uniform rods (centre of mass halfway, I = m L² / 12)
+        self.lengths = np.asarray(link_lengths, dtype=float)
+        n = self.lengths.shape[0]
+        if n == 0:
+            raise ValueError("link_lengths must be non-empty")
+        self.masses = np.ones(n) if masses is None else np.asarray(masses, dtype=float)
+        self.com = 0.5 * self.lengths if com is None else np.asarray(com, dtype=float)
+        self.inertia = (self.masses * self.lengths ** 2 / 12.0 if inertia is None
+                        else np.asarray(inertia, dtype=float))
+        for name, arr in (("masses", self.masses), ("com", self.com), ("inertia", self.inertia)):
+            if arr.shape != (n,):
+                raise ValueError(f"{name} must have one value per link")
+        if (self.masses <= 0).any():
+            raise ValueError("masses must be positive")
+        self.gravity = float(gravity)
+        self.damping = np.broadcast_to(np.asarray(damping, dtype=float), (n,)).copy()
+
+        # Constant parts of the mass matrix: max(i, j), and the sums of m_k
+        # and I_k over links k >= max(i, j)
+        self._max_ij = np.maximum.outer(np.arange(n), np.arange(n))
+        self._mass_sum = np.cumsum(self.masses[::-1])[::-1][self._max_ij]
+        self._inertia_sum = np.cumsum(self.inertia[::-1])[::-1][self._max_ij]
+
+    @property
+    def n_joints(self) -> int:
+        return self.lengths.shape[0]
+
+    def _state(self, *arrays):
+        out = [np.asarray(a, dtype=float) for a in arrays]
+        single = out[0].ndim == 1
+        out = [np.atleast_2d(a) for a in out]
+        for a in out:
+            if a.shape[-1] != self.n_joints:
+                raise ValueError(f"joint arrays must have {self.n_joints} columns")
+        return single, np.broadcast_arrays(*out)
+
+    def inverse_dynamics(self, q, qd, qdd, gravity: Optional[float] = None) -> np.ndarray:
+        # Joint torques for the given motion, recursive Newton-Euler.
+        # The outward pass (link accelerations) and the inward pass (forces and
+        # moments) are each a cumulative sum along the chain, so the cost is
+        # O(N) per arm and the recursion runs over all arms at once.
+        single, (q, qd, qdd) = self._state(q, qd, qdd)
+        g = self.gravity if gravity is None else gravity
+
+        theta = np.cumsum(q, axis=1)        # Absolute link angles
+        omega = np.cumsum(qd, axis=1)       # Absolute angular velocities
+        alpha = np.cumsum(qdd, axis=1)      # Absolute angular accelerations
+        ex, ey = np.cos(theta), np.sin(theta)   # Link directions
+        w2 = omega * omega
+
+        # Outward: acceleration of each joint origin. Gravity enters as an
+        # upward acceleration of the base. Per link, the step to the next joint
+        # is L (alpha * perp(e) - omega² * e).
+        step_x = self.lengths * (-alpha * ey - w2 * ex)
+        step_y = self.lengths * (alpha * ex - w2 * ey)
+        ox = np.cumsum(step_x, axis=1) - step_x
+        oy = np.cumsum(step_y, axis=1) - step_y + g
+
+        # Centre-of-mass accelerations and the force each one takes
+        ax = ox + self.com * (-alpha * ey - w2 * ex)
+        ay = oy + self.com * (alpha * ex - w2 * ey)
+        fx_link = self.masses * ax
+        fy_link = self.masses * ay
+
+        # Inward: force from link i-1 on link i is the sum over links i..N-1
+        fx = np.cumsum(fx_link[:, ::-1], axis=1)[:, ::-1]
+        fy = np.cumsum(fy_link[:, ::-1], axis=1)[:, ::-1]
+        fx_next = fx - fx_link
+        fy_next = fy - fy_link
+
+        # Moment about joint i: own rotation, own inertial force at the centre
+        # of mass, the force passed on to link i+1 at the far end, plus the
+        # moments of all outer joints
+        moment = (self.inertia * alpha
+                  + self.com * (ex * fy_link - ey * fx_link)
+                  + self.lengths * (ex * fy_next - ey * fx_next))
+        tau = np.cumsum(moment[:, ::-1], axis=1)[:, ::-1] + self.damping * qd
+        return tau[0] if single else tau
+
+    def mass_matrix(self, q) -> np.ndarray:
+        # (B, N, N) joint-space inertia. Joint i moves the centre of mass c_k of
+        # every link k >= i about joint origin p_i, so
+        #   M_ij = sum over k >= max(i, j) of m_k (c_k - p_i).(c_k - p_j) + I_k
+        # Expanding the dot product leaves suffix sums over k of m_k, m_k c_k
+        # and m_k |c_k|², indexed by max(i, j): O(N²) per arm, all elementwise.
+        single, (q,) = self._state(q)
+        theta = np.cumsum(q, axis=1)
+        ex, ey = np.cos(theta), np.sin(theta)
+        px = np.cumsum(self.lengths * ex, axis=1) - self.lengths * ex   # Joint origins
+        py = np.cumsum(self.lengths * ey, axis=1) - self.lengths * ey
+        cx = px + self.com * ex                                         # Centres of mass
+        cy = py + self.com * ey
+
+        def suffix(a):
+            return np.cumsum(a[:, ::-1], axis=1)[:, ::-1]
+        s1x = suffix(self.masses * cx)[:, self._max_ij]
+        s1y = suffix(self.masses * cy)[:, self._max_ij]
+        s2 = suffix(self.masses * (cx * cx + cy * cy))[:, self._max_ij]
+
+        pxi, pxj = px[:, :, np.newaxis], px[:, np.newaxis, :]
+        pyi, pyj = py[:, :, np.newaxis], py[:, np.newaxis, :]
+        m = (s2 - s1x * (pxi + pxj) - s1y * (pyi + pyj)
+             + self._mass_sum * (pxi * pxj + pyi * pyj) + self._inertia_sum)
+        return m[0] if single else m
+
+    def forward_dynamics(self, q, qd, tau) -> np.ndarray:
+        # Joint accelerations for the applied torques: M(q) qdd = tau - h(q, qd),
+        # with h (Coriolis, centrifugal, gravity, damping) from one RNEA pass
+        single, (q, qd, tau) = self._state(q, qd, tau)
+        h = self.inverse_dynamics(q, qd, np.zeros_like(q))
+        qdd = np.linalg.solve(self.mass_matrix(q), (tau - h)[..., np.newaxis])[..., 0]
+        return qdd[0] if single else qdd
+
+    def energy(self, q, qd) -> np.ndarray:
+        # Kinetic + potential energy per arm (conserved without torque or damping)
+        single, (q, qd) = self._state(q, qd)
+        theta = np.cumsum(q, axis=1)
+        omega = np.cumsum(qd, axis=1)
+        ex, ey = np.cos(theta), np.sin(theta)
+
+        # Joint origin heights/velocities, then centre-of-mass ones (gravity
+        # acts along -y, so only heights enter the potential)
+        py = np.cumsum(self.lengths * ey, axis=1) - self.lengths * ey
+        vx = np.cumsum(-self.lengths * omega * ey, axis=1) + self.lengths * omega * ey
+        vy = np.cumsum(self.lengths * omega * ex, axis=1) - self.lengths * omega * ex
+        cy = py + self.com * ey
+        cvx = vx - self.com * omega * ey
+        cvy = vy + self.com * omega * ex
+
+        kinetic = 0.5 * (self.masses * (cvx ** 2 + cvy ** 2) + self.inertia * omega ** 2).sum(axis=1)
+        potential = (self.masses * self.gravity * cy).sum(axis=1)
+        e = kinetic + potential
+        return e[0] if single else e
+
+TorqueInput = Union[None, np.ndarray, Callable[[float, np.ndarray, np.ndarray], np.ndarray]]
+
+class SimResult(NamedTuple):
+    t: np.ndarray               # (F,) recorded times
+    q: np.ndarray               # (F, B, N) joint angles in radians
+    qd: np.ndarray              # (F, B, N) joint velocities
+    wall_s: float               # Wall-clock time of the integration
+    realtime_factor: float      # Simulated seconds per wall second, for one arm
+    arm_realtime_factor: float  # Same, summed over all B arms
+
+def _torque(torque: TorqueInput, t: float, q: np.ndarray, qd: np.ndarray) -> np.ndarray:
+    if torque is None:
+        return np.zeros_like(q)
+    if callable(torque):
+        return np.broadcast_to(np.asarray(torque(t, q, qd), dtype=float), q.shape)
+    return np.broadcast_to(torque, q.shape)
+
+def simulate(
+        model: ArmDynamics,
+        q0,
+        qd0=None,
+        torque: TorqueInput = None,
+        dt: float = 1e-3,
+        steps: int = 1000,
+        method: str = "rk4",
+        record_every: int = 1,
+) -> SimResult:
+    # Fixed-step integration of B arms at once. torque is None (passive), a
+    # constant (N,) or (B, N) array, or torque(t, q, qd) -> (B, N) for a
+    # controller. "rk4" is classic 4th order (four dynamics evaluations per
+    # step); "semi_implicit" (symplectic Euler) is first order with one
+    # evaluation per step, for when speed matters more than accuracy.
+    if dt <= 0 or steps < 0 or record_every < 1:
+        raise ValueError("dt must be positive, steps non-negative and record_every at least 1")
+    if method not in ("rk4", "semi_implicit"):
+        raise ValueError("method must be rk4 or semi_implicit")
+
+    q = np.atleast_2d(np.asarray(q0, dtype=float)).copy()
+    qd = np.zeros_like(q) if qd0 is None else np.array(np.broadcast_to(qd0, q.shape), dtype=float)
+    if not callable(torque) and torque is not None:
+        torque = np.asarray(torque, dtype=float)
+
+    def accel(t, q, qd):
+        return model.forward_dynamics(q, qd, _torque(torque, t, q, qd))
+
+    n_rec = steps // record_every + 1
+    q_rec = np.empty((n_rec,) + q.shape)
+    qd_rec = np.empty((n_rec,) + q.shape)
+    q_rec[0], qd_rec[0] = q, qd
+
+    t0 = time.perf_counter()
+    for k in range(steps):
+        t = k * dt
+        if method == "rk4":
+            a1 = accel(t, q, qd)
+            v2 = qd + 0.5 * dt * a1
+            a2 = accel(t + 0.5 * dt, q + 0.5 * dt * qd, v2)
+            v3 = qd + 0.5 * dt * a2
+            a3 = accel(t + 0.5 * dt, q + 0.5 * dt * v2, v3)
+            v4 = qd + dt * a3
+            a4 = accel(t + dt, q + dt * v3, v4)
+            q = q + dt / 6.0 * (qd + 2.0 * v2 + 2.0 * v3 + v4)
+            qd = qd + dt / 6.0 * (a1 + 2.0 * a2 + 2.0 * a3 + a4)
+        else:
+            qd = qd + dt * accel(t, q, qd)
+            q = q + dt * qd
+        if (k + 1) % record_every == 0:
+            i = (k + 1) // record_every
+            q_rec[i], qd_rec[i] = q, qd
+    wall = time.perf_counter() - t0
+
+    sim_time = steps * dt
+    rtf = sim_time / wall if wall > 0 else float("inf")
+    t_rec = np.arange(n_rec) * dt * record_every
+    return SimResult(t_rec, q_rec, qd_rec, wall, rtf, rtf * q.shape[0])
+
+def trajectory_torques(model: ArmDynamics, frames_deg, fps: float) -> np.ndarray:
+    # Torques needed to follow planned frames: (F, N) or a (P, F, N) library
+    # of motions (e.g. from interpolate_joint_space_batch). Velocities and
+    # accelerations are central differences of the unwrapped angles.
+    frames = np.asarray(frames_deg, dtype=float)
+    single = frames.ndim == 2
+    if single:
+        frames = frames[np.newaxis]
+    if frames.ndim != 3 or frames.shape[-1] != model.n_joints:
+        raise ValueError("frames must have shape (F, N) or (P, F, N) with N joints")
+    if frames.shape[1] < 3:
+        raise ValueError("need at least 3 frames to estimate accelerations")
+
+    dt = 1.0 / fps
+    q = np.unwrap(np.radians(frames), axis=1)
+    qd = np.gradient(q, dt, axis=1)
+    qdd = np.gradient(qd, dt, axis=1)
+    p, f, n = q.shape
+    tau = model.inverse_dynamics(q.reshape(-1, n), qd.reshape(-1, n), qdd.reshape(-1, n)).reshape(p, f, n)
+    return tau[0] if single else tau
+
+def torque_feasible(model: ArmDynamics, frames_deg, fps: float, torque_limits):
+    # (feasible, peak_ratio) per motion: peak |torque| / limit over all frames
+    # and joints, feasible where that stays at or below 1
+    tau = trajectory_torques(model, frames_deg, fps)
+    limits = np.asarray(torque_limits, dtype=float)
+    ratio = np.abs(tau) / limits
+    peak = ratio.max(axis=(-2, -1))
+    return peak <= 1.0, peak
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Simulate passive or constant-torque planar arm dynamics")
+    p.add_argument("--links", type=float, nargs="+", default=[7.0, 10.0], help="Link lengths")
+    p.add_argument("--masses", type=float, nargs="+", default=None, help="Link masses (default 1 each)")
+    p.add_argument("--start", type=float, nargs="+", default=None, help="Start pose in degrees")
+    p.add_argument("--torque", type=float, nargs="+", default=None, help="Constant joint torques")
+    p.add_argument("--damping", type=float, default=0.0, help="Viscous joint damping")
+    p.add_argument("--batch", type=int, default=1,
+                   help="Arms simulated together (start poses spread by up to ±5 degrees)")
+    p.add_argument("--duration", type=float, default=5.0, help="Simulated seconds")
+    p.add_argument("--dt", type=float, default=1e-3, help="Integration step")
+    p.add_argument("--method", choices=["rk4", "semi_implicit"], default="rk4")
+    return p
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    model = ArmDynamics(args.links, masses=args.masses, damping=args.damping)
+    n = model.n_joints
+    start = np.radians(args.start if args.start is not None else [0.0] * n)
+    if start.shape != (n,):
+        raise ValueError("--start must have one angle per link")
+    q0 = start + np.radians(np.random.default_rng(0).uniform(-5.0, 5.0, (args.batch, n)))
+    q0[0] = start
+
+    steps = max(1, int(round(args.duration / args.dt)))
+    result = simulate(model, q0, torque=args.torque, dt=args.dt, steps=steps,
+                      method=args.method, record_every=steps)
+    drift = model.energy(result.q[-1], result.qd[-1]) - model.energy(result.q[0], result.qd[0])
+    print(f"final pose (deg): {np.round(np.degrees(result.q[-1, 0]), 3).tolist()}")
+    print(f"{args.batch} arm(s) x {steps} steps in {result.wall_s:.3f} s: "
+          f"{result.realtime_factor:.1f}x real time ({result.arm_realtime_factor:.1f}x arm-seconds)")
+    print(f"energy change (arm 0): {drift[0]:.3e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim import profiling
+
+# Headless, parallel export of joint trajectories to video or image sequences.
+# Frames are rendered off-screen on a reusable Agg canvas (static axes cached
+# once, trail baked in incrementally, arm blitted on top) straight into raw
+# RGB buffers. Frame ranges are split across a process pool and the buffers
+# are streamed in order to the writer, with a bounded number of chunks in
+# flight. For image sequences the workers also do the PNG encoding.
+#
+# The frames are never loaded as a whole. Each task carries only its own
+# slice of joint angles, read on demand (from a memory-mapped trajectory file
+# for instance), and the worker runs FK for that chunk. The trail needs every
+# earlier end-effector point. Those are computed once, block by block, into a
+# temporary memory-mapped file that all workers share.
+
+_EE_BLOCK = 4096    # Frames per FK call when precomputing the trail
+DEFAULT_TRAIL_LENGTH = 1000
+
+_VIDEO_SUFFIXES = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".gif"}
+
+class _FrameRenderer:
+
+    def __init__(
+            self,
+            link_lengths: Sequence[float],
+            trail_points: Optional[np.ndarray],
+            figsize: Tuple[float, float],
+            dpi: int,
+            trail_length: int = DEFAULT_TRAIL_LENGTH,
+            trail_every: int = 1,
+    ):
+        # trail_points: (M, 2) end-effector path of the whole trajectory, or None for no trail.
+        # The trail is the same window as the interactive TrailBuffer: one point
+        # in every trail_every frames, at most trail_length of them.
+        if trail_length < 1 or trail_every < 1:
+            raise ValueError("trail length and decimation must be at least 1")
+        self.link_lengths = list(link_lengths)
+        self.trail_points = trail_points
+        self.trail = trail_points is not None
+        self.trail_length = int(trail_length)
+        self.trail_every = int(trail_every)
+
+        # Same view as animate_joint_trajectory
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot(111)
+        ax.set_aspect("equal", adjustable="box")
+        ax.grid(True, linestyle="--", alpha=0.5)
+        max_reach = sum(link_lengths) if link_lengths else 1.0
+        ax.set_xlim(-max_reach * 1.1, max_reach * 1.1)
+        ax.set_ylim(-max_reach * 1.1, max_reach * 1.1)
+        self.ax = ax
+
+        (self.line,) = ax.plot([], [], "-o", color="blue", animated=True)
+        (self.trail_line,) = ax.plot([], [], color="red", linewidth=1, animated=True)
+
+        # Static background is drawn once and restored for every frame
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.width, self.height = self.canvas.get_width_height()
+
+    def render_range(self, start: int, angles) -> list[bytes]:
+        # Frames start .. start + len(angles) - 1, from their joint angles
+        with profiling.span("fk"):
+            positions = forward_kinematics_batch(self.link_lengths, np.asarray(angles, dtype=float))
+        stop = start + positions.shape[0]
+        background = self.background
+        if self.trail:
+            # Kept trail points are numbered m (frame m * every). Frame k shows
+            # points first(k)..last(k). The points shown by every frame of the
+            # chunk are baked into the background once; each frame then only
+            # draws the points that drop out or arrive during the chunk, so the
+            # cost per frame does not grow with the trail or the frame index.
+            _, m0 = self._trail_window(start)
+            f1, _ = self._trail_window(stop - 1)
+            shared = f1 <= m0
+            if shared:
+                self.canvas.restore_region(self.background)
+                self._draw_trail(f1, m0)
+                background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+        frames = []
+        for k in range(start, stop):
+            self.canvas.restore_region(background)
+            if self.trail:
+                first, last = self._trail_window(k)
+                if not shared:
+                    self._draw_trail(first, last)
+                else:
+                    if first < f1:
+                        self._draw_trail(first, f1)
+                    if last > m0:
+                        self._draw_trail(m0, last)
+
+            pts = positions[k - start]
+            self.line.set_data(pts[:, 0], pts[:, 1])
+            self.ax.draw_artist(self.line)
+
+            rgba = np.asarray(self.canvas.buffer_rgba())
+            frames.append(np.ascontiguousarray(rgba[..., :3]).tobytes())
+        return frames
+
+    def _trail_window(self, k: int) -> Tuple[int, int]:
+        # (first, last) kept point numbers shown at frame k
+        last = k // self.trail_every
+        return max(0, last - self.trail_length + 1), last
+
+    def _draw_trail(self, first: int, last: int):
+        every = self.trail_every
+        pts = self.trail_points[first * every:last * every + 1:every]
+        self.trail_line.set_data(pts[:, 0], pts[:, 1])
+        self.ax.draw_artist(self.trail_line)
+
+# One renderer per worker process, built by the pool initializer
+_worker_renderer: Optional[_FrameRenderer] = None
+
+def _open_trail(path: Optional[str], n_frames: int) -> Optional[np.ndarray]:
+    if path is None:
+        return None
+    return np.memmap(path, dtype=float, mode="r", shape=(n_frames, 2))
+
+def _init_worker(link_lengths, trail_path, n_frames, figsize, dpi, trail_length, trail_every):
+    global _worker_renderer
+    _worker_renderer = _FrameRenderer(link_lengths, _open_trail(trail_path, n_frames), figsize, dpi,
+                                      trail_length, trail_every)
+
+def _render_frames(renderer: _FrameRenderer, start: int, angles, frame_format: str) -> list[bytes]:
+    frames = renderer.render_range(start, angles)
+    if frame_format == "png":
+        from PIL import Image
+        size = (renderer.width, renderer.height)
+        encoded = []
+        for frame in frames:
+            buf = io.BytesIO()
+            Image.frombytes("RGB", size, frame).save(buf, format="PNG", compress_level=1)
+            encoded.append(buf.getvalue())
+        return encoded
+    return frames
+
+def _render_chunk(start: int, angles: np.ndarray, frame_format: str) -> list[bytes]:
+    return _render_frames(_worker_renderer, start, angles, frame_format)
+
+# Writers
+
+class _FFmpegWriter:
+    # Pipes raw rgb24 frames into an ffmpeg encoder
+    frame_format = "rgb24"
+
+    def __init__(self, path: str, width: int, height: int, fps: float):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is required for video export (or export an image sequence)")
+        cmd = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+        ]
+        if not path.lower().endswith(".gif"):
+            # yuv420p needs even dimensions
+            cmd += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+        cmd.append(path)
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, frame: bytes):
+        self.proc.stdin.write(frame)
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self.proc.returncode}")
+
+class _ImageSequenceWriter:
+    # Writes numbered PNG files from a printf-style pattern, e.g. frames/arm_%05d.png.
+    # Frames arrive already PNG-encoded, so encoding runs in the workers.
+    frame_format = "png"
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.index = 0
+        Path(pattern % 0).parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, frame: bytes):
+        with open(self.pattern % self.index, "wb") as f:
+            f.write(frame)
+        self.index += 1
+
+    def close(self):
+        pass
+
+def _write_trail(link_lengths, angle_frames, n_frames: int, path: str):
+    # End-effector path of every frame, computed block by block into a file
+    ee = np.memmap(path, dtype=float, mode="w+", shape=(n_frames, 2))
+    for k in range(0, n_frames, _EE_BLOCK):
+        block = np.asarray(angle_frames[k:k + _EE_BLOCK], dtype=float)
+        ee[k:k + len(block)] = forward_kinematics_batch(link_lengths, block, end_effector_only=True)
+    ee.flush()
+    del ee
+
+def _open_writer(path: str, width: int, height: int, fps: float):
+    if "%" in path:
+        return _ImageSequenceWriter(path)
+    if Path(path).suffix.lower() in _VIDEO_SUFFIXES:
+        return _FFmpegWriter(path, width, height, fps)
+    # Anything else is treated as a directory for an image sequence
+    return _ImageSequenceWriter(os.path.join(path, "frame_%06d.png"))
+
+def export_trajectory(
+        link_lengths: list[float],
+        angle_frames,
+        path: str,
+        fps: float = 30,
+        trail: bool = False,
+        workers: Optional[int] = None,
+        chunk_size: int = 64,
+        figsize: Tuple[float, float] = (6.4, 4.8),
+        dpi: int = 100,
+        trail_length: Optional[int] = None,
+        trail_every: int = 1,
+) -> int:
+    # Render every frame headlessly and write it to `path` (video file, printf
+    # pattern or directory). Returns the number of frames written.
+    # angle_frames only needs len() and slicing, which lists, arrays and
+    # memory-mapped trajectory files all support.
+    n_frames = len(angle_frames)
+    if n_frames == 0:
+        raise ValueError("angle_frame is empty")
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(int(workers), -(-n_frames // chunk_size)))
+    links = list(link_lengths)
+
+    tmp_dir = tempfile.TemporaryDirectory(prefix="arm_sim_export_") if trail else None
+    trail_path = os.path.join(tmp_dir.name, "trail.f64") if trail else None
+    try:
+        if trail:
+            with profiling.span("fk"):
+                _write_trail(links, angle_frames, n_frames, trail_path)
+        trail_length = trail_length or DEFAULT_TRAIL_LENGTH
+        init_args = (links, trail_path, n_frames, figsize, dpi, trail_length, trail_every)
+
+        # Frame size is fixed by figsize/dpi; a local renderer reports it (and
+        # does all the work when running single-process)
+        local = _FrameRenderer(links, _open_trail(trail_path, n_frames), figsize, dpi,
+                               trail_length, trail_every)
+        writer = _open_writer(str(path), local.width, local.height, fps)
+
+        def chunk(start):
+            return start, np.asarray(angle_frames[start:start + chunk_size], dtype=float)
+
+        starts = range(0, n_frames, chunk_size)
+        try:
+            if workers == 1:
+                for start in starts:
+                    with profiling.span("render"):
+                        frames = _render_frames(local, *chunk(start), writer.frame_format)
+                    with profiling.span("encode"):
+                        for frame in frames:
+                            writer.write(frame)
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=init_args) as pool:
+                    # Keep a bounded window of chunks in flight and consume in order
+                    pending = deque()
+                    queue = iter(starts)
+                    for start in queue:
+                        pending.append(pool.submit(_render_chunk, *chunk(start), writer.frame_format))
+                        if len(pending) >= 2 * workers:
+                            break
+                    while pending:
+                        # Time spent waiting on the render workers vs feeding the encoder
+                        with profiling.span("render_wait"):
+                            frames = pending.popleft().result()
+                        with profiling.span("encode"):
+                            for frame in frames:
+                                writer.write(frame)
+                        nxt = next(queue, None)
+                        if nxt is not None:
+                            pending.append(pool.submit(_render_chunk, *chunk(nxt), writer.frame_format))
+        finally:
+            writer.close()
+        # Release the local map before the file is removed
+        local = None
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+    return n_frames
@@ -1,5 +1,7 @@
 import math
 
+import numpy as np
+
 def forward_kinematics(link_lengths, joint_angles_deg):
     # Start at base origin
     positions = [(0.0, 0.0)]
@@ -15,4 +17,40 @@ def forward_kinematics(link_lengths, joint_angles_deg):
         y_new = y_prev + length * math.sin(theta)
         positions.append((x_new, y_new))
 
-    return positions
\ No newline at end of file
+    return positions
+
+def forward_kinematics_batch(
+        link_lengths,
+        joint_angles_deg,
+        end_effector_only: bool = False,
+) -> np.ndarray:
+    # Vectorized FK over many poses at once.
+    # joint_angles_deg: (M, N) array of frames (a single (N,) pose is also accepted)
+    # link_lengths: (N,) shared by every frame, or (M, N) with one arm per row
+    # Returns (M, N+1, 2) joint positions including the base, or (M, 2) end
+    # effector positions when end_effector_only is set.
+    lengths = np.asarray(link_lengths, dtype=float)
+    angles = np.asarray(joint_angles_deg, dtype=float)
+
+    single = (angles.ndim == 1)
+    if single:
+        angles = angles[np.newaxis, :]
+    if angles.ndim != 2 or angles.shape[1] != lengths.shape[-1]:
+        raise ValueError("joint_angles_deg must have shape (M, N) with N == len(link_lengths)")
+    if lengths.ndim == 2 and lengths.shape[0] != angles.shape[0]:
+        raise ValueError("per-frame link_lengths must have one row per frame")
+
+    # Absolute link orientation is the cumulative sum of relative joint angles
+    theta = np.cumsum(np.radians(angles), axis=1)
+    dx = lengths * np.cos(theta)
+    dy = lengths * np.sin(theta)
+
+    if end_effector_only:
+        ee = np.stack((dx.sum(axis=1), dy.sum(axis=1)), axis=-1)
+        return ee[0] if single else ee
+
+    # Joint positions are the running sum of link vectors, starting at the base
+    positions = np.zeros((angles.shape[0], angles.shape[1] + 1, 2))
+    np.cumsum(dx, axis=1, out=positions[:, 1:, 0])
+    np.cumsum(dy, axis=1, out=positions[:, 1:, 1])
+    return positions[0] if single else positions
@@ -0,0 +1,180 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.planner import ease_array, wrap_to_minus180_180
+from arm_sim.scenario import solve_target
+
+# Many arms in one scene, stored as a struct of arrays.
+#
+# Every per-arm quantity is one row of a contiguous array, so evaluating the
+# whole cell at a time t is a handful of NumPy calls whatever the number of
+# arms. Arms with fewer links are padded with zero-length links and zero
+# angles; those links add nothing to the chain and are masked out for drawing.
+#
+# Each arm runs one joint-space move from `start` to `end`, beginning `delay`
+# seconds into the simulation and lasting `duration` seconds, with its own
+# easing. The base sits at `base` and is rotated by `base_angle` degrees.
+
+EASINGS = ("linear", "cosine", "smoothstep")
+
+class Fleet:
+    def __init__(
+            self,
+            link_lengths: Sequence[Sequence[float]],
+            start: Sequence[Sequence[float]],
+            end: Sequence[Sequence[float]],
+            base=None,
+            base_angle=None,
+            duration=3.0,
+            delay=0.0,
+            easing="linear",
+    ):
+        n_arms = len(link_lengths)
+        if n_arms == 0:
+            raise ValueError("fleet needs at least one arm")
+        if len(start) != n_arms or len(end) != n_arms:
+            raise ValueError("start and end need one pose per arm")
+
+        self.n_links = np.array([len(L) for L in link_lengths], dtype=int)
+        if (self.n_links == 0).any():
+            raise ValueError("every arm needs at least one link")
+        width = int(self.n_links.max())
+
+        self.link_lengths = np.zeros((n_arms, width))
+        self.start = np.zeros((n_arms, width))
+        self.delta = np.zeros((n_arms, width))
+        for i, (links, s, e) in enumerate(zip(link_lengths, start, end)):
+            n = len(links)
+            if len(s) != n or len(e) != n:
+                raise ValueError(f"arm {i}: start and end must have one angle per link")
+            self.link_lengths[i, :n] = links
+            self.start[i, :n] = s
+            # Shortest-path deltas, same as interpolate_joint_space
+            self.delta[i, :n] = wrap_to_minus180_180(np.asarray(e, dtype=float) - np.asarray(s, dtype=float))
+
+        self.base = np.zeros((n_arms, 2)) if base is None else np.array(base, dtype=float).reshape(n_arms, 2)
+        self.base_angle = np.broadcast_to(np.asarray(0.0 if base_angle is None else base_angle, dtype=float),
+                                          (n_arms,)).copy()
+        self.duration = np.broadcast_to(np.asarray(duration, dtype=float), (n_arms,)).copy()
+        if (self.duration <= 0).any():
+            raise ValueError("durations must be positive")
+        self.delay = np.broadcast_to(np.asarray(delay, dtype=float), (n_arms,)).copy()
+
+        modes = [easing] * n_arms if isinstance(easing, str) else list(easing)
+        if len(modes) != n_arms or any(m not in EASINGS for m in modes):
+            raise ValueError(f"easing must be one of {EASINGS}, or one per arm")
+        self.easing = np.array([EASINGS.index(m) for m in modes], dtype=int)
+        # Arms grouped by easing once, so angles_at() needs one call per mode in use
+        self._easing_groups = [(mode, np.flatnonzero(self.easing == k))
+                               for k, mode in enumerate(EASINGS) if (self.easing == k).any()]
+
+        # Points that belong to a real link (base + one per link), for drawing
+        self.joint_mask = np.arange(width + 1)[np.newaxis, :] <= self.n_links[:, np.newaxis]
+        self.link_mask = self.joint_mask[:, 1:]
+
+    def __len__(self) -> int:
+        return self.link_lengths.shape[0]
+
+    @property
+    def end_time(self) -> float:
+        return float((self.delay + self.duration).max())
+
+    def reach(self) -> np.ndarray:
+        return self.link_lengths.sum(axis=1)
+
+    def bounds(self, margin: float = 1.1):
+        # (xmin, xmax, ymin, ymax) covering every arm's reach
+        r = self.reach()[:, np.newaxis] * margin
+        lo = (self.base - r).min(axis=0)
+        hi = (self.base + r).max(axis=0)
+        return lo[0], hi[0], lo[1], hi[1]
+
+    def angles_at(self, t: float) -> np.ndarray:
+        # (A, N) joint angles of every arm at time t (seconds)
+        progress = np.clip((t - self.delay) / self.duration, 0.0, 1.0)
+        s = np.empty_like(progress)
+        for mode, idx in self._easing_groups:
+            s[idx] = ease_array(progress[idx], mode)
+        return self.start + s[:, np.newaxis] * self.delta
+
+    def positions(self, angles: np.ndarray) -> np.ndarray:
+        # (A, N+1, 2) world positions of every joint, base included. The base
+        # rotation is folded into the first joint so one batched FK call covers
+        # all arms, each with its own link lengths.
+        q = np.array(angles, dtype=float)
+        q[:, 0] += self.base_angle
+        return forward_kinematics_batch(self.link_lengths, q) + self.base[:, np.newaxis, :]
+
+    def positions_at(self, t: float) -> np.ndarray:
+        return self.positions(self.angles_at(t))
+
+    def frames(self, fps: int, duration: Optional[float] = None) -> Iterator[np.ndarray]:
+        # Positions of the whole fleet at each tick, computed on demand
+        duration = self.end_time if duration is None else duration
+        n = max(1, int(round(duration * fps)))
+        for k in range(n + 1):
+            yield self.positions_at(k / fps)
+
+    @classmethod
+    def from_scenario(cls, data: Dict[str, Any]) -> "Fleet":
+        # {"arms": [{"links", "start", "end" | "target", "base", "base_angle",
+        #            "duration", "delay", "easing", "prefer", "clamp"}, ...],
+        #  "grid": {"rows", "cols", "spacing", "stagger", + any arm key}}
+        # Arm keys missing from an entry fall back to the top-level scenario.
+        arms: List[Dict[str, Any]] = [dict(a) for a in data.get("arms", [])]
+        grid = data.get("grid")
+        if grid:
+            rows, cols = int(grid["rows"]), int(grid["cols"])
+            spacing = float(grid.get("spacing", 25.0))
+            stagger = float(grid.get("stagger", 0.0))
+            template = {k: v for k, v in grid.items() if k not in ("rows", "cols", "spacing", "stagger")}
+            for r in range(rows):
+                for c in range(cols):
+                    arm = dict(template)
+                    arm["base"] = [c * spacing, r * spacing]
+                    arm["delay"] = arm.get("delay", 0.0) + stagger * (r * cols + c)
+                    arms.append(arm)
+        if not arms:
+            raise ValueError("fleet scenario needs 'arms' or 'grid'")
+
+        defaults = {k: data[k] for k in ("links", "start", "duration", "easing", "prefer", "clamp") if k in data}
+        links, starts, ends = [], [], []
+        for i, arm in enumerate(arms):
+            arm = dict(defaults, **arm)
+            if "links" not in arm:
+                raise ValueError(f"arm {i}: missing links")
+            L = [float(v) for v in arm["links"]]
+            start = arm.get("start") or [0.0] * len(L)
+            if "end" in arm:
+                end = arm["end"]
+            elif "target" in arm:
+                # Target in the arm's own base frame
+                end = solve_target(L, arm["target"], arm.get("prefer", "elbow_up"),
+                                   bool(arm.get("clamp", False)), seed=start).end
+            else:
+                raise ValueError(f"arm {i}: needs end or target")
+            links.append(L)
+            starts.append(start)
+            ends.append(end)
+
+        def column(key, default):
+            return [dict(defaults, **a).get(key, default) for a in arms]
+
+        return cls(links, starts, ends,
+                   base=column("base", [0.0, 0.0]),
+                   base_angle=column("base_angle", 0.0),
+                   duration=column("duration", 3.0),
+                   delay=column("delay", 0.0),
+                   easing=column("easing", "linear"))
+
+    @classmethod
+    def load(cls, path) -> "Fleet":
+        with Path(path).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("Fleet scenario json must be an object with keys")
+        return cls.from_scenario(data)
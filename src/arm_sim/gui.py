@@ -1,6 +1,12 @@
+import argparse
+import os
 import sys
+import tempfile
+import time
+from pathlib import Path
 from typing import List
 
+import numpy as np
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -13,17 +19,45 @@ from PyQt6.QtWidgets import (
     QGroupBox,
     QGridLayout,
     QDoubleSpinBox,
+    QSpinBox,
     QCheckBox,
     QComboBox,
+    QFileDialog,
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
-from arm_sim.fk import forward_kinematics
-from arm_sim.planner import interpolate_joint_space
-from arm_sim.ik import ik_2link, clamp_target_to_workspace
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.trajectory import JointTrajectory
+from arm_sim.trajfile import open_trajectory
+from arm_sim.telemetry import TEXT_SUFFIXES, describe_resample, open_telemetry
+from arm_sim.ik import ik_2link, ik_2link_nearest, ik_nlink, clamp_target_to_workspace, clamp_target_to_workspace_nlink
+from arm_sim.ik_cache import IKLookupTable
+from arm_sim.jacobian import WorkspaceMap
+from arm_sim.cartesian import describe_plan, plan_cartesian
+from arm_sim import profiling
+
+_CARTESIAN_RATE = 120   # Path samples per second for straight-line moves
+
+class PlanWorker(QThread):
+    # Runs a planning function off the UI thread and hands the result back
+    # through a queued signal, so large plans never block event handling
+    planned = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, plan_fn, parent=None):
+        super().__init__(parent)
+        self._plan_fn = plan_fn
+
+    def run(self):
+        try:
+            result = self._plan_fn()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.planned.emit(result)
 
 class ArmSimWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -36,10 +70,16 @@ class ArmSimWindow(QMainWindow):
         self.link_lengths: List[float] = [7.0, 10.0]
         self.fps: int = 30
 
-        # Animation state
-        self.frame: list[list[float]] = []
-        self.frame_index: int = 0
+        # Animation state: playback samples the trajectory at the elapsed
+        # wall-clock time, so slow draws drop frames instead of stretching time
+        self.trajectory = None # type: JointTrajectory | None
+        self.plan_worker = None # type: PlanWorker | None
+        self.telemetry_worker = None # type: PlanWorker | None
+        self._telemetry_dir = None # type: tempfile.TemporaryDirectory | None
+        self._play_t0: float = 0.0
+        self._play_frames: int = 0
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.on_timer_tick)
 
         # Central layout
@@ -59,9 +99,42 @@ class ArmSimWindow(QMainWindow):
         # Track last clicked target (for drawing a marker)
         self.last_target = None # type: tuple[float, float] | None
 
+        # Persistent artists: created once, later frames only update their data.
+        # With blitting on they are "animated" (left out of full redraws) and drawn
+        # over a cached background of the static axes.
+        self.blit_enabled = True
+        self.overlay_enabled = False
+        # Manipulability heatmap: static image under the arm, so it is part of
+        # the cached background. The map is loaded once per link configuration.
+        self.heatmap_enabled = False
+        self.heatmap_image = None
+        self._workspace_map = None # type: WorkspaceMap | None
+        self._background = None
+        self._init_artists()
+        self.canvas.mpl_connect("draw_event", self.on_canvas_draw)
+
+        # Render rate statistics (exponential moving averages)
+        self.render_fps_label = QLabel("Render: - fps")
+        self._last_draw_t = None
+        self._draw_interval_avg = None
+        self._draw_cost_avg = None
+        self._stats_shown_t = 0.0
+
         # Matplotlib click event
         self.canvas.mpl_connect("button_press_event", self.on_plot_click)
 
+        # Drag-to-track (IK mode): motion events only record the latest
+        # target; a timer at the display refresh rate solves and draws it, so
+        # bursts of mouse events collapse into one IK solve per frame
+        self._dragging = False
+        self._drag_target = None # type: tuple[float, float] | None
+        self._track_pose = None # type: list[float] | None
+        self.track_timer = QTimer(self)
+        self.track_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.track_timer.timeout.connect(self.on_track_tick)
+        self.canvas.mpl_connect("motion_notify_event", self.on_plot_motion)
+        self.canvas.mpl_connect("button_release_event", self.on_plot_release)
+
         # Control panel
         controls = QWidget()
         controls_layout = QVBoxLayout()
@@ -85,22 +158,9 @@ class ArmSimWindow(QMainWindow):
         start_grid = QGridLayout()
         self.start_group.setLayout(start_grid)
 
-        self.start_labels: list[QLabel] = []
-        self.start_sliders: list[QSlider] = []
-
-        for i in range(2):
-            lbl = QLabel(f"Joint {i+1} start: 0°")
-            sld = QSlider(Qt.Orientation.Horizontal)
-            sld.setRange(-180, 180)
-            sld.setSingleStep(1)
-            sld.setValue(0)
-            sld.valueChanged.connect(self.on_start_changed)
-
-            self.start_labels.append(lbl)
-            self.start_sliders.append(sld)
-
-            start_grid.addWidget(lbl, i, 0)
-            start_grid.addWidget(sld, i, 1)
+        self.start_grid = start_grid
+        self.start_labels, self.start_sliders = self._build_joint_sliders(
+            start_grid, "start", self.on_start_changed)
 
         controls_layout.addWidget(self.start_group)
 
@@ -109,26 +169,13 @@ class ArmSimWindow(QMainWindow):
         end_grid = QGridLayout()
         self.end_group.setLayout(end_grid)
 
-        self.end_labels: list[QLabel] = []
-        self.end_sliders: list[QSlider] = []
-
-        for i in range(2):
-            lbl = QLabel(f"Joint {i+1} end: 0°")
-            sld = QSlider(Qt.Orientation.Horizontal)
-            sld.setRange(-180, 180)
-            sld.setSingleStep(1)
-            sld.setValue(0)
-            sld.valueChanged.connect(self.on_end_changed)
-
-            self.end_labels.append(lbl)
-            self.end_sliders.append(sld)
-
-            end_grid.addWidget(lbl, i, 0)
-            end_grid.addWidget(sld, i, 1)
+        self.end_grid = end_grid
+        self.end_labels, self.end_sliders = self._build_joint_sliders(
+            end_grid, "end", self.on_end_changed)
 
         controls_layout.addWidget(self.end_group)
 
-        # IK target controls (for 2-link arm)
+        # IK target controls
         self.ik_group = QGroupBox("IK target (set END pose)")
         ik_grid = QGridLayout()
         self.ik_group.setLayout(ik_grid)
@@ -153,6 +200,7 @@ class ArmSimWindow(QMainWindow):
         ik_grid.addWidget(QLabel("Elbow"), 2, 0)
         self.prefer_combo = QComboBox()
         self.prefer_combo.addItems(["elbow_up", "elbow_down"])
+        self.prefer_combo.currentTextChanged.connect(self.on_prefer_changed)
         ik_grid.addWidget(self.prefer_combo, 2, 1)
 
         # Clamp checkbox
@@ -160,10 +208,22 @@ class ArmSimWindow(QMainWindow):
         self.clamp_checkbox.setChecked(True)
         ik_grid.addWidget(self.clamp_checkbox, 3, 0, 1, 2)
 
+        # Optional precomputed IK table for low-latency targeting
+        self.ik_table = None
+        self.ik_table_checkbox = QCheckBox("Use IK lookup table")
+        self.ik_table_checkbox.setChecked(False)
+        self.ik_table_checkbox.toggled.connect(self.on_ik_table_toggled)
+        ik_grid.addWidget(self.ik_table_checkbox, 4, 0, 1, 2)
+
+        # Straight-line tool path instead of joint interpolation
+        self.cartesian_checkbox = QCheckBox("Straight-line end-effector path")
+        self.cartesian_checkbox.setChecked(False)
+        ik_grid.addWidget(self.cartesian_checkbox, 5, 0, 1, 2)
+
         # Solve IK button
         self.solve_ik_button = QPushButton("Solve IK -> End pose")
         self.solve_ik_button.clicked.connect(self.on_solve_ik_clicked)
-        ik_grid.addWidget(self.solve_ik_button, 4, 0, 1, 2)
+        ik_grid.addWidget(self.solve_ik_button, 6, 0, 1, 2)
 
         controls_layout.addWidget(self.ik_group)
 
@@ -186,18 +246,109 @@ class ArmSimWindow(QMainWindow):
 
         controls_layout.addWidget(duration_group)
 
+        # Playback rate
+        fps_row = QHBoxLayout()
+        fps_row.addWidget(QLabel("Playback fps:"))
+        self.fps_spin = QSpinBox()
+        self.fps_spin.setRange(10, 240)
+        self.fps_spin.setValue(self.fps)
+        self.fps_spin.valueChanged.connect(self.on_fps_changed)
+        fps_row.addWidget(self.fps_spin)
+        controls_layout.addLayout(fps_row)
+
+        # Rendering mode
+        self.blit_checkbox = QCheckBox("Blitted rendering")
+        self.blit_checkbox.setChecked(self.blit_enabled)
+        self.blit_checkbox.toggled.connect(self.on_blit_toggled)
+        controls_layout.addWidget(self.blit_checkbox)
+
+        self.overlay_checkbox = QCheckBox("FPS overlay")
+        self.overlay_checkbox.setChecked(self.overlay_enabled)
+        self.overlay_checkbox.toggled.connect(self.on_overlay_toggled)
+        controls_layout.addWidget(self.overlay_checkbox)
+
+        self.heatmap_checkbox = QCheckBox("Manipulability heatmap")
+        self.heatmap_checkbox.setChecked(self.heatmap_enabled)
+        self.heatmap_checkbox.toggled.connect(self.on_heatmap_toggled)
+        controls_layout.addWidget(self.heatmap_checkbox)
+
         # Play button
         self.play_button = QPushButton("Play animation")
         self.play_button.clicked.connect(self.on_play_clicked)
         controls_layout.addWidget(self.play_button)
 
+        # Recorded trajectory replay (memory-mapped) and scrubbing
+        self.open_button = QPushButton("Open trajectory file...")
+        self.open_button.clicked.connect(self.on_open_trajectory_clicked)
+        controls_layout.addWidget(self.open_button)
+        self.replay_button = QPushButton("Replay loaded trajectory")
+        self.replay_button.clicked.connect(self.on_replay_clicked)
+        controls_layout.addWidget(self.replay_button)
+
+        self.scrub_slider = QSlider(Qt.Orientation.Horizontal)
+        self.scrub_slider.setRange(0, 1000)
+        self.scrub_slider.setEnabled(False)
+        self.scrub_slider.valueChanged.connect(self.on_scrub_changed)
+        controls_layout.addWidget(self.scrub_slider)
+        controls_layout.addWidget(self.render_fps_label)
+
         controls_layout.addStretch(1)
 
-        self._draw_pose([0.0, 0.0])
+        self._draw_pose([0.0] * len(self.link_lengths))
 
     # Helpers for GUI state
 
+    def _init_artists(self):
+        # Persistent arm and target artists (recreated only when the axes are rebuilt)
+        (self.arm_line,) = self.ax.plot([], [], "-o", color="blue", markersize=8,
+                                        animated=self.blit_enabled)
+        (self.target_marker,) = self.ax.plot([], [], marker="x", markersize=10, linestyle="None",
+                                             animated=self.blit_enabled)
+        # Frame rate / frame time readout in the top-left corner of the axes
+        self.overlay_text = self.ax.text(0.02, 0.98, "", transform=self.ax.transAxes,
+                                         ha="left", va="top", family="monospace", fontsize=8,
+                                         visible=self.overlay_enabled, animated=self.blit_enabled)
+
+    def _build_joint_sliders(self, grid: QGridLayout, kind: str, callback):
+        labels: list[QLabel] = []
+        sliders: list[QSlider] = []
+
+        for i in range(len(self.link_lengths)):
+            lbl = QLabel(f"Joint {i+1} {kind}: 0°")
+            sld = QSlider(Qt.Orientation.Horizontal)
+            sld.setRange(-180, 180)
+            sld.setSingleStep(1)
+            sld.setValue(0)
+            sld.valueChanged.connect(callback)
+
+            labels.append(lbl)
+            sliders.append(sld)
+
+            grid.addWidget(lbl, i, 0)
+            grid.addWidget(sld, i, 1)
+        return labels, sliders
+
+    def set_link_lengths(self, link_lengths: list[float]):
+        # Switch to a different arm: joint sliders, axes and IK table follow the links
+        self.link_lengths = [float(L) for L in link_lengths]
+        for widget in self.start_labels + self.start_sliders + self.end_labels + self.end_sliders:
+            widget.deleteLater()
+        self.start_labels, self.start_sliders = self._build_joint_sliders(
+            self.start_grid, "start", self.on_start_changed)
+        self.end_labels, self.end_sliders = self._build_joint_sliders(
+            self.end_grid, "end", self.on_end_changed)
+
+        self._setup_axes()
+        self._init_artists()
+        self._background = None
+        self.heatmap_image = None
+        self._update_heatmap()
+        if self.ik_table_checkbox.isChecked():
+            self.ik_table = IKLookupTable.for_links(self.link_lengths)
+        self.canvas.draw_idle()
+
     def _setup_axes(self):
+        # Static parts of the plot; only needs to run again if the links change
         self.ax.clear()
         self.ax.set_aspect("equal", adjustable="box")
 
@@ -209,11 +360,47 @@ class ArmSimWindow(QMainWindow):
         self.ax.grid(True, linestyle="--", alpha=0.5)
         self.ax.set_xlabel("X")
         self.ax.set_ylabel("Y")
+        self._update_title()
 
+    def _update_title(self):
         if self.fk_mode:
-            self.ax.set_title("Planar 2-link Arm - Forward Kinematics")
+            self.ax.set_title(f"Planar {len(self.link_lengths)}-link Arm - Forward Kinematics")
         else:
-            self.ax.set_title("Planar 2-link Arm - Inverse Kinematics")
+            self.ax.set_title(f"Planar {len(self.link_lengths)}-link Arm - Inverse Kinematics")
+
+    def _clamp_target(self, x: float, y: float):
+        if len(self.link_lengths) == 2:
+            L1, L2 = self.link_lengths
+            return clamp_target_to_workspace(x, y, L1, L2)
+        return clamp_target_to_workspace_nlink(x, y, self.link_lengths)
+
+    def _solve_ik(self, x: float, y: float, prefer: str, seed=None) -> list[float]:
+        # Lookup table if enabled, else closed form for 2 links and a
+        # warm-started numerical solver otherwise
+        if self.ik_table is not None:
+            return self.ik_table.query(x, y, prefer)
+        if len(self.link_lengths) == 2:
+            L1, L2 = self.link_lengths
+            return list(ik_2link(x, y, L1, L2, prefer=prefer))
+        angles, converged = ik_nlink(x, y, self.link_lengths, seed=seed)
+        if not converged:
+            print("[IK] Solver did not converge; showing closest pose")
+        return angles
+
+    def _track_ik(self, x: float, y: float) -> list[float]:
+        # Like _solve_ik, but the elbow branch follows the previous pose
+        # instead of the preferred branch
+        prev = self._track_pose if self._track_pose is not None else self._get_start_angles()
+        if self.ik_table is not None:
+            candidates = [self.ik_table.query(x, y, prefer) for prefer in ("elbow_up", "elbow_down")]
+            return min(candidates, key=lambda q: sum(((a - b + 180.0) % 360.0 - 180.0) ** 2
+                                                     for a, b in zip(q, prev)))
+        if len(self.link_lengths) == 2:
+            L1, L2 = self.link_lengths
+            return list(ik_2link_nearest(x, y, L1, L2, prev))
+        # Warm start from the previous pose keeps the numerical solver on the same branch
+        angles, _ = ik_nlink(x, y, self.link_lengths, seed=prev)
+        return angles
 
     def _get_start_angles(self) -> list[float]:
         return [float(s.value()) for s in self.start_sliders]
@@ -241,7 +428,18 @@ class ArmSimWindow(QMainWindow):
         dur = self._get_duration()
         self.duration_label.setText(f"Duration: {dur:.0f} s")
 
+    def on_fps_changed(self, value: int):
+        self.fps = int(value)
+        if self.timer.isActive():
+            self.timer.setInterval(max(1, int(1000 / self.fps)))
+
     # Play / Animation
+    def on_replay_clicked(self):
+        # Wall-clock playback of whatever trajectory is loaded (e.g. a recorded file)
+        if self.trajectory is not None:
+            self.play_button.setEnabled(False)
+            self.on_plan_ready(self.trajectory)
+
     def on_play_clicked(self):
         # Compute a joint-spae trajectory and start animating.
         start = self._get_start_angles()
@@ -249,21 +447,16 @@ class ArmSimWindow(QMainWindow):
 
         fk_mode = (self.mode_combo.currentIndex() == 0)
 
-        if fk_mode:
-            end = self._get_end_angles()
-        else:
-            # IK mode: compute end angles from target x, y
-            if len(self.link_lengths) != 2:
-                raise ValueError("IK mode currently supports exctly 2 links")
-            
-            L1, L2 = self.link_lengths
+        end = self._get_end_angles() if fk_mode else None
+        if not fk_mode:
+            # IK mode: end angles are solved from target x, y
             x = float(self.target_x_spin.value())
             y = float(self.target_y_spin.value())
             prefer = self.prefer_combo.currentText()
             clamp = self.clamp_checkbox.isChecked()
 
             if clamp:
-                x, y, was_clamped = clamp_target_to_workspace(x, y, L1, L2)
+                x, y, was_clamped = self._clamp_target(x, y)
                 if was_clamped:
                     # Uppdate GUI to show clamped target
                     self.target_x_spin.blockSignals(True)
@@ -273,54 +466,258 @@ class ArmSimWindow(QMainWindow):
                     self.target_x_spin.blockSignals(False)
                     self.target_y_spin.blockSignals(False)
 
-            th1_deg, th2_deg = ik_2link(x, y, L1, L2, prefer=prefer)
-            end = [th1_deg, th2_deg]
+        cartesian = not fk_mode and self.cartesian_checkbox.isChecked()
+
+        # Widgets are read here; IK and trajectory construction run on a worker
+        def plan():
+            if cartesian:
+                # One IK solve per sample along the line, in a single batched call
+                path = plan_cartesian(self.link_lengths, start, (x, y), duration,
+                                      _CARTESIAN_RATE, "cosine", clamp=clamp)
+                warning = describe_plan(path)
+                if warning:
+                    print(f"[IK] {warning}")
+                times = np.linspace(0.0, duration, len(path.angles))
+                return JointTrajectory.from_keyframes(times, path.angles)
+            end_pose = end if fk_mode else self._solve_ik(x, y, prefer, seed=start)
+            return JointTrajectory([start, end_pose], duration, "cosine")
+
+        # Disable button while planning and animation run
+        self.play_button.setEnabled(False)
 
-        # Build frames
-        self.frames = interpolate_joint_space(
-            start_deg=start,
-            end_deg=end,
-            duration_s=duration,
-            fps=self.fps,
-            easing="cosine",
-        )
-        self.frame_index = 0
+        self.plan_worker = PlanWorker(plan, self)
+        self.plan_worker.planned.connect(self.on_plan_ready)
+        self.plan_worker.failed.connect(self.on_plan_failed)
+        self.plan_worker.start()
 
-        # Disable button while animation runs
-        self.play_button.setEnabled(False)
+    def on_open_trajectory_clicked(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open trajectory", "",
+                                              "Trajectory files (*.armtraj);;"
+                                              "Telemetry logs (*.csv *.txt *.npy *.bin);;All files (*)")
+        if not path:
+            return
+        if Path(path).suffix.lower() == ".armtraj":
+            self.load_trajectory_file(path)
+        else:
+            self.load_telemetry_file(path)
+
+    def load_telemetry_file(self, path: str):
+        # Logs have irregular timestamps and no random access, so they are
+        # resampled once to the playback rate into a trajectory file on a
+        # worker thread. Scrubbing and replay then use the memory-mapped file.
+        links = list(self.link_lengths)
+        fps = self.fps
+        if self._telemetry_dir is None:
+            self._telemetry_dir = tempfile.TemporaryDirectory(prefix="arm_sim_telemetry_")
+        # A fresh file per conversion: rewriting one that an earlier
+        # trajectory still has memory-mapped would truncate it under the map
+        fd, out = tempfile.mkstemp(suffix=".armtraj", prefix=f"{Path(path).stem}_{fps}fps_",
+                                   dir=self._telemetry_dir.name)
+        os.close(fd)
+
+        def convert():
+            suffix = Path(path).suffix.lower()
+            raw = suffix not in TEXT_SUFFIXES and suffix != ".npy"
+            log = open_telemetry(path, n_joints=len(links) if raw else None)
+            resampler = log.resampler(fps)
+            log.to_trajectory(out, links, fps, resampler=resampler)
+            print(f"[replay] {describe_resample(resampler)}")
+            return out
+
+        self.open_button.setEnabled(False)
+        self.telemetry_worker = PlanWorker(convert, self)
+        self.telemetry_worker.planned.connect(self.on_telemetry_ready)
+        self.telemetry_worker.failed.connect(self.on_telemetry_failed)
+        self.telemetry_worker.start()
+
+    def on_telemetry_ready(self, path: str):
+        self.open_button.setEnabled(True)
+        self.load_trajectory_file(path)
+
+    def on_telemetry_failed(self, message: str):
+        print(f"[replay] {message}")
+        self.open_button.setEnabled(True)
+
+    def load_trajectory_file(self, path: str):
+        # Memory-mapped: opening is instant regardless of file size
+        try:
+            traj = open_trajectory(path)
+        except (OSError, ValueError) as e:
+            print(f"[replay] {e}")
+            return
+        if len(traj) == 0:
+            print(f"[replay] {path} has no frames")
+            return
+        if traj.link_lengths != self.link_lengths:
+            self.set_link_lengths(traj.link_lengths)
+        self.trajectory = traj
+        self.scrub_slider.setEnabled(True)
+        self.scrub_slider.setValue(0)
+        self._draw_pose(traj.sample(0.0))
+
+    def on_scrub_changed(self, value: int):
+        # Scrub through the current trajectory (planned or memory-mapped file)
+        if self.trajectory is None or self.timer.isActive():
+            return
+        t = self.trajectory.duration * value / self.scrub_slider.maximum()
+        self._draw_pose(self.trajectory.sample(t))
+
+    def on_plan_ready(self, trajectory):
+        self.trajectory = trajectory
+        self.scrub_slider.setEnabled(True)
+        self._play_frames = 0
+        self._play_t0 = time.monotonic()
 
-        # Start timer
-        interval_ms = int(1000 / self.fps)
-        self.timer.start(interval_ms)
+        # Start timer; it only sets the draw rate, not the motion timing
+        self.timer.start(max(1, int(1000 / self.fps)))
+
+    def on_plan_failed(self, message: str):
+        print(f"[plan] {message}")
+        self.play_button.setEnabled(True)
 
     def on_timer_tick(self):
-        if self.frame_index >= len(self.frames):
+        if self.trajectory is None:
             self.timer.stop()
-            self.play_button.setEnabled(True)
             return
-        
-        angles = self.frames[self.frame_index]
-        self._draw_pose(angles)
-        self.frame_index += 1
+
+        # Pose for the elapsed wall-clock time; late ticks skip ahead
+        elapsed = time.monotonic() - self._play_t0
+        duration = self.trajectory.duration
+        done = elapsed >= duration
+
+        with profiling.span("sample"):
+            pose = self.trajectory.sample(min(elapsed, duration))
+        self._draw_pose(pose)
+        self._play_frames += 1
+
+        if duration > 0:
+            self.scrub_slider.blockSignals(True)
+            self.scrub_slider.setValue(int(self.scrub_slider.maximum() * min(1.0, elapsed / duration)))
+            self.scrub_slider.blockSignals(False)
+
+        if done:
+            self.timer.stop()
+            self.play_button.setEnabled(True)
+            expected = self.trajectory.n_frames(self.fps)
+            self.render_fps_label.setText(
+                f"Playback: {self._play_frames}/{expected} frames in {elapsed:.2f} s "
+                f"(target {duration:.2f} s)"
+            )
 
     # Drawing
     def _draw_pose(self, joint_angles_deg: list[float]):
         # Draw a single pose of the arm on the embedded canvas
-        self._setup_axes()
+        t0 = time.perf_counter()
 
-        pts = forward_kinematics(self.link_lengths, joint_angles_deg)
+        with profiling.span("fk"):
+            pts = forward_kinematics_batch(self.link_lengths, joint_angles_deg)
+        self.arm_line.set_data(pts[:, 0], pts[:, 1])
 
-        xs = [p[0] for p in pts]
-        ys = [p[1] for p in pts]
-
-        self.ax.plot(xs, ys, "-o", color="blue", markersize=8)
-        
         if self.last_target is not None:
             tx, ty = self.last_target
-            self.ax.plot([tx], [ty], marker="x", markersize=10, linestyle="None")
+            self.target_marker.set_data([tx], [ty])
+        else:
+            self.target_marker.set_data([], [])
+
+        if self.overlay_enabled and self._draw_interval_avg:
+            self.overlay_text.set_text(
+                f"{1.0 / self._draw_interval_avg:5.1f} fps\n"
+                f"{self._draw_interval_avg * 1000.0:5.1f} ms/frame\n"
+                f"{self._draw_cost_avg * 1000.0:5.1f} ms/draw"
+            )
+
+        with profiling.span("draw"):
+            if self.blit_enabled and self._background is not None:
+                # Restore the cached static background and repaint only the arm
+                self.canvas.restore_region(self._background)
+                self.ax.draw_artist(self.arm_line)
+                self.ax.draw_artist(self.target_marker)
+                if self.overlay_enabled:
+                    self.ax.draw_artist(self.overlay_text)
+                self.canvas.blit(self.fig.bbox)
+            else:
+                self.canvas.draw_idle()
+
+        self._record_draw(t0, time.perf_counter())
+
+    def _record_draw(self, t0: float, t1: float):
+        # Track draw rate and per-draw cost; the label is refreshed a few times per second
+        alpha = 0.1
+        cost = t1 - t0
+        self._draw_cost_avg = cost if self._draw_cost_avg is None else (
+            (1 - alpha) * self._draw_cost_avg + alpha * cost)
+        if self._last_draw_t is not None:
+            interval = t0 - self._last_draw_t
+            profiling.frame(interval)
+            self._draw_interval_avg = interval if self._draw_interval_avg is None else (
+                (1 - alpha) * self._draw_interval_avg + alpha * interval)
+        self._last_draw_t = t0
+
+        if t1 - self._stats_shown_t >= 0.25 and self._draw_interval_avg:
+            self._stats_shown_t = t1
+            self.render_fps_label.setText(
+                f"Render: {1.0 / self._draw_interval_avg:.1f} fps "
+                f"({self._draw_cost_avg * 1000.0:.1f} ms/draw)"
+            )
+
+    def on_canvas_draw(self, event):
+        # A full redraw happened (startup, resize, mode change): re-cache the
+        # static background and paint the animated artists on top of it
+        if not self.blit_enabled:
+            return
+        self._background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.arm_line)
+        self.ax.draw_artist(self.target_marker)
+        if self.overlay_enabled:
+            self.ax.draw_artist(self.overlay_text)
+
+    def on_blit_toggled(self, checked: bool):
+        self.blit_enabled = checked
+        self._background = None
+        self.arm_line.set_animated(checked)
+        self.target_marker.set_animated(checked)
+        self.overlay_text.set_animated(checked)
+        self.canvas.draw_idle()
+
+    def on_overlay_toggled(self, checked: bool):
+        self.overlay_enabled = checked
+        self.overlay_text.set_visible(checked)
+        self.canvas.draw_idle()
 
+    def _update_heatmap(self):
+        # (Re)draw the manipulability map for the current arm and elbow branch
+        if self.heatmap_image is not None:
+            self.heatmap_image.remove()
+            self.heatmap_image = None
+        if not self.heatmap_enabled:
+            return
+        if self._workspace_map is None or self._workspace_map.link_lengths != self.link_lengths:
+            self._workspace_map = WorkspaceMap.load_or_build(self.link_lengths)
+        wmap = self._workspace_map
+
+        # imshow would rescale the axes to the image; keep the arm's view box
+        xlim, ylim = self.ax.get_xlim(), self.ax.get_ylim()
+        self.heatmap_image = self.ax.imshow(
+            wmap.image(self.prefer_combo.currentText()), origin="lower", extent=wmap.extent_box(),
+            cmap="viridis", vmin=0.0, vmax=1.0, alpha=0.45, interpolation="bilinear", zorder=0)
+        self.ax.set_xlim(xlim)
+        self.ax.set_ylim(ylim)
+
+    def on_heatmap_toggled(self, checked: bool):
+        self.heatmap_enabled = checked
+        self._update_heatmap()
         self.canvas.draw_idle()
 
+    def on_prefer_changed(self, prefer: str):
+        # The map differs per branch for redundant arms
+        if self.heatmap_enabled:
+            self._update_heatmap()
+            self.canvas.draw_idle()
+
+    def on_ik_table_toggled(self, checked: bool):
+        # Built once per link configuration and persisted, so later runs just load it
+        self.ik_table = IKLookupTable.for_links(self.link_lengths) if checked else None
+
     def on_solve_ik_clicked(self):
         self.preview_ik_solution()
 
@@ -335,6 +732,10 @@ class ArmSimWindow(QMainWindow):
         self.end_group.setVisible(self.fk_mode)
         self.ik_group.setVisible(not self.fk_mode)
 
+        # Title changes need a full redraw (which also re-caches the background)
+        self._update_title()
+        self.canvas.draw_idle()
+
         # Update when switching modes
         if self.fk_mode:
             self._draw_pose(self._get_end_angles())
@@ -369,19 +770,71 @@ class ArmSimWindow(QMainWindow):
         # Solve IK and preview pose
         self.preview_ik_solution()
 
+        # Keep tracking the mouse until the button is released
+        self._dragging = True
+        self._drag_target = None
+        refresh = self.screen().refreshRate() if self.screen() is not None else 60.0
+        self.track_timer.start(max(1, int(1000 / max(1.0, refresh))))
+
+    def on_plot_motion(self, event):
+        # Only remember the newest position; on_track_tick does the work
+        if not self._dragging or event.inaxes != self.ax:
+            return
+        if event.xdata is None or event.ydata is None:
+            return
+        self._drag_target = (float(event.xdata), float(event.ydata))
+
+    def on_track_tick(self):
+        if self._drag_target is None:
+            return
+        x, y = self._drag_target
+        self._drag_target = None
+
+        if self.clamp_checkbox.isChecked():
+            x, y, _ = self._clamp_target(x, y)
+        try:
+            with profiling.span("track_ik"):
+                angles = self._track_ik(x, y)
+        except ValueError as e:
+            print(f"[IK] {e}")
+            return
+        self._track_pose = list(angles)
+        self.last_target = (x, y)
+
+        for i, (lbl, val) in enumerate(zip(self.end_labels, angles), start=1):
+            lbl.setText(f"Joint {i} end: {val:.1f}°")
+        self._draw_pose(angles)
+
+    def on_plot_release(self, event):
+        if not self._dragging:
+            return
+        self.track_timer.stop()
+        self.on_track_tick()
+        self._dragging = False
+
+        # Sync the target widgets once, at the end of the drag
+        if self.last_target is not None:
+            x, y = self.last_target
+            self.target_x_spin.blockSignals(True)
+            self.target_y_spin.blockSignals(True)
+            self.target_x_spin.setValue(x)
+            self.target_y_spin.setValue(y)
+            self.target_x_spin.blockSignals(False)
+            self.target_y_spin.blockSignals(False)
+
+        # Keep the tracked elbow branch for playback (2-link: elbow up has θ2 <= 0)
+        if self._track_pose is not None and len(self.link_lengths) == 2:
+            self.prefer_combo.setCurrentText("elbow_up" if self._track_pose[1] <= 0 else "elbow_down")
+
     def preview_ik_solution(self):
         # Solve IK from current target Widgets and preview the resulting arm pose.
-        if len(self.link_lengths) != 2:
-            return
-        
-        L1, L2 = self.link_lengths
         x = float(self.target_x_spin.value())
         y = float(self.target_y_spin.value())
         prefer = self.prefer_combo.currentText()
         clamp = self.clamp_checkbox.isChecked()
 
         if clamp:
-            x2, y2, was_clamped = clamp_target_to_workspace(x, y, L1, L2)
+            x2, y2, was_clamped = self._clamp_target(x, y)
             if was_clamped:
                 self.target_x_spin.blockSignals(True)
                 self.target_y_spin.blockSignals(True)
@@ -394,23 +847,37 @@ class ArmSimWindow(QMainWindow):
             x, y = x2, y2
 
         try:
-            th1_deg, th2_deg = ik_2link(x, y, L1, L2, prefer=prefer)
+            angles = self._solve_ik(x, y, prefer, seed=self._get_start_angles())
         except ValueError as e:
             print(f"[IK] {e}")
             return
         
-        self.end_labels[0].setText(f"Joint 1 end: {th1_deg:.1f}°")
-        self.end_labels[1].setText(f"Joint 2 end: {th2_deg:.1f}°")
+        for i, (lbl, val) in enumerate(zip(self.end_labels, angles), start=1):
+            lbl.setText(f"Joint {i} end: {val:.1f}°")
 
         # Preview the solved pose
-        self._draw_pose([th1_deg, th2_deg])
+        self._track_pose = list(angles)
+        self._draw_pose(angles)
 
 def main():
-    app = QApplication(sys.argv)
+    # Our own flags are parsed first; the rest is left for Qt
+    parser = argparse.ArgumentParser(description="Robotic arm simulator GUI")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="Time sampling, FK and drawing and write a JSON report on exit")
+    args, qt_args = parser.parse_known_args()
+    if args.profile:
+        profiling.enable()
+
+    app = QApplication(sys.argv[:1] + qt_args)
     win = ArmSimWindow()
     win.resize(900, 500)
     win.show()
-    sys.exit(app.exec())
+    status = app.exec()
+
+    if args.profile:
+        profiling.PROFILER.save(args.profile)
+        print(f"[info] Profile written to {args.profile}")
+    sys.exit(status)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
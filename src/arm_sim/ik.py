@@ -1,10 +1,20 @@
 import math
-from typing import Tuple
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
 
 # Helper to keep angles tidy (-180, 180)
 def wrap_deg(x: float) -> float:
     return ((x + 180.0) % 360.0) - 180.0
 
+def workspace_limits(link_lengths) -> Tuple[float, float]:
+    # Reachable annulus (r_min, r_max) of a planar chain.
+    # The arm can fold back to the origin unless one link outreaches all the others.
+    lengths = [float(L) for L in link_lengths]
+    r_max = sum(lengths)
+    r_min = max(0.0, 2.0 * max(lengths) - r_max) if lengths else 0.0
+    return r_min, r_max
+
 def clamp_target_to_workspace(
         x: float,
         y: float,
@@ -12,9 +22,27 @@ def clamp_target_to_workspace(
         L2: float,
 ) -> Tuple[float, float, bool]:
     
-    r = math.hypot(x, y)
     r_min = abs(L1 - L2)
     r_max = L1 + L2
+    return _clamp_to_annulus(x, y, r_min, r_max)
+
+def clamp_target_to_workspace_nlink(
+        x: float,
+        y: float,
+        link_lengths,
+) -> Tuple[float, float, bool]:
+
+    r_min, r_max = workspace_limits(link_lengths)
+    return _clamp_to_annulus(x, y, r_min, r_max)
+
+def _clamp_to_annulus(
+        x: float,
+        y: float,
+        r_min: float,
+        r_max: float,
+) -> Tuple[float, float, bool]:
+
+    r = math.hypot(x, y)
 
     was_clamped = False
     if r < 1e-12:
@@ -77,4 +105,291 @@ def ik_2link(
     if prefer == "elbow_down":
         return down
     return up
-    
+
+def ik_2link_nearest(
+        x: float,
+        y: float,
+        L1: float,
+        L2: float,
+        prev_deg: Sequence[float],
+) -> Tuple[float, float]:
+    # Branch closest to the previous pose (wrapped joint distance), so a
+    # continuously moving target never flips the elbow
+    up, down = ik_2link_all(x, y, L1, L2)
+    d_up = sum(wrap_deg(a - b) ** 2 for a, b in zip(up, prev_deg))
+    d_down = sum(wrap_deg(a - b) ** 2 for a, b in zip(down, prev_deg))
+    return up if d_up <= d_down else down
+
+
+# Batched (array) versions of the closed-form 2-link solver.
+# They mirror the scalar functions above element by element.
+
+class IK2LinkBatchResult(NamedTuple):
+    up: np.ndarray          # (K, 2) elbow-up solutions in degrees
+    down: np.ndarray        # (K, 2) elbow-down solutions in degrees
+    targets: np.ndarray     # (K, 2) targets actually solved (clamped if requested)
+    reachable: np.ndarray   # (K,) True where the original target lies in the workspace
+
+    def pick(self, prefer: str = "elbow_up") -> np.ndarray:
+        if prefer == "elbow_down":
+            return self.down
+        return self.up
+
+def _as_targets(targets) -> np.ndarray:
+    pts = np.asarray(targets, dtype=float)
+    if pts.ndim == 1:
+        pts = pts.reshape(1, -1)
+    if pts.ndim != 2 or pts.shape[1] != 2:
+        raise ValueError("targets must have shape (K, 2)")
+    return pts
+
+def clamp_target_to_workspace_batch(
+        targets,
+        L1: float,
+        L2: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+
+    return _clamp_to_annulus_batch(_as_targets(targets), abs(L1 - L2), L1 + L2)
+
+def clamp_target_to_workspace_nlink_batch(
+        targets,
+        link_lengths,
+) -> Tuple[np.ndarray, np.ndarray]:
+
+    r_min, r_max = workspace_limits(link_lengths)
+    return _clamp_to_annulus_batch(_as_targets(targets), r_min, r_max)
+
+def _clamp_to_annulus_batch(
+        pts: np.ndarray,
+        r_min: float,
+        r_max: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+
+    x = pts[:, 0]
+    y = pts[:, 1]
+
+    r = np.hypot(x, y)
+    r_new = np.clip(r, r_min, r_max)
+    was_clamped = np.abs(r_new - r) > 1e-9
+
+    # Targets at the origin keep orientation along +X (same as the scalar version)
+    at_origin = r < 1e-12
+    scale = np.divide(r_new, r, out=np.ones_like(r), where=~at_origin)
+
+    out = np.empty_like(pts)
+    out[:, 0] = np.where(at_origin, r_new, x * scale)
+    out[:, 1] = np.where(at_origin, 0.0, y * scale)
+    return out, was_clamped
+
+def ik_2link_all_batch(
+        targets,
+        L1: float,
+        L2: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+
+    pts = _as_targets(targets)
+    x = pts[:, 0]
+    y = pts[:, 1]
+
+    # Law of cosine for elbow, clamped against numeric drift
+    c2 = (x * x + y * y - L1 * L1 - L2 * L2) / (2.0 * L1 * L2)
+    th2_abs = np.arccos(np.clip(c2, -1.0, 1.0))
+
+    # Shoulder for both branches: +θ2 (down) and -θ2 (up)
+    base = np.arctan2(y, x)
+    k1 = L1 + L2 * np.cos(th2_abs)
+    k2 = L2 * np.sin(th2_abs)
+    th1_down = base - np.arctan2(k2, k1)
+    th1_up = base - np.arctan2(-k2, k1)
+
+    up = wrap_deg(np.degrees(np.stack((th1_up, -th2_abs), axis=-1)))
+    down = wrap_deg(np.degrees(np.stack((th1_down, th2_abs), axis=-1)))
+    return up, down
+
+def ik_2link_batch(
+        targets,
+        L1: float,
+        L2: float,
+        clamp: bool = False,
+) -> IK2LinkBatchResult:
+
+    pts = _as_targets(targets)
+    clamped, was_clamped = clamp_target_to_workspace_batch(pts, L1, L2)
+    if clamp:
+        pts = clamped
+
+    up, down = ik_2link_all_batch(pts, L1, L2)
+    return IK2LinkBatchResult(up, down, pts, ~was_clamped)
+
+
+# Numerical IK for arbitrary planar chains (damped least squares).
+# Every target is iterated in lockstep so K targets cost one set of array ops
+# per iteration; targets that have converged drop out of the active set.
+
+class IKNLinkBatchResult(NamedTuple):
+    angles: np.ndarray      # (K, N) joint angles in degrees, wrapped to [-180, 180)
+    error: np.ndarray       # (K,) final end effector distance to target
+    converged: np.ndarray   # (K,) True where error <= tol
+    iterations: np.ndarray  # (K,) iterations used per target
+
+_MAX_STEP_FRACTION = 0.2    # Largest Cartesian correction per iteration, relative to reach
+_MAX_JOINT_STEP = 0.3       # Radians
+
+def _default_seed(pts: np.ndarray, n_joints: int) -> np.ndarray:
+    # Point the first link at the target and bend the rest slightly,
+    # which keeps the chain away from the straight (singular) configuration
+    seed = np.full((pts.shape[0], n_joints), 20.0)
+    seed[:, 0] = np.degrees(np.arctan2(pts[:, 1], pts[:, 0]))
+    return seed
+
+def ik_nlink_batch(
+        link_lengths,
+        targets,
+        seed=None,
+        tol: float = 1e-4,
+        max_iter: int = 100,
+        damping: float = 0.05,
+) -> IKNLinkBatchResult:
+
+    lengths = np.asarray(link_lengths, dtype=float)
+    n = lengths.shape[0]
+    if n == 0:
+        raise ValueError("link_lengths must be non-empty")
+    pts = _as_targets(targets)
+    k = pts.shape[0]
+
+    # Warm start: a single pose is shared by all targets, or one pose per target
+    if seed is None:
+        q_deg = _default_seed(pts, n)
+    else:
+        q_deg = np.array(np.broadcast_to(np.asarray(seed, dtype=float), (k, n)))
+    q = np.radians(q_deg)
+
+    # Damping and maximum Cartesian step scaled to the arm size so behaviour
+    # does not depend on units; the step clamp keeps far targets from overshooting
+    reach = lengths.sum()
+    lam2 = (damping * reach) ** 2
+    max_step = _MAX_STEP_FRACTION * reach
+
+    error = np.full(k, np.inf)
+    iterations = np.zeros(k, dtype=int)
+    active = np.arange(k)
+
+    for it in range(max_iter + 1):
+        qa = q[active]
+        theta = np.cumsum(qa, axis=1)
+        dx = lengths * np.cos(theta)
+        dy = lengths * np.sin(theta)
+
+        ex = pts[active, 0] - dx.sum(axis=1)
+        ey = pts[active, 1] - dy.sum(axis=1)
+        err = np.hypot(ex, ey)
+        error[active] = err
+        iterations[active] = it
+
+        keep = err > tol
+        if it == max_iter or not keep.any():
+            break
+        active = active[keep]
+        dx, dy, ex, ey = dx[keep], dy[keep], ex[keep], ey[keep]
+
+        step = np.minimum(1.0, max_step / err[keep])
+        ex *= step
+        ey *= step
+
+        # Raise damping with the (clamped) error so a near-singular direction can
+        # never turn the step into a joint jump larger than _MAX_JOINT_STEP
+        lam2_k = np.maximum(lam2, (err[keep] * step / (2.0 * _MAX_JOINT_STEP)) ** 2)
+
+        # Jacobian of the end effector: joint i moves every link from i outward
+        jx = -np.cumsum(dy[:, ::-1], axis=1)[:, ::-1]
+        jy = np.cumsum(dx[:, ::-1], axis=1)[:, ::-1]
+
+        # dq = J^T (J J^T + λ² I)^-1 e, with the 2x2 inverse written out
+        a = (jx * jx).sum(axis=1) + lam2_k
+        b = (jx * jy).sum(axis=1)
+        c = (jy * jy).sum(axis=1) + lam2_k
+        det = a * c - b * b
+        wx = (c * ex - b * ey) / det
+        wy = (a * ey - b * ex) / det
+        q[active] += jx * wx[:, None] + jy * wy[:, None]
+
+    angles = wrap_deg(np.degrees(q))
+    return IKNLinkBatchResult(angles, error, error <= tol, iterations)
+
+def ik_nlink(
+        x: float,
+        y: float,
+        link_lengths,
+        seed=None,
+        tol: float = 1e-4,
+        max_iter: int = 100,
+        damping: float = 0.05,
+) -> Tuple[list[float], bool]:
+
+    # Same iteration as ik_nlink_batch for a single target, written with plain
+    # floats: for one target at a time (tracking) this avoids NumPy call overhead
+    lengths = [float(L) for L in link_lengths]
+    n = len(lengths)
+    if n == 0:
+        raise ValueError("link_lengths must be non-empty")
+
+    if seed is None:
+        q = [math.radians(20.0)] * n
+        q[0] = math.atan2(y, x)
+    else:
+        q = [math.radians(float(a)) for a in seed]
+        if len(q) != n:
+            raise ValueError("seed must have one angle per link")
+
+    reach = sum(lengths)
+    lam2 = (damping * reach) ** 2
+    max_step = _MAX_STEP_FRACTION * reach
+
+    err = math.inf
+    for it in range(max_iter + 1):
+        # Link vectors from the cumulative angle
+        theta = 0.0
+        dx = [0.0] * n
+        dy = [0.0] * n
+        for i in range(n):
+            theta += q[i]
+            dx[i] = lengths[i] * math.cos(theta)
+            dy[i] = lengths[i] * math.sin(theta)
+
+        ex = x - sum(dx)
+        ey = y - sum(dy)
+        err = math.hypot(ex, ey)
+        if err <= tol or it == max_iter:
+            break
+
+        step = min(1.0, max_step / err)
+        ex *= step
+        ey *= step
+        lam2_k = max(lam2, (err * step / (2.0 * _MAX_JOINT_STEP)) ** 2)
+
+        # Jacobian columns as suffix sums, accumulated from the tip inward
+        jx = [0.0] * n
+        jy = [0.0] * n
+        sx = sy = 0.0
+        for i in range(n - 1, -1, -1):
+            sx += dx[i]
+            sy += dy[i]
+            jx[i] = -sy
+            jy[i] = sx
+
+        a = lam2_k
+        b = 0.0
+        c = lam2_k
+        for i in range(n):
+            a += jx[i] * jx[i]
+            b += jx[i] * jy[i]
+            c += jy[i] * jy[i]
+        det = a * c - b * b
+        wx = (c * ex - b * ey) / det
+        wy = (a * ey - b * ex) / det
+        for i in range(n):
+            q[i] += jx[i] * wx + jy[i] * wy
+
+    angles = [wrap_deg(math.degrees(a)) for a in q]
+    return angles, err <= tol
@@ -0,0 +1,321 @@
+import hashlib
+import math
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.ik import (
+    ik_2link,
+    ik_2link_all_batch,
+    ik_2link_batch,
+    ik_nlink,
+    ik_nlink_batch,
+    workspace_limits,
+)
+
+# Workspace-grid IK cache.
+# Both elbow branches are solved once on a regular grid over the workspace and
+# stored as (cos, sin) per joint, so bilinear blending never has to deal with
+# the ±180° wrap. A query blends the four surrounding nodes and checks the FK
+# residual against the table tolerance. Cells near singularities, outside the
+# grid, or over the error bound fall back to the exact solver: closed form for
+# 2 links, and for longer chains the numerical solver warm-started from the
+# blended pose (so a miss still costs only a couple of iterations).
+
+_BRANCHES = ("elbow_up", "elbow_down")
+_FORMAT_VERSION = 1
+_BRANCH_BEND_DEG = 30.0     # Seed bend that selects a branch for N-link arms
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "arm_sim"
+
+def _table_key(link_lengths, resolution: int, tol: float) -> str:
+    # Exact float reprs so nearly-equal link sets never share a table
+    links = ":".join(repr(float(L)) for L in link_lengths)
+    raw = f"v{_FORMAT_VERSION}:{links}:{int(resolution)}:{float(tol)!r}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def _branch_index(prefer: str) -> int:
+    return _BRANCHES.index(prefer) if prefer in _BRANCHES else 0
+
+def _branch_seed(pts: np.ndarray, n_joints: int, branch: int) -> np.ndarray:
+    # Elbow-up bends every joint negative, elbow-down positive
+    bend = -_BRANCH_BEND_DEG if branch == 0 else _BRANCH_BEND_DEG
+    seed = np.full((pts.shape[0], n_joints), bend)
+    seed[:, 0] = np.degrees(np.arctan2(pts[:, 1], pts[:, 0])) - bend * (n_joints - 1) / 2.0
+    return seed
+
+class IKLookupTable:
+
+    def __init__(
+            self,
+            link_lengths,
+            resolution: int = 201,
+            tol: float = 1e-3,
+            singular_margin: float = 0.05,
+    ):
+        if resolution < 2:
+            raise ValueError("resolution must be at least 2")
+        self.link_lengths = [float(L) for L in link_lengths]
+        if not self.link_lengths:
+            raise ValueError("link_lengths must be non-empty")
+        self.resolution = int(resolution)
+        self.tol = float(tol)
+        self.singular_margin = float(singular_margin)
+        self._init_geometry()
+        self._build()
+
+    def _init_geometry(self):
+        self.n_joints = len(self.link_lengths)
+        self.extent = sum(self.link_lengths)
+        self.step = 2.0 * self.extent / (self.resolution - 1)
+        # Query statistics (table hits vs exact fallbacks)
+        self.hits = 0
+        self.fallbacks = 0
+
+    # Construction
+
+    def _solve_grid(self, grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Solutions for every node and branch: (n, n, branch, joint) degrees, and (n, n) reachable
+        n = self.resolution
+        if self.n_joints == 2:
+            gx, gy = np.meshgrid(grid, grid, indexing="ij")
+            targets = np.stack((gx.ravel(), gy.ravel()), axis=-1)
+            L1, L2 = self.link_lengths
+            res = ik_2link_batch(targets, L1, L2)
+            angles = np.stack((res.up, res.down), axis=1).reshape(n, n, 2, 2)
+            return angles, res.reachable.reshape(n, n)
+
+        # Redundant chains: sweep row by row, warm-starting each row from the
+        # previous one so neighbouring nodes stay on the same solution family
+        angles = np.empty((n, n, 2, self.n_joints))
+        reachable = np.zeros((n, n), dtype=bool)
+        for b in range(2):
+            prev = None
+            for i, x in enumerate(grid):
+                row = np.stack((np.full(n, x), grid), axis=-1)
+                seed = _branch_seed(row, self.n_joints, b)
+                if prev is not None:
+                    seed[prev.converged] = prev.angles[prev.converged]
+                prev = ik_nlink_batch(self.link_lengths, row, seed=seed, tol=0.1 * self.tol)
+                angles[i, :, b] = prev.angles
+                reachable[i] |= prev.converged
+        return angles, reachable
+
+    def _build(self):
+        n = self.resolution
+        grid = np.linspace(-self.extent, self.extent, n)
+        angles, reachable = self._solve_grid(grid)
+
+        # (n, n, branch, joint, cos/sin)
+        rad = np.radians(angles)
+        self.table = np.stack((np.cos(rad), np.sin(rad)), axis=-1)
+
+        # Nodes usable for interpolation: reachable and away from singular poses,
+        # where the solution changes fastest. Manipulability sqrt(det(J J^T)) is
+        # compared against its best value (L1*L2 at a right-angle elbow for 2 links)
+        self.cell_seed = (reachable[:-1, :-1] & reachable[1:, :-1]
+                          & reachable[:-1, 1:] & reachable[1:, 1:])
+        node_ok = reachable.copy()
+        for b in range(2):
+            w = self._manipulability(angles[:, :, b].reshape(-1, self.n_joints)).reshape(n, n)
+            w_best = w[reachable].max() if reachable.any() else 1.0
+            node_ok &= w > self.singular_margin * w_best
+        cell_ok = node_ok[:-1, :-1] & node_ok[1:, :-1] & node_ok[:-1, 1:] & node_ok[1:, 1:]
+
+        # Error bound: reject cells whose centre already misses by more than tol
+        ci, cj = np.nonzero(cell_ok)
+        if ci.size:
+            centres = np.stack((grid[ci] + 0.5 * self.step, grid[cj] + 0.5 * self.step), axis=-1)
+            half = np.full(ci.size, 0.5)
+            for b in range(2):
+                blended = self._blend(ci, cj, half, half, b)
+                err = np.hypot(*(forward_kinematics_batch(self.link_lengths, blended, True) - centres).T)
+                cell_ok[ci[err > self.tol], cj[err > self.tol]] = False
+        self.cell_ok = cell_ok
+
+    def _manipulability(self, angles: np.ndarray) -> np.ndarray:
+        # Jacobian columns are the end effector offset from each joint, rotated 90°
+        pos = forward_kinematics_batch(self.link_lengths, angles)
+        r = pos[:, -1:, :] - pos[:, :-1, :]
+        jx = -r[..., 1]
+        jy = r[..., 0]
+        a = (jx * jx).sum(axis=1)
+        b = (jx * jy).sum(axis=1)
+        c = (jy * jy).sum(axis=1)
+        return np.sqrt(np.maximum(a * c - b * b, 0.0))
+
+    def _blend(self, i, j, fx, fy, branch: int) -> np.ndarray:
+        # Bilinear blend of (cos, sin) at the four corners, back to degrees: (K, N)
+        t = self.table
+        w00 = ((1 - fx) * (1 - fy))[:, None, None]
+        w10 = (fx * (1 - fy))[:, None, None]
+        w01 = ((1 - fx) * fy)[:, None, None]
+        w11 = (fx * fy)[:, None, None]
+        cs = (w00 * t[i, j, branch] + w10 * t[i + 1, j, branch]
+              + w01 * t[i, j + 1, branch] + w11 * t[i + 1, j + 1, branch])
+        return np.degrees(np.arctan2(cs[..., 1], cs[..., 0]))
+
+    # Queries
+
+    def _locate(self, x: float, y: float) -> Optional[Tuple[int, int, float, float]]:
+        # Cell containing (x, y) if all four corners hold a solution
+        gx = (x + self.extent) / self.step
+        gy = (y + self.extent) / self.step
+        if gx < 0 or gy < 0:
+            return None
+        i = int(gx)
+        j = int(gy)
+        if i >= self.resolution - 1 or j >= self.resolution - 1 or not self.cell_seed[i, j]:
+            return None
+        return i, j, gx - i, gy - j
+
+    def query(self, x: float, y: float, prefer: str = "elbow_up") -> list[float]:
+        # Same answer as ik_2link / ik_nlink to within tol, in constant time for table hits.
+        # For 2 links the closed form is cheaper than any blend, so scalar
+        # queries go straight to it (query_batch still uses the table).
+        if self.n_joints == 2:
+            self.fallbacks += 1
+            L1, L2 = self.link_lengths
+            return list(ik_2link(x, y, L1, L2, prefer=prefer))
+
+        b = _branch_index(prefer)
+        blended = None
+        loc = self._locate(x, y)
+        if loc is not None:
+            # Bilinear blend of the four corners with plain floats; near-singular
+            # cells still use it as a warm start
+            i, j, fx, fy = loc
+            c00, c01 = self.table[i, j:j + 2, b].tolist()
+            c10, c11 = self.table[i + 1, j:j + 2, b].tolist()
+            w00, w01 = (1 - fx) * (1 - fy), (1 - fx) * fy
+            w10, w11 = fx * (1 - fy), fx * fy
+            blended = []
+            theta = px = py = 0.0
+            for length, a, b_, c, d in zip(self.link_lengths, c00, c01, c10, c11):
+                co = w00 * a[0] + w01 * b_[0] + w10 * c[0] + w11 * d[0]
+                s = w00 * a[1] + w01 * b_[1] + w10 * c[1] + w11 * d[1]
+                angle = math.atan2(s, co)
+                blended.append(math.degrees(angle))
+                # FK residual along the way
+                theta += angle
+                px += length * math.cos(theta)
+                py += length * math.sin(theta)
+            if self.cell_ok[i, j] and math.hypot(px - x, py - y) <= self.tol:
+                self.hits += 1
+                return blended
+
+        self.fallbacks += 1
+        if blended is None:
+            blended = _branch_seed(np.array([[x, y]]), self.n_joints, b)[0]
+        angles, _ = ik_nlink(x, y, self.link_lengths, seed=blended)
+        return angles
+
+    def query_batch(self, targets, prefer: str = "elbow_up") -> np.ndarray:
+        # Vectorized query for a (K, 2) target array; returns (K, N) degrees
+        pts = np.asarray(targets, dtype=float).reshape(-1, 2)
+        b = _branch_index(prefer)
+
+        gx = (pts[:, 0] + self.extent) / self.step
+        gy = (pts[:, 1] + self.extent) / self.step
+        i = np.floor(gx).astype(int)
+        j = np.floor(gy).astype(int)
+        inside = (i >= 0) & (j >= 0) & (i < self.resolution - 1) & (j < self.resolution - 1)
+        seeded = np.zeros(len(pts), dtype=bool)
+        seeded[inside] = self.cell_seed[i[inside], j[inside]]
+        ok = np.zeros(len(pts), dtype=bool)
+        ok[inside] = self.cell_ok[i[inside], j[inside]]
+
+        # Blend wherever the corners hold solutions; only trusted cells can be hits,
+        # the rest use the blend as a warm start
+        out = _branch_seed(pts, self.n_joints, b)
+        idx = np.nonzero(seeded)[0]
+        if idx.size:
+            out[idx] = self._blend(i[idx], j[idx], gx[idx] - i[idx], gy[idx] - j[idx], b)
+            err = np.hypot(*(forward_kinematics_batch(self.link_lengths, out[idx], True) - pts[idx]).T)
+            ok[idx[err > self.tol]] = False
+
+        miss = ~ok
+        if miss.any():
+            if self.n_joints == 2:
+                L1, L2 = self.link_lengths
+                up, down = ik_2link_all_batch(pts[miss], L1, L2)
+                out[miss] = down if b == 1 else up
+            else:
+                out[miss] = ik_nlink_batch(self.link_lengths, pts[miss], seed=out[miss]).angles
+
+        self.hits += int(ok.sum())
+        self.fallbacks += int(miss.sum())
+        return out
+
+    def workspace_limits(self) -> Tuple[float, float]:
+        return workspace_limits(self.link_lengths)
+
+    # Persistence
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            version=_FORMAT_VERSION,
+            link_lengths=np.array(self.link_lengths),
+            params=np.array([self.resolution, self.tol, self.singular_margin]),
+            table=self.table,
+            cell_ok=self.cell_ok,
+            cell_seed=self.cell_seed,
+        )
+
+    @classmethod
+    def load(cls, path) -> "IKLookupTable":
+        with np.load(path) as data:
+            if int(data["version"]) != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported IK table version in {path}")
+            resolution, tol, margin = data["params"]
+            obj = cls.__new__(cls)
+            obj.link_lengths = [float(L) for L in data["link_lengths"]]
+            obj.resolution = int(resolution)
+            obj.tol = float(tol)
+            obj.singular_margin = float(margin)
+            obj._init_geometry()
+            obj.table = data["table"]
+            obj.cell_ok = data["cell_ok"]
+            obj.cell_seed = data["cell_seed"]
+        return obj
+
+    @classmethod
+    def for_links(cls, link_lengths, **kwargs) -> Optional["IKLookupTable"]:
+        # Table to use for interactive/CLI targeting, or None where it cannot
+        # help: scalar 2-link queries always use the closed form, so no table
+        # is built or persisted for them
+        if len(link_lengths) == 2:
+            return None
+        return cls.load_or_build(link_lengths, **kwargs)
+
+    @classmethod
+    def load_or_build(
+            cls,
+            link_lengths,
+            resolution: int = 201,
+            tol: float = 1e-3,
+            cache_dir=None,
+    ) -> "IKLookupTable":
+        # Reuse a table persisted for the same link lengths, building it on first use
+        cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        path = cache_dir / f"ik_table_{_table_key(link_lengths, resolution, tol)}.npz"
+        if path.exists():
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[info] Rebuilding IK table, could not load {path}: {e}", file=sys.stderr)
+
+        table = cls(link_lengths, resolution=resolution, tol=tol)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            table.save(path)
+        except OSError as e:
+            print(f"[info] Could not persist IK table to {path}: {e}", file=sys.stderr)
+        return table
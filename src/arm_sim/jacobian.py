@@ -0,0 +1,190 @@
+import hashlib
+import sys
+from pathlib import Path
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from arm_sim.ik import ik_2link_batch, ik_nlink_batch, workspace_limits
+from arm_sim.ik_cache import _BRANCHES, _branch_seed, default_cache_dir
+
+# Analytic end-effector Jacobians and the dexterity measures derived from them.
+#
+# For a planar chain, joint i moves the end effector perpendicular to the
+# vector from joint i to the tip, so column i of J is that vector rotated by
+# 90°. With absolute link angles theta_k these are suffix sums over the links:
+#   J[0, i] = -sum_{k >= i} L_k sin(theta_k)
+#   J[1, i] =  sum_{k >= i} L_k cos(theta_k)
+# Everything works on (M, N) pose arrays. J is per radian of joint motion.
+# Every derived measure comes from the 2x2 matrix J J^T in closed form, so
+# no SVD is needed.
+
+_FORMAT_VERSION = 1
+
+def jacobian_batch(link_lengths, joint_angles_deg) -> np.ndarray:
+    # (M, 2, N) Jacobians for (M, N) poses (a single (N,) pose gives (2, N)).
+    # link_lengths may be (N,) or (M, N), as in forward_kinematics_batch.
+    lengths = np.asarray(link_lengths, dtype=float)
+    angles = np.asarray(joint_angles_deg, dtype=float)
+    single = angles.ndim == 1
+    if single:
+        angles = angles[np.newaxis, :]
+    if angles.ndim != 2 or angles.shape[1] != lengths.shape[-1]:
+        raise ValueError("joint_angles_deg must have shape (M, N) with N == len(link_lengths)")
+
+    theta = np.cumsum(np.radians(angles), axis=1)
+    dx = lengths * np.cos(theta)
+    dy = lengths * np.sin(theta)
+    jac = np.empty((angles.shape[0], 2, angles.shape[1]))
+    jac[:, 0] = -np.cumsum(dy[:, ::-1], axis=1)[:, ::-1]
+    jac[:, 1] = np.cumsum(dx[:, ::-1], axis=1)[:, ::-1]
+    return jac[0] if single else jac
+
+class PoseMetrics(NamedTuple):
+    manipulability: np.ndarray  # sqrt(det(J J^T)), 0 at a singularity
+    condition: np.ndarray       # sigma_max / sigma_min, inf at a singularity
+    sigma_min: np.ndarray       # Smallest singular value (slowest Cartesian direction)
+    sigma_max: np.ndarray
+
+def jacobian_metrics(jac: np.ndarray) -> PoseMetrics:
+    # Closed form from J J^T = [[a, b], [b, c]]: the squared singular values are
+    # its eigenvalues (a + c) / 2 ± sqrt(((a - c) / 2)² + b²)
+    jx = jac[..., 0, :]
+    jy = jac[..., 1, :]
+    a = (jx * jx).sum(axis=-1)
+    b = (jx * jy).sum(axis=-1)
+    c = (jy * jy).sum(axis=-1)
+    mean = 0.5 * (a + c)
+    spread = np.hypot(0.5 * (a - c), b)
+    s_max = np.sqrt(mean + spread)
+    s_min = np.sqrt(np.maximum(mean - spread, 0.0))
+    manip = np.sqrt(np.maximum(a * c - b * b, 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cond = np.where(s_min > 1e-12 * np.maximum(s_max, 1e-300), s_max / s_min, np.inf)
+    return PoseMetrics(manip, cond, s_min, s_max)
+
+def pose_metrics(link_lengths, joint_angles_deg) -> PoseMetrics:
+    return jacobian_metrics(jacobian_batch(link_lengths, joint_angles_deg))
+
+def near_singular(link_lengths, joint_angles_deg, threshold: float = 0.05) -> np.ndarray:
+    # True for poses whose smallest singular value is below threshold times
+    # the total reach, i.e. the tip can barely move in some direction
+    reach = float(np.sum(link_lengths))
+    return pose_metrics(link_lengths, joint_angles_deg).sigma_min < threshold * reach
+
+def _map_key(link_lengths, resolution: int) -> str:
+    links = ":".join(repr(float(L)) for L in link_lengths)
+    raw = f"v{_FORMAT_VERSION}:{links}:{int(resolution)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class WorkspaceMap:
+    # Manipulability and condition number over a square grid covering the
+    # workspace, for the IK solution of each branch at every node. Nodes
+    # the arm cannot reach (or, for N links, where IK did not converge) are
+    # NaN. Built once per link configuration and persisted like the IK table.
+
+    def __init__(self, link_lengths, resolution: int = 121):
+        if resolution < 2:
+            raise ValueError("resolution must be at least 2")
+        self.link_lengths = [float(L) for L in link_lengths]
+        if not self.link_lengths:
+            raise ValueError("link_lengths must be non-empty")
+        self.resolution = int(resolution)
+        self.extent = sum(self.link_lengths)
+        self._build()
+
+    def _build(self):
+        n = self.resolution
+        grid = np.linspace(-self.extent, self.extent, n)
+        gx, gy = np.meshgrid(grid, grid, indexing="ij")
+        targets = np.stack((gx.ravel(), gy.ravel()), axis=-1)
+        r = np.hypot(targets[:, 0], targets[:, 1])
+        r_min, r_max = workspace_limits(self.link_lengths)
+        inside = (r >= r_min) & (r <= r_max)
+
+        # (branch, n, n)
+        self.manipulability = np.full((2, n, n), np.nan)
+        self.condition = np.full((2, n, n), np.nan)
+        for b in range(2):
+            if len(self.link_lengths) == 2:
+                L1, L2 = self.link_lengths
+                res = ik_2link_batch(targets, L1, L2)
+                angles = res.down if b == 1 else res.up
+                ok = inside
+            else:
+                res = ik_nlink_batch(self.link_lengths, targets,
+                                     seed=_branch_seed(targets, len(self.link_lengths), b), tol=1e-3)
+                angles, ok = res.angles, inside & res.converged
+            m = pose_metrics(self.link_lengths, angles)
+            self.manipulability[b] = np.where(ok, m.manipulability, np.nan).reshape(n, n)
+            self.condition[b] = np.where(ok, m.condition, np.nan).reshape(n, n)
+
+    def extent_box(self) -> Tuple[float, float, float, float]:
+        # (left, right, bottom, top) for imshow
+        half = self.extent / (self.resolution - 1)
+        return (-self.extent - half, self.extent + half, -self.extent - half, self.extent + half)
+
+    def image(self, prefer: str = "elbow_up", normalize: bool = True) -> np.ndarray:
+        # (n, n) manipulability laid out for imshow(origin="lower"), scaled to [0, 1]
+        b = _BRANCHES.index(prefer) if prefer in _BRANCHES else 0
+        img = self.manipulability[b].T
+        if normalize:
+            peak = np.nanmax(self.manipulability) if np.isfinite(self.manipulability).any() else 1.0
+            img = img / peak
+        return img
+
+    def lookup(self, points, prefer: str = "elbow_up", which: str = "manipulability") -> np.ndarray:
+        # Nearest-node value for (K, 2) Cartesian points (NaN outside the grid)
+        pts = np.asarray(points, dtype=float).reshape(-1, 2)
+        b = _BRANCHES.index(prefer) if prefer in _BRANCHES else 0
+        values = getattr(self, which)[b]
+        step = 2.0 * self.extent / (self.resolution - 1)
+        idx = np.rint((pts + self.extent) / step).astype(int)
+        ok = ((idx >= 0) & (idx < self.resolution)).all(axis=1)
+        out = np.full(len(pts), np.nan)
+        out[ok] = values[idx[ok, 0], idx[ok, 1]]
+        return out
+
+    # Persistence
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            version=_FORMAT_VERSION,
+            link_lengths=np.array(self.link_lengths),
+            resolution=self.resolution,
+            manipulability=self.manipulability,
+            condition=self.condition,
+        )
+
+    @classmethod
+    def load(cls, path) -> "WorkspaceMap":
+        with np.load(path) as data:
+            if int(data["version"]) != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported workspace map version in {path}")
+            obj = cls.__new__(cls)
+            obj.link_lengths = [float(L) for L in data["link_lengths"]]
+            obj.resolution = int(data["resolution"])
+            obj.extent = sum(obj.link_lengths)
+            obj.manipulability = data["manipulability"]
+            obj.condition = data["condition"]
+        return obj
+
+    @classmethod
+    def load_or_build(cls, link_lengths, resolution: int = 121, cache_dir=None) -> "WorkspaceMap":
+        # Reuse a map persisted for the same link lengths, building it on first use
+        cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        path = cache_dir / f"workspace_map_{_map_key(link_lengths, resolution)}.npz"
+        if path.exists():
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[info] Rebuilding workspace map, could not load {path}: {e}", file=sys.stderr)
+
+        wmap = cls(link_lengths, resolution=resolution)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            wmap.save(path)
+        except OSError as e:
+            print(f"[info] Could not persist workspace map to {path}: {e}", file=sys.stderr)
+        return wmap
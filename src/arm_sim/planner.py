@@ -1,4 +1,7 @@
 import math
+from functools import lru_cache
+
+import numpy as np
 
 def wrap_to_minus180_180(x_deg):
     return ((x_deg + 180.0) % 360.0) - 180.0
@@ -42,4 +45,50 @@ def interpolate_joint_space(
         # Interpolate each joint
         frame = [s0 + s * d for s0, d in zip(start_deg, deltas)]
         frames.append(frame)
-    return frames
\ No newline at end of file
+    return frames
+
+
+# Vectorized easing: same curves as ease(), evaluated over a whole array
+def ease_array(progress, mode: str = "linear") -> np.ndarray:
+    p = np.clip(np.asarray(progress, dtype=float), 0.0, 1.0)
+    if mode == "cosine":
+        return 0.5 - 0.5 * np.cos(np.pi * p)
+    if mode == "smoothstep":
+        return (3 * p**2) - (2 * p**3)
+    return p    # Linear and fallback
+
+@lru_cache(maxsize=128)
+def ease_profile(n_steps: int, mode: str = "linear") -> np.ndarray:
+    # Eased progress for frames 0..n_steps, computed once per (n_steps, mode)
+    # and shared by every call; read-only so the cached copy cannot be modified
+    profile = ease_array(np.arange(n_steps + 1) / n_steps, mode)
+    profile.setflags(write=False)
+    return profile
+
+def interpolate_joint_space_batch(
+    start_deg,
+    end_deg,
+    duration_s: float = 3.0,
+    fps: int = 30,
+    easing: str = "linear",
+    ) -> np.ndarray:
+
+    # P moves at once: start_deg/end_deg are (P, J) arrays, result is (P, F, J)
+    starts = np.asarray(start_deg, dtype=float)
+    ends = np.asarray(end_deg, dtype=float)
+    if starts.ndim == 1:
+        starts = starts[np.newaxis, :]
+    if ends.ndim == 1:
+        ends = ends[np.newaxis, :]
+    if starts.shape != ends.shape or starts.ndim != 2 or starts.shape[1] == 0:
+        raise ValueError("start_deg and end_deg must be non-empty (P, J) arrays of the same shape")
+
+    # Number of frames in motion
+    N = max(1, int(round(duration_s * fps)))
+
+    # Shortest-path angular deltas, same wrap as wrap_to_minus180_180
+    deltas = wrap_to_minus180_180(ends - starts)
+
+    # (1, F, 1) * (P, 1, J) + (P, 1, J)
+    s = ease_profile(N, easing)[np.newaxis, :, np.newaxis]
+    return starts[:, np.newaxis, :] + s * deltas[:, np.newaxis, :]
@@ -1,8 +1,11 @@
 import matplotlib.pyplot as plt
+import numpy as np
 
 def plot_arm(joint_positions, title = "Arm Pose"):
-    xs = [p[0] for p in joint_positions]
-    ys = [p[1] for p in joint_positions]
+    # Accepts a list of (x, y) tuples or an (N+1, 2) array from forward_kinematics_batch
+    pts = np.asarray(joint_positions, dtype = float)
+    xs = pts[:, 0]
+    ys = pts[:, 1]
 
     plt.figure()
     plt.plot(xs, ys, "-o", color = "blue", linewidth = 2, markersize = 6)
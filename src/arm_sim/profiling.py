@@ -0,0 +1,179 @@
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List
+
+# Lightweight timing instrumentation.
+#
+#   from arm_sim import profiling
+#   with profiling.span("ik"):
+#       ...
+#   profiling.frame(seconds)           # one entry in the frame-time histogram
+#
+# Everything records into the module-level PROFILER, which starts disabled.
+# While disabled, span() returns a shared no-op context manager and frame()
+# returns straight away, so the instrumented code costs one attribute check.
+# Durations go into fixed log-spaced histograms (10 µs .. 10 s), so memory
+# stays constant however long a GUI session runs.
+
+_EDGES_PER_DECADE = 10
+_MIN_EXP = -5       # 10 µs
+_MAX_EXP = 1        # 10 s
+BUCKET_EDGES = [10.0 ** (_MIN_EXP + k / _EDGES_PER_DECADE)
+                for k in range((_MAX_EXP - _MIN_EXP) * _EDGES_PER_DECADE + 1)]
+
+class Histogram:
+    # Count/total/min/max plus bucket counts; bucket k holds durations up to
+    # BUCKET_EDGES[k], the last bucket everything longer
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BUCKET_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        # Upper edge of the bucket holding the q-th percentile, capped by max
+        if self.count == 0:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for k, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                edge = BUCKET_EDGES[k] if k < len(BUCKET_EDGES) else self.max
+                return min(edge, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_ms": self.total / self.count * 1e3,
+            "min_ms": self.min * 1e3,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p90_ms": self.percentile(90) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+    def buckets(self) -> List[Dict[str, float]]:
+        # Non-empty buckets only, as [upper edge in ms, count]
+        out = []
+        for k, c in enumerate(self.counts):
+            if c:
+                upper = BUCKET_EDGES[k] * 1e3 if k < len(BUCKET_EDGES) else float("inf")
+                out.append({"le_ms": upper, "count": c})
+        return out
+
+class _Span:
+    __slots__ = ("_hist", "_t0")
+
+    def __init__(self, hist: Histogram):
+        self._hist = hist
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._hist.add(time.perf_counter() - self._t0)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Profiler:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.spans: Dict[str, Histogram] = {}
+        self.frames = Histogram()
+        self._t_start = time.perf_counter()
+
+    def reset(self):
+        self.spans.clear()
+        self.frames = Histogram()
+        self._t_start = time.perf_counter()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        hist = self.spans.get(name)
+        if hist is None:
+            hist = self.spans[name] = Histogram()
+        return _Span(hist)
+
+    def record(self, name: str, seconds: float):
+        # For stages timed by the caller (e.g. across callbacks)
+        if not self.enabled:
+            return
+        hist = self.spans.get(name)
+        if hist is None:
+            hist = self.spans[name] = Histogram()
+        hist.add(seconds)
+
+    def frame(self, seconds: float):
+        if self.enabled:
+            self.frames.add(seconds)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "wall_s": time.perf_counter() - self._t_start,
+            "spans": {name: h.summary() for name, h in self.spans.items()},
+            "frames": dict(self.frames.summary(), histogram=self.frames.buckets()),
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def format_table(self) -> str:
+        lines = [f"{'stage':<16} {'count':>7} {'total ms':>10} {'mean ms':>9} {'p90 ms':>9} {'max ms':>9}"]
+        rows = list(self.spans.items())
+        if self.frames.count:
+            rows.append(("frame", self.frames))
+        for name, h in rows:
+            s = h.summary()
+            lines.append(f"{name:<16} {s['count']:>7} {s['total_ms']:>10.2f} {s['mean_ms']:>9.3f} "
+                         f"{s['p90_ms']:>9.3f} {s['max_ms']:>9.3f}")
+        return "\n".join(lines)
+
+PROFILER = Profiler()
+
+def span(name: str):
+    return PROFILER.span(name)
+
+def record(name: str, seconds: float):
+    PROFILER.record(name, seconds)
+
+def frame(seconds: float):
+    PROFILER.frame(seconds)
+
+def enable(enabled: bool = True) -> Profiler:
+    PROFILER.enabled = enabled
+    if enabled:
+        PROFILER.reset()
+    return PROFILER
+
+def is_enabled() -> bool:
+    return PROFILER.enabled
@@ -0,0 +1,348 @@
+import hashlib
+import heapq
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from arm_sim.collision import ObstacleSet, collision_free
+from arm_sim.ik_cache import default_cache_dir
+from arm_sim.planner import wrap_to_minus180_180
+from arm_sim.trajectory import JointTrajectory
+
+# Sampling-based (PRM) joint-space planner with a persisted roadmap.
+# Collision-free joint configurations are sampled once for a given arm and
+# obstacle set, each is linked to its k nearest neighbours (measured in the
+# (cos, sin) embedding of the angles, so the ±180° wrap needs no special
+# casing), and all candidate edges are validated in one batched collision pass
+# along the shortest angular path. The roadmap is cached on disk keyed by the
+# links, obstacles and build parameters; a query then only connects start and
+# goal to nearby nodes, runs Dijkstra and shortcuts the result.
+
+_FORMAT_VERSION = 1
+_EDGE_CHUNK = 200_000       # Interpolated configurations per collision pass
+_MAX_SAMPLE_ROUNDS = 50
+
+def _embed(q_deg) -> np.ndarray:
+    r = np.radians(np.asarray(q_deg, dtype=float))
+    return np.concatenate([np.cos(r), np.sin(r)], axis=-1)
+
+def _roadmap_key(link_lengths, obstacles, link_radius, n_samples, k, step_deg, self_collision, seed) -> str:
+    links = ":".join(repr(float(L)) for L in link_lengths)
+    obs = json.dumps(obstacles or [], sort_keys=True)
+    raw = (f"v{_FORMAT_VERSION}:{links}:{obs}:{float(link_radius)!r}:{int(n_samples)}:{int(k)}:"
+           f"{float(step_deg)!r}:{int(bool(self_collision))}:{int(seed)}")
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class NearestNeighbors:
+    # k-nearest-neighbour search over an (n, d) point array by blocked
+    # vectorized distance scans. At roadmap sizes (10^3-10^4 nodes, 2 x joints
+    # embedded dimensions) this beats a Python-level KD-tree traversal several
+    # times over, and the all-pairs graph build is a handful of matrix ops.
+
+    def __init__(self, points, block: int = 1024):
+        self.points = np.asarray(points, dtype=float)
+        self.block = int(block)
+        self._sq = (self.points ** 2).sum(axis=1)
+
+    def query(self, x, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        # k nearest points to x: (distances, indices), nearest first
+        d, i = self.query_batch(np.asarray(x, dtype=float)[np.newaxis], k)
+        return d[0], i[0]
+
+    def query_batch(self, xs, k: int = 1, exclude_self: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        # (m, k) distances and indices for each row of xs. exclude_self drops
+        # the point itself when xs is the indexed point set.
+        xs = np.asarray(xs, dtype=float)
+        n = self.points.shape[0]
+        k = min(int(k), n - 1 if exclude_self else n)
+        m = xs.shape[0]
+        if k <= 0:
+            return np.zeros((m, 0)), np.zeros((m, 0), dtype=np.int64)
+
+        out_d = np.empty((m, k))
+        out_i = np.empty((m, k), dtype=np.int64)
+        for r0 in range(0, m, self.block):
+            x = xs[r0:r0 + self.block]
+            d2 = (x ** 2).sum(axis=1)[:, np.newaxis] + self._sq[np.newaxis] - 2.0 * x @ self.points.T
+            if exclude_self:
+                rows = np.arange(x.shape[0])
+                d2[rows, r0 + rows] = np.inf
+            idx = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            part = np.take_along_axis(d2, idx, axis=1)
+            order = np.argsort(part, axis=1)
+            out_i[r0:r0 + x.shape[0]] = np.take_along_axis(idx, order, axis=1)
+            out_d[r0:r0 + x.shape[0]] = np.sqrt(np.maximum(np.take_along_axis(part, order, axis=1), 0.0))
+        return out_d, out_i
+
+class Roadmap:
+    def __init__(
+            self,
+            link_lengths: Sequence[float],
+            obstacles: Optional[Sequence[Dict[str, Any]]] = None,
+            link_radius: float = 0.0,
+            n_samples: int = 1000,
+            k: int = 10,
+            step_deg: float = 2.0,
+            self_collision: bool = True,
+            seed: int = 0,
+    ):
+        self.link_lengths = [float(L) for L in link_lengths]
+        self.obstacle_specs = list(obstacles or [])
+        self.link_radius = float(link_radius)
+        self.n_samples = int(n_samples)
+        self.k = int(k)
+        self.step_deg = float(step_deg)
+        self.self_collision = bool(self_collision)
+        self.seed = int(seed)
+        self._init_checker()
+        self._build()
+
+    def _init_checker(self):
+        self._obstacles = ObstacleSet(self.obstacle_specs) if self.obstacle_specs else None
+
+    # Collision checks
+
+    def is_free(self, configs) -> np.ndarray:
+        configs = np.atleast_2d(np.asarray(configs, dtype=float))
+        return collision_free(self.link_lengths, configs, self._obstacles,
+                              self.link_radius, self.self_collision)
+
+    def edges_free(self, a, b) -> np.ndarray:
+        # (E,) bool: straight joint-space moves a[e] -> b[e] (shortest way
+        # round) stay free at every step_deg. Endpoints are assumed checked.
+        a = np.atleast_2d(np.asarray(a, dtype=float))
+        b = np.atleast_2d(np.asarray(b, dtype=float))
+        delta = wrap_to_minus180_180(b - a)
+        n_steps = np.maximum(2, np.ceil(np.abs(delta).max(axis=1) / self.step_deg).astype(np.int64))
+        counts = n_steps - 1                    # Interior samples only
+        ok = np.ones(a.shape[0], dtype=bool)
+
+        # Edges are grouped so no single pass exceeds _EDGE_CHUNK configurations
+        cum = np.cumsum(counts)
+        e0 = 0
+        while e0 < a.shape[0]:
+            done = cum[e0 - 1] if e0 else 0
+            e1 = max(e0 + 1, int(np.searchsorted(cum, done + _EDGE_CHUNK, side="right")))
+            c = counts[e0:e1]
+            starts = np.cumsum(c) - c
+            edge = np.repeat(np.arange(e0, e1), c)
+            s = (np.arange(int(c.sum())) - np.repeat(starts, c) + 1) / n_steps[edge]
+            configs = a[edge] + s[:, np.newaxis] * delta[edge]
+            ok[e0:e1] = np.logical_and.reduceat(self.is_free(configs), starts)
+            e0 = e1
+        return ok
+
+    # Construction
+
+    def _build(self):
+        rng = np.random.default_rng(self.seed)
+        n_joints = len(self.link_lengths)
+        found: List[np.ndarray] = []
+        n_found = 0
+        for _ in range(_MAX_SAMPLE_ROUNDS):
+            batch = rng.uniform(-180.0, 180.0, (2 * self.n_samples, n_joints))
+            free = batch[self.is_free(batch)]
+            found.append(free)
+            n_found += free.shape[0]
+            if n_found >= self.n_samples:
+                break
+        self.nodes = np.vstack(found)[:self.n_samples] if found else np.zeros((0, n_joints))
+
+        # Candidate edges: each node to its k nearest neighbours, undirected
+        nn = NearestNeighbors(_embed(self.nodes))
+        _, idx = nn.query_batch(nn.points, self.k, exclude_self=True)
+        src = np.repeat(np.arange(self.nodes.shape[0]), idx.shape[1])
+        dst = idx.ravel()
+        pairs = np.unique(np.column_stack([np.minimum(src, dst), np.maximum(src, dst)]), axis=0)
+
+        if pairs.shape[0]:
+            ok = self.edges_free(self.nodes[pairs[:, 0]], self.nodes[pairs[:, 1]])
+            pairs = pairs[ok]
+        self.edges = pairs
+        self.costs = self._cost(self.nodes[pairs[:, 0]], self.nodes[pairs[:, 1]])
+        self._index(nn)
+
+    @staticmethod
+    def _cost(a, b) -> np.ndarray:
+        return np.linalg.norm(wrap_to_minus180_180(np.asarray(b) - np.asarray(a)), axis=-1)
+
+    def _index(self, nn: Optional[NearestNeighbors] = None):
+        # Adjacency in CSR form (both directions) plus the neighbour index for queries
+        n = self.nodes.shape[0]
+        src = np.concatenate([self.edges[:, 0], self.edges[:, 1]])
+        dst = np.concatenate([self.edges[:, 1], self.edges[:, 0]])
+        cost = np.concatenate([self.costs, self.costs])
+        order = np.argsort(src, kind="stable")
+        self._adj_start = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=n))])
+        self._adj_dst = dst[order]
+        self._adj_cost = cost[order]
+        self._nn = nn if nn is not None else NearestNeighbors(_embed(self.nodes))
+
+    # Queries
+
+    def _connect(self, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Roadmap nodes reachable from q by a free straight move
+        _, idx = self._nn.query(_embed(q), 3 * self.k)
+        if idx.size == 0:
+            return idx, np.zeros(0)
+        ok = self.edges_free(np.repeat(q[np.newaxis], idx.size, axis=0), self.nodes[idx])
+        idx = idx[ok]
+        return idx, self._cost(q, self.nodes[idx])
+
+    def plan(self, start, goal, shortcut: bool = True) -> Optional[np.ndarray]:
+        # Collision-free (P, J) waypoint path from start to goal (degrees), or
+        # None if the roadmap cannot connect them
+        start = np.asarray(start, dtype=float)
+        goal = np.asarray(goal, dtype=float)
+        free = self.is_free(np.vstack([start, goal]))
+        if not free[0]:
+            raise ValueError("Start configuration is in collision")
+        if not free[1]:
+            raise ValueError("Goal configuration is in collision")
+
+        if self.edges_free(start, goal)[0]:
+            return np.vstack([start, goal])
+
+        s_idx, s_cost = self._connect(start)
+        g_idx, g_cost = self._connect(goal)
+        if s_idx.size == 0 or g_idx.size == 0:
+            return None
+
+        node_path = self._dijkstra(s_idx, s_cost, g_idx, g_cost)
+        if node_path is None:
+            return None
+        path = np.vstack([start, self.nodes[node_path], goal])
+        return self.shortcut(path) if shortcut else path
+
+    def _dijkstra(self, s_idx, s_cost, g_idx, g_cost) -> Optional[List[int]]:
+        n = self.nodes.shape[0]
+        goal_cost = np.full(n, np.inf)
+        goal_cost[g_idx] = g_cost
+        dist = np.full(n, np.inf)
+        prev = np.full(n, -1, dtype=np.int64)
+        heap = []
+        for i, c in zip(s_idx.tolist(), s_cost.tolist()):
+            if c < dist[i]:
+                dist[i] = c
+                heapq.heappush(heap, (c, i))
+
+        best, best_node = math.inf, -1
+        done = np.zeros(n, dtype=bool)
+        while heap:
+            d, i = heapq.heappop(heap)
+            if done[i]:
+                continue
+            done[i] = True
+            if d >= best:
+                break
+            if d + goal_cost[i] < best:
+                best, best_node = d + goal_cost[i], i
+            lo, hi = self._adj_start[i], self._adj_start[i + 1]
+            for j, c in zip(self._adj_dst[lo:hi].tolist(), self._adj_cost[lo:hi].tolist()):
+                nd = d + c
+                if nd < dist[j]:
+                    dist[j] = nd
+                    prev[j] = i
+                    heapq.heappush(heap, (nd, j))
+
+        if best_node < 0:
+            return None
+        path = [best_node]
+        while prev[path[-1]] >= 0:
+            path.append(int(prev[path[-1]]))
+        return path[::-1]
+
+    def shortcut(self, path: np.ndarray) -> np.ndarray:
+        # Greedy: from each kept waypoint jump to the furthest one reachable
+        # by a free straight move (all candidates validated in one pass)
+        out = [path[0]]
+        i, last = 0, path.shape[0] - 1
+        while i < last:
+            cand = np.arange(i + 2, last + 1)
+            j = i + 1
+            if cand.size:
+                ok = self.edges_free(np.repeat(path[i][np.newaxis], cand.size, axis=0), path[cand])
+                if ok.any():
+                    j = int(cand[np.flatnonzero(ok)[-1]])
+            out.append(path[j])
+            i = j
+        return np.vstack(out)
+
+    # Persistence
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            version=_FORMAT_VERSION,
+            link_lengths=np.array(self.link_lengths),
+            obstacles=np.array(json.dumps(self.obstacle_specs)),
+            params=np.array([self.link_radius, self.n_samples, self.k, self.step_deg,
+                             float(self.self_collision), self.seed]),
+            nodes=self.nodes,
+            edges=self.edges,
+        )
+
+    @classmethod
+    def load(cls, path) -> "Roadmap":
+        with np.load(path) as data:
+            if int(data["version"]) != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported roadmap version in {path}")
+            link_radius, n_samples, k, step_deg, self_collision, seed = data["params"]
+            obj = cls.__new__(cls)
+            obj.link_lengths = [float(L) for L in data["link_lengths"]]
+            obj.obstacle_specs = json.loads(str(data["obstacles"]))
+            obj.link_radius = float(link_radius)
+            obj.n_samples = int(n_samples)
+            obj.k = int(k)
+            obj.step_deg = float(step_deg)
+            obj.self_collision = bool(self_collision)
+            obj.seed = int(seed)
+            obj.nodes = data["nodes"]
+            obj.edges = data["edges"]
+        obj._init_checker()
+        obj.costs = obj._cost(obj.nodes[obj.edges[:, 0]], obj.nodes[obj.edges[:, 1]])
+        obj._index()
+        return obj
+
+    @classmethod
+    def load_or_build(
+            cls,
+            link_lengths: Sequence[float],
+            obstacles: Optional[Sequence[Dict[str, Any]]] = None,
+            link_radius: float = 0.0,
+            n_samples: int = 1000,
+            k: int = 10,
+            step_deg: float = 2.0,
+            self_collision: bool = True,
+            seed: int = 0,
+            cache_dir=None,
+    ) -> "Roadmap":
+        # Reuse a roadmap persisted for the same arm, obstacles and parameters
+        cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        key = _roadmap_key(link_lengths, obstacles, link_radius, n_samples, k, step_deg, self_collision, seed)
+        path = cache_dir / f"roadmap_{key}.npz"
+        if path.exists():
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[info] Rebuilding roadmap, could not load {path}: {e}", file=sys.stderr)
+
+        roadmap = cls(link_lengths, obstacles, link_radius=link_radius, n_samples=n_samples, k=k,
+                      step_deg=step_deg, self_collision=self_collision, seed=seed)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            roadmap.save(path)
+        except OSError as e:
+            print(f"[info] Could not persist roadmap to {path}: {e}", file=sys.stderr)
+        return roadmap
+
+def path_trajectory(path: np.ndarray, duration_s: float) -> JointTrajectory:
+    # Constant joint-space speed along the waypoints, total time duration_s
+    lengths = np.linalg.norm(wrap_to_minus180_180(np.diff(path, axis=0)), axis=1)
+    total = lengths.sum()
+    durations = duration_s * lengths / total if total > 0 else np.full(lengths.shape, duration_s / lengths.size)
+    return JointTrajectory(path, durations, "linear")
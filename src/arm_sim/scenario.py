@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+from arm_sim.ik import ik_2link, ik_nlink, clamp_target_to_workspace, clamp_target_to_workspace_nlink
+from arm_sim.collision import CollisionReport, ObstacleSet, check_trajectory
+from arm_sim.roadmap import Roadmap, path_trajectory
+from arm_sim.trajectory import JointTrajectory
+from arm_sim import profiling
+
+# Scenario loading and the plan/IK/clamp steps shared by the CLI and the batch
+# runner. Nothing here imports plotting or GUI code.
+
+def load_scenario(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        raise FileNotFoundError(f"Scenario file not found: {path}")
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Scenario json must be an object with keys")
+    return data
+
+class TargetSolution(NamedTuple):
+    end: list[float]        # End pose in degrees
+    x: float                # Target actually solved for (after clamping)
+    y: float
+    clamped: bool
+    converged: bool
+
+def solve_target(
+        links,
+        target,
+        prefer: str = "elbow_up",
+        clamp: bool = False,
+        seed=None,
+        ik_tol: float = 1e-4,
+        ik_iters: int = 100,
+        ik_table=None,
+) -> TargetSolution:
+    # seed is the start pose; check it here so a wrong length gets the same
+    # message as check_inputs rather than a solver error
+    if seed is not None and len(seed) != len(links):
+        raise ValueError("Links, start and end must have the same length")
+
+    x, y = float(target[0]), float(target[1])
+
+    was_clamped = False
+    if clamp:
+        with profiling.span("clamp"):
+            if len(links) == 2:
+                x, y, was_clamped = clamp_target_to_workspace(x, y, links[0], links[1])
+            else:
+                x, y, was_clamped = clamp_target_to_workspace_nlink(x, y, links)
+
+    # Compute IK solution for end pose (degrees). Outside the workspace the
+    # 2-link closed form returns the nearest stretched/folded pose, which does
+    # not reach the target, so that counts as not converged (as in solve_path)
+    converged = True
+    if len(links) == 2 and not was_clamped:
+        converged = not clamp_target_to_workspace(x, y, links[0], links[1])[2]
+    with profiling.span("ik"):
+        if ik_table is not None:
+            end = list(ik_table.query(x, y, prefer))
+        elif len(links) == 2:
+            th1_deg, th2_deg = ik_2link(x, y, links[0], links[1], prefer=prefer)
+            end = [th1_deg, th2_deg]
+        else:
+            # Numerical solver, warm-started from the start pose when given
+            end, converged = ik_nlink(x, y, links, seed=seed, tol=ik_tol, max_iter=ik_iters)
+
+    return TargetSolution(end, x, y, was_clamped, converged)
+
+def check_inputs(links, start, end):
+    if links is None or start is None or end is None:
+        raise ValueError("Missing inputs. Provide --scenario or flags: --links, "
+        "--start, --end, (and optionally --duration, --fps, --easing, --trail, --save).")
+    if len(links) != len(start) or len(links) != len(end):
+        raise ValueError("Links, start and end must have the same length")
+
+def check_collisions(links, frames, scenario: Dict[str, Any]) -> Optional[CollisionReport]:
+    # Obstacle ("obstacles") and self-collision ("self_collision") checks for
+    # planned frames; None when the scenario asks for neither
+    obstacles = ObstacleSet.from_scenario(scenario, margin=float(scenario.get("clearance_margin", 1.0)))
+    self_collision = bool(scenario.get("self_collision", obstacles is not None))
+    if obstacles is None and not self_collision:
+        return None
+    with profiling.span("collision"):
+        return check_trajectory(links, frames, obstacles,
+                                link_radius=float(scenario.get("link_radius", 0.0)),
+                                self_collision=self_collision)
+
+def describe_collision(report: CollisionReport) -> str:
+    if not report.collides:
+        return f"No collisions (min clearance {report.min_clearance:.3f} at frame {report.min_clearance_frame})"
+    if report.kind == "self":
+        return f"Self-collision at frame {report.first_frame}: link {report.link + 1} hits link {report.other + 1}"
+    return f"Collision at frame {report.first_frame}: link {report.link + 1} hits obstacle {report.other}"
+
+def plan_roadmap_trajectory(links, start, end, duration: float, scenario: Dict[str, Any]) -> JointTrajectory:
+    # Collision-free path from the cached PRM roadmap for the scenario's
+    # obstacles, at constant joint speed over `duration`
+    with profiling.span("roadmap"):
+        roadmap = Roadmap.load_or_build(links, scenario.get("obstacles"),
+                                        link_radius=float(scenario.get("link_radius", 0.0)),
+                                        self_collision=bool(scenario.get("self_collision", True)))
+    with profiling.span("plan"):
+        path = roadmap.plan(start, end)
+    if path is None:
+        raise ValueError("No collision-free path found between start and end")
+    return path_trajectory(path, duration)
@@ -0,0 +1,459 @@
+import argparse
+import asyncio
+import itertools
+import json
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.ik import (
+    clamp_target_to_workspace_batch,
+    clamp_target_to_workspace_nlink_batch,
+    ik_2link_batch,
+    ik_nlink_batch,
+)
+from arm_sim.planner import interpolate_joint_space_batch
+from arm_sim.profiling import Histogram
+
+# Local kinematics service: one process keeps the solvers warm and answers
+# FK, IK, clamping and planning requests for any number of clients.
+#
+#   python -m arm_sim.service --port 8765          TCP on 127.0.0.1
+#   python -m arm_sim.service --unix /tmp/arm.sock Unix socket
+#
+# The protocol is JSON lines. Each request is one object with an "op" and an
+# optional "id" that is echoed back; responses may arrive out of order.
+#   {"id": 1, "op": "fk", "links": [7, 10], "angles": [30, 45]}
+#   {"id": 2, "op": "ik", "links": [7, 10], "target": [5, 5], "prefer": "elbow_up", "clamp": true}
+#   {"id": 3, "op": "clamp", "links": [7, 10], "target": [40, 0]}
+#   {"id": 4, "op": "plan", "start": [0, 0], "end": [90, 45], "duration": 1, "fps": 30, "easing": "cosine"}
+#   {"id": 5, "op": "stats"}
+#   -> {"id": 1, "ok": true, "result": {...}} or {"id": 1, "ok": false, "error": "..."}
+#
+# Requests from all connections go into one queue. The batcher waits up to
+# max_delay_ms after the first arrival (or until max_batch requests), groups
+# what it collected by op and compatible parameters, and evaluates each group
+# with one call to the vectorized solver.
+
+DEFAULT_PORT = 8765
+_LINE_LIMIT = 1 << 20   # Longest accepted request line, in bytes
+_MAX_PLAN_FRAMES = 100_000  # Frames per plan request (about 55 min at 30 fps)
+
+class ServiceError(RuntimeError):
+    pass
+
+def _links(params) -> Tuple[float, ...]:
+    links = tuple(float(L) for L in params["links"])
+    if not links:
+        raise ValueError("links must be non-empty")
+    return links
+
+def _pose(values, n: int, name: str) -> List[float]:
+    pose = [float(a) for a in values]
+    if len(pose) != n:
+        raise ValueError(f"{name} must have {n} angles")
+    return pose
+
+def _point(values) -> List[float]:
+    pt = [float(v) for v in values]
+    if len(pt) != 2:
+        raise ValueError("target must be [x, y]")
+    return pt
+
+# Per op: a key function that validates one request and returns
+# (group key, normalized params), and an evaluator for a list of requests
+# sharing a key. Requests are only batched with others of the same key.
+
+def _fk_key(params):
+    links = _links(params)
+    return ("fk", links), {"angles": _pose(params["angles"], len(links), "angles")}
+
+def _fk_eval(key, items):
+    links = key[1]
+    pos = forward_kinematics_batch(links, [p["angles"] for p in items])
+    return [{"positions": pos[i].tolist(), "end_effector": pos[i, -1].tolist()} for i in range(len(items))]
+
+def _ik_key(params):
+    links = _links(params)
+    prefer = params.get("prefer", "elbow_up")
+    if prefer not in ("elbow_up", "elbow_down"):
+        raise ValueError("prefer must be elbow_up or elbow_down")
+    clamp = bool(params.get("clamp", False))
+    norm = {"target": _point(params["target"])}
+    if len(links) == 2:
+        return ("ik", links, prefer, clamp), norm
+    tol = float(params.get("tol", 1e-4))
+    max_iter = int(params.get("max_iter", 100))
+    seeded = params.get("seed") is not None
+    if seeded:
+        norm["seed"] = _pose(params["seed"], len(links), "seed")
+    return ("ik", links, prefer, clamp, tol, max_iter, seeded), norm
+
+def _ik_eval(key, items):
+    links, prefer, clamp = key[1], key[2], key[3]
+    pts = np.array([p["target"] for p in items])
+    if len(links) == 2:
+        r = ik_2link_batch(pts, links[0], links[1], clamp=clamp)
+        angles, targets, reachable = r.pick(prefer), r.targets, r.reachable
+        converged = np.ones(len(items), dtype=bool)
+    else:
+        tol, max_iter, seeded = key[4], key[5], key[6]
+        clamped, was_clamped = clamp_target_to_workspace_nlink_batch(pts, links)
+        targets = clamped if clamp else pts
+        reachable = ~was_clamped
+        seed = np.array([p["seed"] for p in items]) if seeded else None
+        r = ik_nlink_batch(links, targets, seed=seed, tol=tol, max_iter=max_iter)
+        angles, converged = r.angles, r.converged
+    return [{"angles": angles[i].tolist(), "target": targets[i].tolist(),
+             "reachable": bool(reachable[i]), "converged": bool(converged[i])}
+            for i in range(len(items))]
+
+def _clamp_key(params):
+    return ("clamp", _links(params)), {"target": _point(params["target"])}
+
+def _clamp_eval(key, items):
+    links = key[1]
+    pts = np.array([p["target"] for p in items])
+    if len(links) == 2:
+        out, was_clamped = clamp_target_to_workspace_batch(pts, links[0], links[1])
+    else:
+        out, was_clamped = clamp_target_to_workspace_nlink_batch(pts, links)
+    return [{"target": out[i].tolist(), "clamped": bool(was_clamped[i])} for i in range(len(items))]
+
+def _plan_key(params):
+    start = [float(a) for a in params["start"]]
+    if not start:
+        raise ValueError("start must be non-empty")
+    end = _pose(params["end"], len(start), "end")
+    duration = float(params.get("duration", 3.0))
+    fps = int(params.get("fps", 30))
+    if duration <= 0 or fps <= 0:
+        raise ValueError("duration and fps must be positive")
+    if duration * fps > _MAX_PLAN_FRAMES:
+        raise ValueError(f"plan is limited to {_MAX_PLAN_FRAMES} frames (duration * fps)")
+    easing = params.get("easing", "linear")
+    if easing not in ("linear", "cosine", "smoothstep"):
+        raise ValueError("easing must be linear, cosine or smoothstep")
+    return ("plan", len(start), duration, fps, easing), {"start": start, "end": end}
+
+def _plan_eval(key, items):
+    _, _, duration, fps, easing = key
+    frames = interpolate_joint_space_batch([p["start"] for p in items], [p["end"] for p in items],
+                                           duration, fps, easing)
+    return [{"frames": frames[i].tolist()} for i in range(len(items))]
+
+OPS: Dict[str, Tuple[Callable, Callable]] = {
+    "fk": (_fk_key, _fk_eval),
+    "ik": (_ik_key, _ik_eval),
+    "clamp": (_clamp_key, _clamp_eval),
+    "plan": (_plan_key, _plan_eval),
+}
+
+class ServiceStats:
+    # Request/error counts, batch sizes and latency histograms (queue wait
+    # plus evaluation), per op
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.batches = 0
+        self.batched = 0
+        self.max_batch = 0
+        self.latency: Dict[str, Histogram] = {}
+        self.eval = Histogram()
+
+    def request(self, op: str, seconds: float, ok: bool):
+        self.requests[op] = self.requests.get(op, 0) + 1
+        if not ok:
+            self.errors += 1
+        hist = self.latency.get(op)
+        if hist is None:
+            hist = self.latency[op] = Histogram()
+        hist.add(seconds)
+
+    def batch(self, size: int, seconds: float):
+        self.batches += 1
+        self.batched += size
+        self.max_batch = max(self.max_batch, size)
+        self.eval.add(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        uptime = time.perf_counter() - self.started
+        total = sum(self.requests.values())
+        return {
+            "uptime_s": uptime,
+            "requests": dict(self.requests),
+            "errors": self.errors,
+            "throughput_per_s": total / uptime if uptime > 0 else 0.0,
+            "batches": self.batches,
+            "mean_batch": self.batched / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "latency": {op: h.summary() for op, h in self.latency.items()},
+            "eval": self.eval.summary(),
+        }
+
+class KinematicsService:
+    def __init__(self, max_batch: int = 256, max_delay_ms: float = 1.0):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1e3
+        self.stats = ServiceStats()
+        self._queue: List[Tuple[tuple, Dict[str, Any], asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._batcher = asyncio.create_task(self._run_batcher())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+
+    async def submit(self, op: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        # Raises ValueError/KeyError/TypeError for a malformed request
+        if op not in OPS:
+            raise ValueError(f"unknown op {op!r}")
+        key, norm = OPS[op][0](params)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((key, norm, future))
+        self._wakeup.set()
+        return await future
+
+    async def _run_batcher(self):
+        while True:
+            await self._wakeup.wait()
+            # Collection window: let concurrent requests pile up, unless a full batch is waiting
+            if len(self._queue) < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+            self._wakeup.clear()
+            while self._queue:
+                chunk = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+                self._evaluate(chunk)
+                # Give the connections a chance to send the answers
+                await asyncio.sleep(0)
+
+    def _evaluate(self, chunk):
+        groups: Dict[tuple, list] = {}
+        for key, norm, future in chunk:
+            groups.setdefault(key, []).append((norm, future))
+
+        for key, entries in groups.items():
+            t0 = time.perf_counter()
+            evaluate = OPS[key[0]][1]
+            try:
+                results = evaluate(key, [norm for norm, _ in entries])
+            except Exception as e:
+                # Anything a group raises is reported to its requests only;
+                # letting it escape would kill the batcher and hang every client
+                if len(entries) > 1:
+                    # Isolate the offending request(s) by evaluating one at a time
+                    results = []
+                    for norm, _ in entries:
+                        try:
+                            results.append(evaluate(key, [norm])[0])
+                        except Exception as e1:
+                            results.append(e1)
+                else:
+                    results = [e]
+            self.stats.batch(len(entries), time.perf_counter() - t0)
+
+            for (_, future), result in zip(entries, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        lock = asyncio.Lock()
+        pending = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):
+                    break   # Over-long line or dropped connection
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._respond(line, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock):
+        t0 = time.perf_counter()
+        req_id = None
+        op = "invalid"
+        try:
+            msg = json.loads(line)
+            if not isinstance(msg, dict):
+                raise ValueError("request must be a JSON object")
+            req_id = msg.get("id")
+            op = str(msg.get("op"))
+            if op == "stats":
+                reply = {"id": req_id, "ok": True, "result": self.stats.snapshot()}
+            else:
+                reply = {"id": req_id, "ok": True, "result": await self.submit(op, msg)}
+                self.stats.request(op, time.perf_counter() - t0, True)
+        except (ValueError, KeyError, TypeError, ArithmeticError) as e:
+            msg = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+            reply = {"id": req_id, "ok": False, "error": msg}
+            self.stats.request(op if op in OPS else "invalid", time.perf_counter() - t0, False)
+        except Exception as e:
+            # Unexpected failure inside the solver (e.g. MemoryError): still answer
+            reply = {"id": req_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.stats.request(op if op in OPS else "invalid", time.perf_counter() - t0, False)
+
+        data = json.dumps(reply).encode("utf-8") + b"\n"
+        async with lock:
+            try:
+                writer.write(data)
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+async def serve(
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        unix_path: Optional[str] = None,
+        max_batch: int = 256,
+        max_delay_ms: float = 1.0,
+):
+    service = KinematicsService(max_batch=max_batch, max_delay_ms=max_delay_ms)
+    await service.start()
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle_connection, path=unix_path, limit=_LINE_LIMIT)
+        where = unix_path
+    else:
+        server = await asyncio.start_server(service.handle_connection, host, port, limit=_LINE_LIMIT)
+        bound = server.sockets[0].getsockname()
+        where = f"{bound[0]}:{bound[1]}"
+    print(f"[info] Kinematics service listening on {where}", file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+class KinematicsClient:
+    # Blocking client. call_many() pipelines requests over the one connection,
+    # so the server can put them in the same micro-batch.
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = DEFAULT_PORT,
+            unix_path: Optional[str] = None,
+            timeout: Optional[float] = 30.0,
+    ):
+        if unix_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rwb")
+        self._ids = itertools.count(1)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def call_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Results in request order; raises ServiceError if any request failed
+        ids = []
+        for req in requests:
+            req_id = next(self._ids)
+            ids.append(req_id)
+            self._file.write(json.dumps(dict(req, id=req_id)).encode("utf-8") + b"\n")
+        self._file.flush()
+
+        replies = {}
+        while len(replies) < len(ids):
+            line = self._file.readline()
+            if not line:
+                raise ServiceError("connection closed by the service")
+            reply = json.loads(line)
+            replies[reply.get("id")] = reply
+
+        results = []
+        for req_id in ids:
+            reply = replies[req_id]
+            if not reply.get("ok"):
+                raise ServiceError(reply.get("error", "request failed"))
+            results.append(reply["result"])
+        return results
+
+    def call(self, op: str, **params) -> Dict[str, Any]:
+        return self.call_many([dict(params, op=op)])[0]
+
+    def fk(self, links, angles) -> Dict[str, Any]:
+        return self.call("fk", links=list(links), angles=list(angles))
+
+    def ik(self, links, target, prefer: str = "elbow_up", clamp: bool = False, seed=None) -> Dict[str, Any]:
+        params = {"links": list(links), "target": list(target), "prefer": prefer, "clamp": clamp}
+        if seed is not None:
+            params["seed"] = list(seed)
+        return self.call("ik", **params)
+
+    def clamp(self, links, target) -> Dict[str, Any]:
+        return self.call("clamp", links=list(links), target=list(target))
+
+    def plan(self, start, end, duration: float = 3.0, fps: int = 30, easing: str = "linear") -> List[List[float]]:
+        return self.call("plan", start=list(start), end=list(end), duration=duration,
+                         fps=fps, easing=easing)["frames"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call("stats")
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Local FK/IK/clamp/plan service with micro-batching")
+    p.add_argument("--host", type=str, default="127.0.0.1", help="TCP address to bind")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port (0 picks a free one)")
+    p.add_argument("--unix", type=str, default=None, help="Listen on this Unix socket path instead of TCP")
+    p.add_argument("--max-batch", type=int, default=256, help="Most requests evaluated per batch")
+    p.add_argument("--max-delay-ms", type=float, default=1.0,
+                   help="How long to collect requests after the first one arrives")
+    return p
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_batch, args.max_delay_ms))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.planner import wrap_to_minus180_180
+from arm_sim.trajfile import TrajectoryWriter
+from arm_sim import profiling
+
+# Recorded joint telemetry: timestamped joint angles from a controller log.
+#
+# Logs are read in fixed-size chunks of rows. Only one chunk is resident at a
+# time, whatever the length of the log. Supported formats:
+#   .csv/.txt   one row per sample. An optional header row names the columns.
+#               Comma or whitespace separated, and "#" starts a comment.
+#   .npy        a 2-D array of rows, memory-mapped
+#   other       raw little-endian float32/float64 rows with no header. The
+#               number of joints must be given.
+# Each row holds a timestamp and the joint angles. By default the time is the
+# first column and every other column is a joint.
+#
+# Controller timestamps are irregular, so Resampler turns the chunks into
+# frames on a uniform grid t0 + k / fps by linear interpolation. It carries the
+# last sample across chunk boundaries. Frames come out in blocks, so they can
+# be fed lazily to the renderer, to batched FK or to a trajectory file.
+
+CHUNK_ROWS = 65536  # Rows parsed per chunk, and the largest frame block emitted
+TEXT_SUFFIXES = (".csv", ".txt")
+
+Column = Union[int, str]
+
+class Resampler:
+    # Streaming linear resampler. push() takes each chunk of (t, q) samples in
+    # log order and yields the (K, N) frames that fall inside it.
+    # A sample whose timestamp repeats or goes back in time (a clock glitch,
+    # or overlapping log segments) is dropped and counted. With max_gap set,
+    # frames inside a longer dropout hold the last sample before the gap
+    # instead of interpolating across it.
+
+    def __init__(self, fps: float, max_gap: Optional[float] = None, t0: Optional[float] = None,
+                 block: int = CHUNK_ROWS):
+        if fps <= 0:
+            raise ValueError("fps must be positive")
+        if max_gap is not None and max_gap <= 0:
+            raise ValueError("max_gap must be positive")
+        self.fps = float(fps)
+        self.max_gap = max_gap
+        self.t0 = t0
+        self.block = max(1, int(block))
+        self.rows = 0       # Samples pushed
+        self.dropped = 0    # Samples dropped as out of order
+        self.gaps = 0       # Intervals longer than max_gap
+        self.frames = 0     # Frames emitted
+        self._t = None      # Last kept sample, carried into the next chunk
+        self._q = None
+        self._k = 0         # Index of the next frame on the grid
+
+    @property
+    def duration(self) -> float:
+        return max(0, self.frames - 1) / self.fps
+
+    def push(self, t, q) -> Iterator[np.ndarray]:
+        t = np.asarray(t, dtype=float).ravel()
+        q = np.asarray(q, dtype=float).reshape(len(t), -1)
+        self.rows += len(t)
+        if len(t) == 0:
+            return
+
+        # Keep strictly increasing timestamps. fmax ignores NaN, so a NaN
+        # timestamp is dropped without affecting the samples after it.
+        prev = -np.inf if self._t is None else self._t
+        latest = np.fmax.accumulate(np.concatenate(([prev], t)))
+        keep = t > latest[:-1]
+        self.dropped += int(len(t) - keep.sum())
+        t, q = t[keep], q[keep]
+        if len(t) == 0:
+            return
+
+        if self._t is None:
+            if self.t0 is None:
+                self.t0 = float(t[0])
+            ts, qs = t, q
+        else:
+            ts = np.concatenate(([self._t], t))
+            qs = np.concatenate((self._q[np.newaxis, :], q))
+        self._t, self._q = float(ts[-1]), qs[-1].copy()
+        if self.max_gap is not None:
+            self.gaps += int((np.diff(ts) > self.max_gap).sum())
+
+        # Grid frames up to and including the newest sample
+        k_end = int(np.floor((ts[-1] - self.t0) * self.fps + 1e-9)) + 1
+        for k0 in range(self._k, k_end, self.block):
+            with profiling.span("resample"):
+                out = self._interpolate(ts, qs, self.t0 + np.arange(k0, min(k0 + self.block, k_end)) / self.fps)
+            self.frames += len(out)
+            yield out
+        self._k = max(self._k, k_end)
+
+    def _interpolate(self, ts: np.ndarray, qs: np.ndarray, times: np.ndarray) -> np.ndarray:
+        if len(ts) == 1:
+            return np.repeat(qs, len(times), axis=0)
+        i = np.clip(np.searchsorted(ts, times, side="right") - 1, 0, len(ts) - 2)
+        span = ts[i + 1] - ts[i]
+        frac = np.clip((times - ts[i]) / span, 0.0, 1.0)
+        if self.max_gap is not None:
+            frac = np.where(span > self.max_gap, 0.0, frac)
+        # Shorter way around, as in TrajectoryFile.sample
+        return qs[i] + frac[:, np.newaxis] * wrap_to_minus180_180(qs[i + 1] - qs[i])
+
+class TelemetryLog:
+    # Chunked reader for one log file. Nothing is read until a generator is
+    # iterated, and every pass re-reads the file from the start.
+    # Angles come out in degrees and times in seconds. For rad logs, set
+    # units="rad". For millisecond timestamps, set time_scale=1e-3.
+
+    def __init__(
+            self,
+            path,
+            time_column: Column = 0,
+            joint_columns: Optional[Sequence[Column]] = None,
+            units: str = "deg",
+            time_scale: float = 1.0,
+            n_joints: Optional[int] = None,
+            dtype: str = "float64",
+            chunk_rows: int = CHUNK_ROWS,
+    ):
+        if units not in ("deg", "rad"):
+            raise ValueError("units must be deg or rad")
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be positive")
+        self.path = Path(path)
+        self.units = units
+        self.time_scale = float(time_scale)
+        self.chunk_rows = int(chunk_rows)
+        suffix = self.path.suffix.lower()
+        self.format = "csv" if suffix in TEXT_SUFFIXES else "npy" if suffix == ".npy" else "raw"
+
+        if self.format == "csv":
+            names, n_cols, self._delimiter, self._skip = self._read_header()
+        elif self.format == "npy":
+            data = np.load(self.path, mmap_mode="r")
+            if data.ndim != 2:
+                raise ValueError(f"{path}: expected a 2-D array of rows, got shape {data.shape}")
+            names, n_cols = None, data.shape[1]
+        else:
+            if n_joints is None:
+                raise ValueError(f"{path}: raw binary logs need n_joints")
+            self._dtype = np.dtype(dtype).newbyteorder("<")
+            if self._dtype.kind != "f" or self._dtype.itemsize not in (4, 8):
+                raise ValueError("dtype must be float32 or float64")
+            names, n_cols = None, int(n_joints) + 1
+
+        self.columns = names
+        self._width = n_cols
+        self.time_index = self._column_index(time_column, names, n_cols)
+        if joint_columns is None:
+            self.joint_indices = [c for c in range(n_cols) if c != self.time_index]
+        else:
+            self.joint_indices = [self._column_index(c, names, n_cols) for c in joint_columns]
+        if not self.joint_indices:
+            raise ValueError(f"{path}: no joint columns")
+        if n_joints is not None and len(self.joint_indices) != n_joints:
+            raise ValueError(f"{path}: {len(self.joint_indices)} joint columns, expected {n_joints}")
+
+    @property
+    def n_joints(self) -> int:
+        return len(self.joint_indices)
+
+    @staticmethod
+    def _column_index(col: Column, names, n_cols: int) -> int:
+        if isinstance(col, str) and not col.lstrip("-").isdigit():
+            if names is None or col not in names:
+                raise ValueError(f"unknown column {col!r}")
+            return names.index(col)
+        idx = int(col)
+        if not -n_cols <= idx < n_cols:
+            raise ValueError(f"column {idx} out of range for {n_cols} columns")
+        return idx % n_cols
+
+    def _read_header(self):
+        # (names or None, column count, delimiter, lines to skip)
+        with self.path.open("r", encoding="utf-8") as f:
+            skip = 0
+            for line in f:
+                skip += 1
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    break
+            else:
+                raise ValueError(f"{self.path}: log is empty")
+        delimiter = "," if "," in line else None
+        fields = [v.strip() for v in line.split(delimiter)]
+        try:
+            [float(v) for v in fields]
+        except ValueError:
+            return fields, len(fields), delimiter, skip
+        return None, len(fields), delimiter, skip - 1
+
+    def _to_deg(self, q: np.ndarray) -> np.ndarray:
+        return np.degrees(q) if self.units == "rad" else q
+
+    def chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        # ((K,) times, (K, N) angles) per chunk of at most chunk_rows rows
+        if self.format == "csv":
+            usecols = [self.time_index, *self.joint_indices]
+            with self.path.open("r", encoding="utf-8") as f:
+                for _ in range(self._skip):
+                    next(f)
+                line_no = self._skip
+                while True:
+                    lines = list(islice(f, self.chunk_rows))
+                    if not lines:
+                        return
+                    with profiling.span("telemetry_read"):
+                        try:
+                            rows = np.loadtxt(lines, delimiter=self._delimiter, usecols=usecols,
+                                              comments="#", ndmin=2)
+                        except ValueError as e:
+                            raise ValueError(f"{self.path}: lines {line_no + 1}-{line_no + len(lines)}: {e}") from None
+                    line_no += len(lines)
+                    if len(rows):
+                        # loadtxt returns the columns in usecols order
+                        yield rows[:, 0] * self.time_scale, self._to_deg(rows[:, 1:])
+            return
+
+        if self.format == "npy":
+            data = np.load(self.path, mmap_mode="r")
+        elif self.path.stat().st_size < self._dtype.itemsize * self._width:
+            return
+        else:
+            # Whole rows only, in case the logger was cut off mid-row
+            data = np.memmap(self.path, dtype=self._dtype, mode="r")
+            data = data[:len(data) // self._width * self._width].reshape(-1, self._width)
+        for r0 in range(0, len(data), self.chunk_rows):
+            with profiling.span("telemetry_read"):
+                rows = np.asarray(data[r0:r0 + self.chunk_rows], dtype=float)
+            yield rows[:, self.time_index] * self.time_scale, self._to_deg(rows[:, self.joint_indices])
+
+    def resampler(self, fps: float, max_gap: Optional[float] = None) -> Resampler:
+        return Resampler(fps, max_gap=max_gap, block=self.chunk_rows)
+
+    def frame_blocks(self, fps: float, max_gap: Optional[float] = None,
+                     resampler: Optional[Resampler] = None) -> Iterator[np.ndarray]:
+        # (K, N) blocks of frames at fps. Pass a resampler to read its counters afterwards.
+        rs = resampler if resampler is not None else self.resampler(fps, max_gap)
+        for t, q in self.chunks():
+            yield from rs.push(t, q)
+
+    def frames(self, fps: float, max_gap: Optional[float] = None,
+               resampler: Optional[Resampler] = None) -> Iterator[np.ndarray]:
+        # One (N,) pose per frame, for animate_joint_trajectory's streaming mode
+        for block in self.frame_blocks(fps, max_gap, resampler):
+            yield from block
+
+    def positions(self, link_lengths, fps: float, end_effector_only: bool = False,
+                  max_gap: Optional[float] = None) -> Iterator[np.ndarray]:
+        # Batched FK per frame block: (K, N+1, 2) joint positions, or (K, 2)
+        # end-effector positions
+        if len(link_lengths) != self.n_joints:
+            raise ValueError(f"log has {self.n_joints} joints but {len(link_lengths)} link lengths were given")
+        for block in self.frame_blocks(fps, max_gap):
+            with profiling.span("fk"):
+                yield forward_kinematics_batch(link_lengths, block, end_effector_only=end_effector_only)
+
+    def to_trajectory(self, path, link_lengths, fps: float, dtype: str = "float32",
+                      max_gap: Optional[float] = None,
+                      resampler: Optional[Resampler] = None) -> int:
+        # Resample into a binary trajectory file for random access (scrubbing,
+        # parallel export). Returns the number of frames written.
+        if len(link_lengths) != self.n_joints:
+            raise ValueError(f"log has {self.n_joints} joints but {len(link_lengths)} link lengths were given")
+        with TrajectoryWriter(path, link_lengths, fps, dtype=dtype) as w:
+            for block in self.frame_blocks(fps, max_gap, resampler):
+                w.write(block)
+            return w.n_frames
+
+def open_telemetry(path, **kwargs) -> TelemetryLog:
+    return TelemetryLog(path, **kwargs)
+
+def describe_resample(rs: Resampler) -> str:
+    parts = [f"{rs.rows} samples -> {rs.frames} frames at {rs.fps:g} fps ({rs.duration:.2f} s)"]
+    if rs.dropped:
+        parts.append(f"{rs.dropped} out-of-order samples dropped")
+    if rs.gaps:
+        parts.append(f"{rs.gaps} gaps held")
+    return "Telemetry: " + ", ".join(parts)
@@ -0,0 +1,207 @@
+import bisect
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim.planner import ease_array, wrap_to_minus180_180
+
+class JointTrajectory:
+    # Continuous-time joint-space trajectory through a list of waypoints.
+    # Each segment moves along the shortest angular path (same as
+    # interpolate_joint_space) with its own duration and easing. Nothing is
+    # materialized per frame: poses are evaluated on demand at any time t.
+    # Sampled angles are continuous (unwrapped) across segments, so they may
+    # leave [-180, 180) on long programs.
+
+    def __init__(
+            self,
+            waypoints_deg,
+            durations_s: Union[float, Sequence[float]],
+            easings: Union[str, Sequence[str]] = "linear",
+    ):
+        wps = np.asarray(waypoints_deg, dtype=float)
+        if wps.ndim != 2 or wps.shape[0] < 2 or wps.shape[1] == 0:
+            raise ValueError("waypoints_deg must be a (W, J) array with at least two waypoints")
+        n_seg = wps.shape[0] - 1
+
+        durations = np.broadcast_to(np.asarray(durations_s, dtype=float), (n_seg,)).copy()
+        if np.any(durations < 0):
+            raise ValueError("segment durations must be non-negative")
+
+        if isinstance(easings, str):
+            easings = [easings] * n_seg
+        if len(easings) != n_seg:
+            raise ValueError("easings must be a single name or one per segment")
+
+        # Unwrap the waypoints so each segment is a plain start + s * delta
+        deltas = wrap_to_minus180_180(np.diff(wps, axis=0))
+        starts = wps[0] + np.concatenate((np.zeros((1, wps.shape[1])), np.cumsum(deltas, axis=0)[:-1]))
+
+        self._starts = starts
+        self._deltas = deltas
+        self._durations = durations
+        self._times = np.concatenate(([0.0], np.cumsum(durations)))
+        self._easings = list(easings)
+        # Segment indices grouped by easing, for vectorized evaluation
+        self._easing_groups = {mode: np.array([i for i, e in enumerate(self._easings) if e == mode])
+                               for mode in set(self._easings)}
+
+    @classmethod
+    def from_keyframes(cls, times_s, poses_deg) -> "JointTrajectory":
+        # Linear interpolation between (time, pose) keyframes
+        times = np.asarray(times_s, dtype=float)
+        if times.ndim != 1 or times.size < 2 or np.any(np.diff(times) < 0):
+            raise ValueError("keyframe times must be a non-decreasing sequence of at least two values")
+        return cls(poses_deg, np.diff(times), "linear")
+
+    @property
+    def duration(self) -> float:
+        return float(self._times[-1])
+
+    @property
+    def n_joints(self) -> int:
+        return self._starts.shape[1]
+
+    @property
+    def n_segments(self) -> int:
+        return self._starts.shape[0]
+
+    @property
+    def segment_times(self) -> np.ndarray:
+        # Start time of every segment plus the end time, shape (S+1,)
+        return self._times
+
+    def n_frames(self, fps: float) -> int:
+        # Frame count matching interpolate_joint_space: round(duration*fps)+1
+        return max(1, int(round(self.duration * fps))) + 1
+
+    def sample(self, t):
+        # Pose at time t (seconds). Scalar t gives (J,), an array of T times gives (T, J).
+        # Times outside [0, duration] hold the first/last waypoint.
+        if np.ndim(t) == 0:
+            return self._sample_scalar(float(t))
+
+        ts = np.asarray(t, dtype=float)
+        # O(log n) segment lookup per sample
+        seg = np.clip(np.searchsorted(self._times, ts, side="right") - 1, 0, self.n_segments - 1)
+
+        dur = self._durations[seg]
+        local = ts - self._times[seg]
+        progress = np.divide(local, dur, out=np.ones_like(ts), where=dur > 0)
+        progress = np.where(ts <= 0.0, 0.0, progress)
+
+        s = np.empty_like(progress)
+        if len(self._easing_groups) == 1:
+            s[...] = ease_array(progress, self._easings[0])
+        else:
+            for mode, segs in self._easing_groups.items():
+                mask = np.isin(seg, segs)
+                s[mask] = ease_array(progress[mask], mode)
+
+        return self._starts[seg] + s[..., np.newaxis] * self._deltas[seg]
+
+    def _sample_scalar(self, t: float) -> np.ndarray:
+        i = min(max(bisect.bisect_right(self._times, t) - 1, 0), self.n_segments - 1)
+        dur = self._durations[i]
+        if t <= 0.0:
+            progress = 0.0
+        elif dur > 0:
+            progress = (t - self._times[i]) / dur
+        else:
+            progress = 1.0
+        s = float(ease_array(progress, self._easings[i]))
+        return self._starts[i] + s * self._deltas[i]
+
+    def frames(
+            self,
+            fps: float = 30,
+            t_start: float = 0.0,
+            t_end: Optional[float] = None,
+            chunk_size: int = 1024,
+    ) -> Iterator[np.ndarray]:
+        # Yield (J,) frames at a fixed rate, evaluated lazily in small chunks.
+        # With the default range the frame times match interpolate_joint_space.
+        if t_end is None:
+            t_end = self.duration
+        span = max(0.0, t_end - t_start)
+        n = max(1, int(round(span * fps)))
+
+        for k0 in range(0, n + 1, chunk_size):
+            k = np.arange(k0, min(n + 1, k0 + chunk_size))
+            yield from self.sample(t_start + (k / n) * span)
+
+    def keyframes(
+            self,
+            link_lengths: Optional[Sequence[float]] = None,
+            cart_tol: Optional[float] = None,
+            joint_tol: Optional[float] = None,
+            max_depth: int = 20,
+    ) -> "JointTrajectory":
+        # Sparse linear-keyframe approximation of this trajectory. Intervals
+        # are bisected until linear interpolation between their ends stays
+        # within joint_tol (degrees, any joint) and/or cart_tol (end-effector
+        # distance, needs link_lengths) at the quarter points. All intervals
+        # of one level are tested with a single batched sample/FK call.
+        if cart_tol is None and joint_tol is None:
+            raise ValueError("keyframes needs cart_tol and/or joint_tol")
+        if cart_tol is not None and link_lengths is None:
+            raise ValueError("cart_tol needs link_lengths")
+
+        fractions = np.array([0.25, 0.5, 0.75])
+        times = [self._times]
+        a, b = self._times[:-1], self._times[1:]
+        for _ in range(max_depth):
+            keep = b > a
+            a, b = a[keep], b[keep]
+            if a.size == 0:
+                break
+            tt = a[:, np.newaxis] + fractions * (b - a)[:, np.newaxis]         # (n, 3)
+            exact = self.sample(tt.ravel())
+            qa, qb = self.sample(a), self.sample(b)
+            approx = (qa[:, np.newaxis] + fractions[:, np.newaxis] * (qb - qa)[:, np.newaxis]).reshape(exact.shape)
+
+            bad = np.zeros(a.size, dtype=bool)
+            if joint_tol is not None:
+                bad |= (np.abs(approx - exact).max(axis=1) > joint_tol).reshape(-1, 3).any(axis=1)
+            if cart_tol is not None:
+                ee = forward_kinematics_batch(link_lengths, np.vstack([exact, approx]), end_effector_only=True)
+                dev = np.hypot(*(ee[:exact.shape[0]] - ee[exact.shape[0]:]).T)
+                bad |= (dev > cart_tol).reshape(-1, 3).any(axis=1)
+
+            if not bad.any():
+                break
+            mid = 0.5 * (a[bad] + b[bad])
+            times.append(mid)
+            a, b = np.concatenate([a[bad], mid]), np.concatenate([mid, b[bad]])
+
+        t = np.unique(np.concatenate(times))
+        return JointTrajectory.from_keyframes(t, self.sample(t))
+
+    def at_fps(self, fps: float) -> "SampledFrames":
+        return SampledFrames(self, fps)
+
+class SampledFrames:
+    # Fixed-rate frame view of a trajectory: len() and indexing/slicing like a
+    # frame array (same frame times as interpolate_joint_space), but poses
+    # are sampled only for the frames actually requested. Lets sparse
+    # keyframes go straight to the renderer, exporter and collision checker.
+
+    def __init__(self, trajectory, fps: float):
+        self.trajectory = trajectory
+        self.fps = fps
+        self._n = trajectory.n_frames(fps)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def times(self, idx=slice(None)) -> np.ndarray:
+        k = np.arange(self._n)[idx]
+        return k * (self.trajectory.duration / max(1, self._n - 1))
+
+    def __getitem__(self, idx):
+        return self.trajectory.sample(self.times(idx))
+
+    def __iter__(self):
+        for k0 in range(0, self._n, 4096):
+            yield from self[k0:k0 + 4096]
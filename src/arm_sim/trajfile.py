@@ -0,0 +1,168 @@
+import struct
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+from arm_sim.planner import wrap_to_minus180_180
+
+# Compact binary trajectory format.
+#
+# Layout (little endian):
+#   header   magic b"ARMTRAJ\0", version u16, dtype size u8 (4/8), units u8
+#            (0 = degrees, 1 = radians), n_joints u32, n_links u32, fps f64,
+#            n_frames u64, then n_links f64 link lengths
+#   padding  zeros up to the next 64-byte boundary
+#   frames   n_frames x n_joints contiguous float32/float64, row per frame
+#
+# n_frames is patched when a writer closes; if a recording was cut short the
+# reader falls back to the number of whole frames present in the file.
+# Readers memory-map the frame block, so opening a multi-gigabyte log is
+# instant and only the frames actually touched are paged in.
+
+MAGIC = b"ARMTRAJ\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sHBBIIdQ")
+_N_FRAMES_OFFSET = _HEADER.size - 8
+_ALIGN = 64
+_UNITS = ("deg", "rad")
+
+def _data_offset(n_links: int) -> int:
+    size = _HEADER.size + 8 * n_links
+    return -(-size // _ALIGN) * _ALIGN
+
+class TrajectoryWriter:
+    # Streaming writer: frames can be appended one at a time or in blocks
+
+    def __init__(
+            self,
+            path,
+            link_lengths: Sequence[float],
+            fps: float,
+            dtype: str = "float32",
+            units: str = "deg",
+    ):
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        if self.dtype.kind != "f" or self.dtype.itemsize not in (4, 8):
+            raise ValueError("dtype must be float32 or float64")
+        if units not in _UNITS:
+            raise ValueError(f"units must be one of {_UNITS}")
+
+        self.link_lengths = [float(L) for L in link_lengths]
+        self.n_joints = len(self.link_lengths)
+        self.n_frames = 0
+        self._f = open(path, "wb")
+
+        header = _HEADER.pack(MAGIC, VERSION, self.dtype.itemsize, _UNITS.index(units),
+                              self.n_joints, len(self.link_lengths), float(fps), 0)
+        header += struct.pack(f"<{len(self.link_lengths)}d", *self.link_lengths)
+        self._f.write(header.ljust(_data_offset(len(self.link_lengths)), b"\0"))
+
+    def write(self, frames):
+        # Accepts one (J,) frame or a (K, J) block
+        block = np.asarray(frames, dtype=self.dtype)
+        if block.ndim == 1:
+            block = block[np.newaxis, :]
+        if block.ndim != 2 or block.shape[1] != self.n_joints:
+            raise ValueError(f"frames must have {self.n_joints} joint angles")
+        self._f.write(np.ascontiguousarray(block).tobytes())
+        self.n_frames += block.shape[0]
+
+    def close(self):
+        if self._f.closed:
+            return
+        self._f.seek(_N_FRAMES_OFFSET)
+        self._f.write(struct.pack("<Q", self.n_frames))
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class TrajectoryFile:
+    # Memory-mapped reader. Indexing returns frames in degrees; `frames` is the
+    # raw (M, J) memmap in the stored dtype and units.
+    # Also offers duration/sample()/n_frames() like JointTrajectory, so it can be
+    # played back by the same wall-clock code.
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            raw = f.read(_HEADER.size)
+            if len(raw) < _HEADER.size:
+                raise ValueError(f"Not a trajectory file: {path}")
+            magic, version, itemsize, units, n_joints, n_links, fps, n_frames = _HEADER.unpack(raw)
+            if magic != MAGIC:
+                raise ValueError(f"Not a trajectory file: {path}")
+            if version != VERSION:
+                raise ValueError(f"Unsupported trajectory file version {version}")
+            self.link_lengths = list(struct.unpack(f"<{n_links}d", f.read(8 * n_links)))
+
+        self.fps = fps
+        self.n_joints = n_joints
+        self.units = _UNITS[units]
+        dtype = np.dtype("<f4" if itemsize == 4 else "<f8")
+        offset = _data_offset(n_links)
+
+        # Whole frames actually on disk (covers recordings that never closed)
+        on_disk = (self.path.stat().st_size - offset) // (itemsize * max(1, n_joints))
+        if n_frames == 0 or n_frames > on_disk:
+            n_frames = on_disk
+        if n_frames == 0:
+            self.frames = np.zeros((0, n_joints), dtype=dtype)
+        else:
+            self.frames = np.memmap(self.path, dtype=dtype, mode="r", offset=offset,
+                                    shape=(n_frames, n_joints))
+
+    def __len__(self) -> int:
+        return self.frames.shape[0]
+
+    def __getitem__(self, idx):
+        block = np.asarray(self.frames[idx], dtype=float)
+        return np.degrees(block) if self.units == "rad" else block
+
+    def __iter__(self):
+        # Iterate in blocks so each page is touched once
+        for k0 in range(0, len(self), 4096):
+            yield from self[k0:k0 + 4096]
+
+    @property
+    def duration(self) -> float:
+        return max(0, len(self) - 1) / self.fps
+
+    def n_frames(self, fps: Optional[float] = None) -> int:
+        if fps is None:
+            return len(self)
+        return int(round(self.duration * fps)) + 1
+
+    def sample(self, t):
+        # Linear interpolation between stored frames at time t (seconds), along
+        # the shorter way around so wrapped recordings do not swing through 360°
+        pos = np.clip(np.asarray(t, dtype=float) * self.fps, 0.0, max(0, len(self) - 1))
+        k0 = np.minimum(np.floor(pos).astype(int), max(0, len(self) - 2))
+        frac = (pos - k0)[..., np.newaxis] if np.ndim(pos) else pos - k0
+        a = self[k0]
+        b = self[np.minimum(k0 + 1, len(self) - 1)]
+        return a + frac * wrap_to_minus180_180(b - a)
+
+def open_trajectory(path) -> TrajectoryFile:
+    return TrajectoryFile(path)
+
+def write_trajectory(
+        path,
+        link_lengths: Sequence[float],
+        frames,
+        fps: float,
+        dtype: str = "float32",
+        units: str = "deg",
+) -> int:
+    # Convenience: write a whole in-memory trajectory (or any iterable of frames)
+    with TrajectoryWriter(path, link_lengths, fps, dtype=dtype, units=units) as w:
+        if isinstance(frames, (np.ndarray, list)):
+            w.write(frames)
+        else:
+            for frame in frames:
+                w.write(frame)
+        return w.n_frames
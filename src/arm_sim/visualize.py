@@ -1,6 +1,52 @@
+import itertools
+import time
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
-from arm_sim.fk import forward_kinematics
+from matplotlib.collections import LineCollection
+from arm_sim.export import DEFAULT_TRAIL_LENGTH
+from arm_sim.fk import forward_kinematics_batch
+from arm_sim import profiling
+
+_FK_BLOCK = 1024    # Frames per batched FK call during animation
+
+class TrailBuffer:
+    # Fixed-size ring buffer of the most recent end-effector points. Every
+    # point is written twice, at i and i + capacity, so the live window is
+    # always one contiguous slice and no copy or np.roll is needed per frame.
+    # With every > 1 only one in `every` pushed points is kept.
+
+    def __init__(self, capacity: int, every: int = 1):
+        if capacity < 1:
+            raise ValueError("trail capacity must be at least 1")
+        if every < 1:
+            raise ValueError("trail decimation must be at least 1")
+        self.capacity = capacity
+        self.every = every
+        self._data = np.empty((2 * capacity, 2))
+        self._head = 0      # Next write slot, in [0, capacity)
+        self._size = 0
+        self._pushed = 0
+
+    def push(self, x: float, y: float) -> bool:
+        # True if the point was kept (the trail changed)
+        keep = self._pushed % self.every == 0
+        self._pushed += 1
+        if not keep:
+            return False
+        i = self._head
+        self._data[i] = self._data[i + self.capacity] = (x, y)
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return True
+
+    def view(self) -> np.ndarray:
+        # (size, 2) oldest to newest; a view into the buffer, valid until the next push
+        start = self._head + self.capacity - self._size
+        return self._data[start:start + self._size]
+
+    def __len__(self) -> int:
+        return self._size
 
 def animate_joint_trajectory(
         link_lengths: list[float], 
@@ -8,12 +54,34 @@ def animate_joint_trajectory(
         fps: int = 30,
         trail: bool = False,
         save: str | None = None,
+        workers: int | None = None,
+        trail_length: int | None = None,
+        trail_every: int = 1,
 ):
-
-    # Precompute totals
-    n_frames = len(angle_frames)
-    if n_frames == 0:
+    # angle_frames is either a sequence (list, array, memory-mapped file,
+    # lazy trajectory view) or any iterable of poses, e.g. a generator reading
+    # a live feed. Iterables are consumed one pose per frame and never stored.
+    streaming = not (hasattr(angle_frames, "__len__") and hasattr(angle_frames, "__getitem__"))
+    if streaming:
+        source = iter(angle_frames)
+        try:
+            first_pose = next(source)
+        except StopIteration:
+            raise ValueError("angle_frame is empty") from None
+        if save and workers is not None:
+            # The parallel exporter needs random access, so a (finite) stream is collected first
+            angle_frames = np.asarray([first_pose, *source], dtype=float)
+            streaming = False
+    elif len(angle_frames) == 0:
         raise ValueError("angle_frame is empty")
+
+    # Headless parallel export: no figure window or FuncAnimation involved
+    if save and workers is not None:
+        from arm_sim.export import export_trajectory
+        with profiling.span("export"):
+            export_trajectory(link_lengths, angle_frames, save, fps, trail, workers=workers,
+                              trail_length=trail_length, trail_every=trail_every)
+        return None
     interval_ms = 1000 / fps
 
     # Figure and axes
@@ -26,49 +94,161 @@ def animate_joint_trajectory(
     ax.set_xlim(-max_reach * 1.1, max_reach * 1.1)
     ax.set_ylim(-max_reach * 1.1, max_reach * 1.1)
 
-    # Initial frame
-    initial_positions = forward_kinematics(link_lengths, angle_frames[0])
-    xs = [p[0] for p in initial_positions]
-    ys = [p[1] for p in initial_positions]
+    # Joint positions come from batched FK over blocks of frames, so only one
+    # block is resident even when replaying a memory-mapped trajectory file
+    block = {"start": -1, "positions": None}
 
-    line, = ax.plot(xs, ys, "-o", color = "blue")
+    def positions_at(frame_idx):
+        start = (frame_idx // _FK_BLOCK) * _FK_BLOCK
+        if block["start"] != start:
+            with profiling.span("fk"):
+                block["positions"] = forward_kinematics_batch(
+                    link_lengths, angle_frames[start:start + _FK_BLOCK])
+            block["start"] = start
+        return block["positions"][frame_idx - start]
 
-    # trail
+    # Initial frame
+    pts = forward_kinematics_batch(link_lengths, [first_pose])[0] if streaming else positions_at(0)
+    line, = ax.plot(pts[:, 0], pts[:, 1], "-o", color = "blue")
+
+    # Trail: bounded history of end-effector points, so memory and redraw
+    # cost stay constant however long the animation runs
     if trail:
         (trail_line,) = ax.plot([], [], color ="red", linewidth = 1)
-        trail_x, trail_y = [], []
+        trail_buf = TrailBuffer(trail_length or DEFAULT_TRAIL_LENGTH, trail_every)
 
-    # Update function
-    def update(frame_idx):
-        angles = angle_frames[frame_idx]
-        positions = forward_kinematics(link_lengths, angles)
+    # Frame-to-frame time of the update callback (only while profiling)
+    last_update = [None]
+
+    # Update function: gets a frame index, or the pose itself when streaming
+    def update(frame):
+        if profiling.is_enabled():
+            now = time.perf_counter()
+            if last_update[0] is not None:
+                profiling.frame(now - last_update[0])
+            last_update[0] = now
 
-        xs = [p[0] for p in positions]
-        ys = [p[1] for p in positions]
+        if streaming:
+            with profiling.span("fk"):
+                pts = forward_kinematics_batch(link_lengths, [frame])[0]
+        else:
+            pts = positions_at(frame)
+        xs = pts[:, 0]
+        ys = pts[:, 1]
 
         line.set_data(xs, ys)
 
         if trail:
-            trail_x.append(xs[-1])
-            trail_y.append(ys[-1])
-            trail_line.set_data(trail_x, trail_y)
+            if trail_buf.push(xs[-1], ys[-1]):
+                tail = trail_buf.view()
+                trail_line.set_data(tail[:, 0], tail[:, 1])
             return (line, trail_line)
 
         return (line,)
 
     # Build animation
+    if streaming:
+        # Unknown length: no repeat (which would buffer the stream) and no
+        # frame-data cache. The first pose was drawn above, so init_func
+        # keeps FuncAnimation from consuming a frame for its initial draw.
+        anim = FuncAnimation(
+            fig,
+            update,
+            frames = itertools.chain([first_pose], source),
+            init_func = lambda: (line, trail_line) if trail else (line,),
+            interval = interval_ms,
+            blit = True,
+            repeat = False,
+            cache_frame_data = False,
+        )
+    else:
+        anim = FuncAnimation(
+            fig,
+            update,
+            frames = len(angle_frames),
+            interval = interval_ms,
+            blit = True,
+        )
+
+    # Save or show
+    if save:
+        with profiling.span("encode"):
+            anim.save(save, fps = fps) # Requires ffmpeg for MP4, Pillow for GIF
+    else:
+        plt.show()
+
+    return anim
+
+class FleetArtists:
+    # One artist per layer for a whole fleet: a LineCollection holding every
+    # link of every arm and one scatter for all joints. Bases are static.
+    # Each frame only swaps the segment and offset arrays.
+
+    def __init__(self, ax, fleet, cmap: str = "tab20"):
+        self.fleet = fleet
+        colors = plt.get_cmap(cmap)(np.arange(len(fleet)) % 20)
+        arm_of_link = np.nonzero(fleet.link_mask)[0]
+        arm_of_joint = np.nonzero(fleet.joint_mask)[0]
+        self._link_idx = np.flatnonzero(fleet.link_mask)
+        self._joint_idx = np.flatnonzero(fleet.joint_mask)
+
+        ax.scatter(fleet.base[:, 0], fleet.base[:, 1], marker="s", s=30, color="black", zorder=1)
+        self.links = LineCollection([], colors=colors[arm_of_link], linewidths=2, animated=True)
+        ax.add_collection(self.links)
+        joints0 = fleet.positions_at(0.0).reshape(-1, 2)[self._joint_idx]
+        self.joints = ax.scatter(joints0[:, 0], joints0[:, 1], s=10, color=colors[arm_of_joint],
+                                 zorder=3, animated=True)
+
+    def update(self, positions: np.ndarray):
+        # positions: (A, N+1, 2) from Fleet.positions
+        segs = np.stack((positions[:, :-1], positions[:, 1:]), axis=2).reshape(-1, 2, 2)
+        self.links.set_segments(segs[self._link_idx])
+        self.joints.set_offsets(positions.reshape(-1, 2)[self._joint_idx])
+        return (self.links, self.joints)
+
+def animate_fleet(
+        fleet,
+        fps: int = 30,
+        duration: float | None = None,
+        save: str | None = None,
+):
+    # Plays every arm of the fleet together; one batched FK call per frame
+    duration = fleet.end_time if duration is None else duration
+    n_frames = max(1, int(round(duration * fps))) + 1
+
+    fig, ax = plt.subplots()
+    ax.set_aspect("equal", adjustable = "box")
+    ax.grid(True, linestyle = "--", alpha = 0.5)
+    xmin, xmax, ymin, ymax = fleet.bounds()
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax)
+
+    artists = FleetArtists(ax, fleet)
+    artists.update(fleet.positions_at(0.0))
+    last_update = [None]
+
+    def update(frame_idx):
+        if profiling.is_enabled():
+            now = time.perf_counter()
+            if last_update[0] is not None:
+                profiling.frame(now - last_update[0])
+            last_update[0] = now
+        with profiling.span("fk"):
+            positions = fleet.positions_at(frame_idx / fps)
+        return artists.update(positions)
+
     anim = FuncAnimation(
         fig,
         update,
         frames = n_frames,
-        interval = interval_ms,
+        interval = 1000 / fps,
         blit = True,
     )
 
-    # Save or show
     if save:
-        anim.save(save, fps = fps) # Requires ffmpeg for MP4, Pillow for GIF
+        with profiling.span("encode"):
+            anim.save(save, fps = fps)
     else:
         plt.show()
 
-    return anim
\ No newline at end of file
+    return anim
@@ -0,0 +1,29 @@
+import numpy as np
+
+from arm_sim.cli import main
+from arm_sim.trajfile import open_trajectory
+
+# End-to-end runs of the headless `plan` subcommand
+
+def test_plan_writes_csv(tmp_path):
+    out = tmp_path / "frames.csv"
+    assert main(["plan", "--links", "7", "10", "--start", "0", "0", "--end", "90", "45",
+                 "--duration", "1", "--fps", "10", "--out", str(out)]) == 0
+    table = np.loadtxt(out, delimiter=",", skiprows=1)
+    assert table.shape == (11, 3)
+    np.testing.assert_allclose(table[-1, 1:], [90.0, 45.0])
+
+def test_plan_writes_trajectory_file(tmp_path):
+    out = tmp_path / "frames.armtraj"
+    assert main(["plan", "--links", "7", "10", "--start", "0", "0", "--target", "5", "5",
+                 "--duration", "1", "--fps", "10", "--out", str(out)]) == 0
+    traj = open_trajectory(out)
+    assert len(traj) == 11
+    assert traj.link_lengths == [7.0, 10.0]
+
+def test_solve_unreachable_target_is_not_converged(capsys):
+    # Same outcome for the 2-link closed form and the N-link solver
+    for links in (["7", "10"], ["7", "6", "4"]):
+        assert main(["solve", "--links", *links, "--target", "30", "0", "--json"]) == 2
+        assert '"converged": false' in capsys.readouterr().out
+    assert main(["solve", "--links", "7", "10", "--target", "30", "0", "--clamp"]) == 0
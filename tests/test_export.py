@@ -0,0 +1,46 @@
+import numpy as np
+
+from arm_sim import export
+from arm_sim.planner import interpolate_joint_space_batch
+
+# The parallel exporter on the video path, with ffmpeg replaced by a writer
+# that keeps the raw frames it is fed
+
+class _CollectingWriter:
+    frame_format = "rgb24"
+
+    def __init__(self):
+        self.frames = []
+
+    def write(self, frame: bytes):
+        self.frames.append(frame)
+
+    def close(self):
+        pass
+
+def _export(monkeypatch, tmp_path, workers):
+    writers = []
+
+    def open_writer(path, width, height, fps):
+        writer = _CollectingWriter()
+        writer.size = (width, height)
+        writers.append(writer)
+        return writer
+
+    monkeypatch.setattr(export, "_open_writer", open_writer)
+    frames = interpolate_joint_space_batch(np.array([[0.0, 0.0]]), np.array([[120.0, -60.0]]),
+                                           2.0, 20, "linear")[0]
+    n = export.export_trajectory([7, 10], frames, str(tmp_path / "out.mp4"), fps=20,
+                                 trail=True, workers=workers, chunk_size=4,
+                                 figsize=(1.6, 1.2), dpi=50)
+    return n, writers[0]
+
+def test_parallel_video_export_writes_every_frame_in_order(monkeypatch, tmp_path):
+    n, writer = _export(monkeypatch, tmp_path, workers=2)
+    width, height = writer.size
+    # 41 frames in chunks of 4 is 11 chunks, more than the 4 kept in flight
+    assert n == len(writer.frames) == 41
+    assert all(len(frame) == width * height * 3 for frame in writer.frames)
+
+    _, serial = _export(monkeypatch, tmp_path, workers=1)
+    assert writer.frames == serial.frames